@@ -0,0 +1,121 @@
+import gzip
+import hashlib
+import json
+import struct
+from email.utils import formatdate
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from backend.api.spatial import GridIndex
+
+try:
+    import brotli
+except ImportError:  # brotli はオプション。無ければ gzip のみ提供する
+    brotli = None
+
+# arrays / binary 形式で返す座標の小数点以下の桁数 (描画には十分な精度)。dict 形式は元の値のまま返す
+COORD_DECIMALS = 4
+FORMATS = ("dict", "arrays", "binary")
+MEDIA_TYPES = {"dict": "application/json", "arrays": "application/json", "binary": "application/octet-stream"}
+
+
+class CoordinateSet:
+    def __init__(self, ids: np.ndarray, coords: np.ndarray, mtime: float, dict_body: Optional[bytes] = None):
+        """
+        次元削減後の 2 次元座標を float32 の配列として保持し、
+        各形式の応答本文 (非圧縮・gzip・brotli) と ETag を初回要求時に一度だけ作成して使い回す。
+
+        Args:
+            ids (np.ndarray): 論文 ID (int64)
+            coords (np.ndarray): 座標 (N, 2) の float32 配列
+            mtime (float): 元ファイルの更新時刻 (Last-Modified に使用)
+            dict_body (bytes, optional): dict 形式の応答本文。元ファイルの値を丸めずに返すために使う
+        """
+        self.ids = ids
+        self.coords = coords
+        self.last_modified = formatdate(mtime, usegmt=True)
+        self._dict_body = dict_body
+        self._encoded: Dict[str, Dict[str, bytes]] = {}
+        self._grid: Optional[GridIndex] = None
+
+    @classmethod
+    def from_json(cls, path: Path) -> "CoordinateSet":
+        """id をキーとする座標の JSON ファイル ({"188211": [x, y], ...}) を読み込む"""
+        path = Path(path)
+        if not path.exists():
+            return cls(np.empty(0, dtype=np.int64), np.empty((0, 2), dtype=np.float32), 0.0)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        ids = np.fromiter((int(k) for k in data), dtype=np.int64, count=len(data))
+        coords = np.array(list(data.values()), dtype=np.float32).reshape(-1, 2)
+        # 既定の dict 形式は従来どおりファイルの値をそのまま返す (float32 への変換や丸めをしない)
+        dict_body = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        return cls(ids, coords, path.stat().st_mtime, dict_body)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def grid(self) -> GridIndex:
+        """ビューポート検索・近傍検索用の空間インデックス (初回アクセス時に構築)"""
+        if self._grid is None:
+            self._grid = GridIndex(self.coords)
+        return self._grid
+
+    def _body(self, fmt: str) -> bytes:
+        if fmt == "dict":
+            if self._dict_body is None:
+                payload = {str(i): xy for i, xy in zip(self.ids.tolist(), self.coords.astype(np.float64).tolist())}
+                self._dict_body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+            return self._dict_body
+        rounded = np.round(self.coords.astype(np.float64), COORD_DECIMALS)
+        if fmt == "binary":
+            # little-endian: 件数 (uint32)、ID (int64 x N)、座標 (float32 x N x 2)
+            return (
+                struct.pack("<I", len(self))
+                + self.ids.astype("<i8").tobytes()
+                + rounded.astype("<f4").tobytes()
+            )
+        payload = {"ids": self.ids.tolist(), "x": rounded[:, 0].tolist(), "y": rounded[:, 1].tolist()}
+        return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+    def encoded(self, fmt: str) -> Dict[str, bytes]:
+        """形式ごとの応答本文を {"identity": ..., "gzip": ..., "br": ..., "etag": ...} で返す"""
+        if fmt not in self._encoded:
+            body = self._body(fmt)
+            variants = {"identity": body, "gzip": gzip.compress(body, compresslevel=9)}
+            if brotli is not None:
+                variants["br"] = brotli.compress(body)
+            variants["etag"] = f'"{hashlib.sha1(body).hexdigest()}"'.encode("ascii")
+            self._encoded[fmt] = variants
+        return self._encoded[fmt]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match が etag に一致するか。カンマ区切りの複数の値と "*" に対応し、
+    W/ の付いた弱い ETag も同じ値として比較する (GET の条件付きリクエストは弱い比較で判定する)
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def choose_encoding(accept_encoding: Optional[str], available) -> str:
+    """Accept-Encoding から使用する圧縮形式を選ぶ (brotli を優先)"""
+    accepted = {e.split(";")[0].strip() for e in (accept_encoding or "").lower().split(",")}
+    for encoding in ("br", "gzip"):
+        if encoding in accepted and encoding in available:
+            return encoding
+    return "identity"
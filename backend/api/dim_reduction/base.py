@@ -1,5 +1,9 @@
+import os
+import pickle
+import tempfile
 import numpy as np
 from abc import ABC, abstractmethod
+from pathlib import Path
 
 class DimensionalityReducer(ABC):
     @abstractmethod
@@ -15,3 +19,34 @@ class DimensionalityReducer(ABC):
         """
         pass
 
+    @abstractmethod
+    def transform(self, embeddings: np.ndarray) -> np.ndarray:
+        """
+        reduce で学習済みの写像を使って、新しい埋め込みを既存の座標系に射影する (再学習はしない)。
+
+        Args:
+            embeddings (np.ndarray): 新しい論文の高次元の埋め込み配列
+
+        Returns:
+            np.ndarray: 既存のレイアウト上の座標配列
+        """
+        pass
+
+    def save(self, path: Path):
+        """学習済みの状態をファイルに保存する (一時ファイル経由で置き換えるため、書きかけの状態は残らない)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(self, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @staticmethod
+    def load(path: Path) -> "DimensionalityReducer":
+        """save で保存した学習済みのリデューサーを読み込む"""
+        with open(path, "rb") as f:
+            return pickle.load(f)
@@ -8,3 +8,6 @@ class PCAReducer(DimensionalityReducer):
 
     def reduce(self, embeddings: np.ndarray) -> np.ndarray:
         return self.pca.fit_transform(embeddings)
+
+    def transform(self, embeddings: np.ndarray) -> np.ndarray:
+        return self.pca.transform(embeddings)
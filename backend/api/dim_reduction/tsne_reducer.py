@@ -3,8 +3,35 @@ from sklearn.manifold import TSNE
 from .base import DimensionalityReducer
 
 class TSNEReducer(DimensionalityReducer):
-    def __init__(self, n_components=2, perplexity=30, learning_rate=200):
+    def __init__(self, n_components=2, perplexity=30, learning_rate=200, n_neighbors=10):
         self.tsne = TSNE(n_components=n_components, perplexity=perplexity, learning_rate=learning_rate)
+        self.n_neighbors = n_neighbors
+        self.train_embeddings = None
+        self.layout = None
 
     def reduce(self, embeddings: np.ndarray) -> np.ndarray:
-        return self.tsne.fit_transform(embeddings)
+        layout = self.tsne.fit_transform(embeddings)
+        # t-SNE 自体は新しい点を射影できないため、transform 用に学習データとレイアウトを保持する
+        self.train_embeddings = _normalize(embeddings)
+        self.layout = layout.astype(np.float32)
+        return layout
+
+    def transform(self, embeddings: np.ndarray) -> np.ndarray:
+        """
+        新しい点を、コサイン類似度が高い既存の n_neighbors 点の座標の加重平均に置く。
+        (t-SNE には写像が無いため、kNN による近似的な射影)
+        """
+        if self.train_embeddings is None:
+            raise ValueError("TSNEReducer must be fitted with reduce() before transform().")
+        sims = _normalize(embeddings) @ self.train_embeddings.T
+        k = min(self.n_neighbors, sims.shape[1])
+        neighbors = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        weights = np.clip(np.take_along_axis(sims, neighbors, axis=1), 1e-6, None)
+        weights /= weights.sum(axis=1, keepdims=True)
+        return np.einsum("nk,nkd->nd", weights, self.layout[neighbors])
+
+
+def _normalize(embeddings: np.ndarray) -> np.ndarray:
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
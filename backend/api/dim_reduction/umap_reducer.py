@@ -9,3 +9,6 @@ class UMAPReducer(DimensionalityReducer):
 
     def reduce(self, embeddings: np.ndarray) -> np.ndarray:
         return self.reducer.fit_transform(embeddings)
+
+    def transform(self, embeddings: np.ndarray) -> np.ndarray:
+        return self.reducer.transform(embeddings)
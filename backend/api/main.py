@@ -1,17 +1,68 @@
-from fastapi import FastAPI, Query, HTTPException
-import random
-from mangum import Mangum
+from fastapi import Depends, FastAPI, Header, Query, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Optional, Union
+from typing import List, Dict, Optional, Tuple, Union
+from datetime import date, datetime, timezone
+import functools
+import hashlib
+import hmac
 import json
+import os
+import re
+import threading
+import time
 from pathlib import Path
-import uvicorn
 import numpy as np
 from fastapi.middleware.cors import CORSMiddleware
 
-from backend.api.search.search_config import SEARCH_METHOD
-from backend.api.search.tfidf_search import TfidfSearch
+from backend.api.coordinates import FORMATS as COORDINATE_FORMATS
+from backend.api.coordinates import MEDIA_TYPES as COORDINATE_MEDIA_TYPES
+from backend.api.coordinates import CoordinateSet, choose_encoding, etag_matches
+from backend.api.search.search_config import (
+    ANN_INDEX,
+    BATCH_ENABLED,
+    BATCH_MAX_SIZE,
+    BATCH_MAX_WAIT_MS,
+    CORPUS_WATCH_INTERVAL,
+    EMBEDDING_DTYPE,
+    ENABLED_METHODS,
+    HYBRID_DEPTH,
+    HYBRID_RRF_K,
+    IVF_NPROBE,
+    QUERY_CACHE_SIZE,
+    QUERY_CACHE_TTL,
+    RESULT_CACHE_SIZE,
+    RESULT_CACHE_TTL,
+    SEARCH_METHOD,
+    STARTUP_WARMUP,
+)
+from backend.api.search.tfidf_search import TFIDF_ARTIFACTS_DIR, TfidfSearch
 from backend.api.search.embedding_search import EmbeddingSearch
+from backend.api.search.bm25_search import BM25Search
+from backend.api.search.hybrid_search import HybridSearch
+from backend.api.search.ivf_index import IVF_INDEX_FILE
+from backend.api.search.knn_graph import KNN_GRAPH_FILE, KNNGraph
+from backend.api.search.batcher import QueryBatcher
+from backend.api.search.cache import LRUCache, normalize_query
+from backend.api.search.filters import FilterColumns, SearchFilters
+from backend.api.search.pagination import MAX_RESULTS, decode_cursor, encode_cursor, ranking_depth
+from backend.api.search.results import paper_ids, parse_fields, to_result
+from backend.api.search.snapshot import (
+    ENGINE_SNAPSHOT_DIR,
+    load_bm25_snapshot,
+    load_embedding_snapshot,
+    load_filter_snapshot,
+)
+from backend.core.corpus_store import (
+    EMBEDDING_FILES,
+    IDS_FILE,
+    PaperStore,
+    content_fingerprint,
+    corpus_exists,
+    load_embeddings,
+    read_current_version,
+)
 
 app = FastAPI(title="CHI Paper Search API")
 
@@ -28,21 +79,43 @@ app.add_middleware(
 )
 
 # データファイルのパス
+CORPUS_DIR = Path("data/corpus")
 DATA_PATH = Path("data/scraped_data_0314.json")
 EMBEDDINGS_PATH = Path("data/embeddings.json")
 UMAP_PATH = Path("data/umap_coordinates.json")
 PCA_PATH = Path("data/pca_coordinates.json")
 TSNE_PATH = Path("data/tsne_coordinates.json")
+COORDINATE_PATHS = {"umap": UMAP_PATH, "pca": PCA_PATH, "tsne": TSNE_PATH}
+# 版ごとのコーパス (<CORPORA_DIR>/<version>) と、読み込む版を指す CURRENT (scripts/publish_corpus.py で更新)
+CORPORA_DIR = Path("data/corpora")
+# /admin/reload の認証トークンを読む環境変数 (未設定の場合はエンドポイントを無効にする)
+ADMIN_TOKEN_ENV = "ADMIN_TOKEN"
+VERSION_PATTERN = re.compile(r"\w[\w.-]*")
 # グローバル変数
-papers: List[Dict] = []
-search_engine: Optional[Union[TfidfSearch, EmbeddingSearch]] = None
+state: Optional["CorpusState"] = None
+# 手法 -> (座標ファイルのフィンガープリント, 座標セット)
+coordinate_sets: Dict[str, Tuple[str, CoordinateSet]] = {}
+query_cache = LRUCache(maxsize=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL)
+result_cache = LRUCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
+# 再読み込みは同時に 1 つだけ実行する
+reload_lock = threading.Lock()
+reload_status: Dict[str, Optional[str]] = {"status": "idle", "version": None, "error": None}
 
 
-def load_data():
+def load_data(corpus_dir: Path):
     """
-    可能であれば、埋め込み付きのデータ (embeddings.json) を優先して読み込み、
+    可能であれば、バイナリ形式のコーパス (corpus_dir) を優先して読み込み、
+    無ければ埋め込み付きのデータ (embeddings.json) を読み込む。
+    コーパスの場合、論文メタデータはメモリマップされた PaperStore として遅延デコードされる。
+
+    Returns:
+        (papers, embeddings, has_embedding)。JSON から読み込んだ場合、埋め込みは papers の各エントリに含まれる
     """
-    global papers
+    if corpus_exists(corpus_dir):
+        papers = PaperStore(corpus_dir)
+        embeddings, _, has_embedding = load_embeddings(corpus_dir)
+        print(f"Loaded {len(papers)} papers from {corpus_dir} ({int(has_embedding.sum())} with embeddings).")
+        return papers, embeddings, has_embedding
     if EMBEDDINGS_PATH.exists():
         with open(EMBEDDINGS_PATH, "r", encoding="utf-8") as f:
             papers = json.load(f)
@@ -54,22 +127,242 @@ def load_data():
     else:
         papers = []
         print("No data file found.")
+    return papers, None, None
+
+
+def resolve_corpus():
+    """
+    読み込むコーパスのディレクトリと版の名前。
+    CORPORA_DIR/CURRENT があればその版を、無ければ CORPUS_DIR (または JSON) を使い、
+    その場合の版の名前はデータファイルの更新日時 (UTC) とする。
+    """
+    version = read_current_version(CORPORA_DIR)
+    if version is not None:
+        return CORPORA_DIR / version, version
+    for path in (CORPUS_DIR / IDS_FILE, EMBEDDINGS_PATH, DATA_PATH):
+        if path.exists():
+            modified = datetime.fromtimestamp(path.stat().st_mtime, timezone.utc)
+            return CORPUS_DIR, f"{modified:%Y%m%dT%H%M%SZ}"
+    return CORPUS_DIR, "empty"
+
+
+def available_methods():
+    """
+    ENABLED_METHODS と SEARCH_METHOD に含まれる検索方法。
+    hybrid は bm25 と embedding のエンジンを共有するため、それらも使えるようになる。
+    """
+    methods = set(ENABLED_METHODS) | {SEARCH_METHOD}
+    invalid = methods - {"tfidf", "embedding", "bm25", "hybrid"}
+    if invalid:
+        raise ValueError(f"Invalid search method(s): {sorted(invalid)}")
+    if "hybrid" in methods:
+        methods |= {"bm25", "embedding"}
+    return methods
+
+
+def load_knn_graph(corpus_dir: Path, papers):
+    """scripts/build_knn_graph.py で構築した類似論文グラフがあれば読み込む"""
+    path = corpus_dir / KNN_GRAPH_FILE
+    if not path.exists():
+        return None
+    try:
+        fingerprint = content_fingerprint(corpus_dir, EMBEDDING_FILES) if corpus_exists(corpus_dir) else None
+        graph = KNNGraph.load(path, ids=paper_ids(papers), fingerprint=fingerprint)
+    except (OSError, ValueError) as e:
+        print(f"Could not load kNN graph ({e}); similar papers will be searched on demand.")
+        return None
+    print(f"Loaded kNN graph (k={graph.k}) from {path}.")
+    return graph
+
+
+class CorpusState:
+    def __init__(self, corpus_dir: Path, version: str):
+        """
+        1 つの版のコーパスと、そこから構築する検索エンジン・索引をまとめたもの。
+        リクエストは処理の開始時に state を 1 回だけ参照し、以降はその版だけを使うため、
+        処理中に新しい版へ差し替えられても古い版のまま最後まで処理される。
+        エンジンと絞り込み列は最初に使われた時点で構築する (起動時には構築しない)。
+        """
+        self.corpus_dir = corpus_dir
+        self.version = version
+        self.loaded_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.papers, self.embeddings, self.has_embedding = load_data(corpus_dir)
+        self.engines: Dict[str, Union[TfidfSearch, EmbeddingSearch, BM25Search, HybridSearch]] = {}
+        self.filter_columns: Optional[FilterColumns] = None
+        self._browse_order: Optional[np.ndarray] = None
+        # エンジン・絞り込み列の遅延構築用のロック (hybrid は内部で bm25 / embedding を構築するため再入可能)
+        self.lock = threading.RLock()
+        # 論文 ID -> papers 内インデックスと、事前計算した類似論文グラフ
+        self.paper_rows = {int(id_): i for i, id_ in enumerate(paper_ids(self.papers))} if len(self.papers) else {}
+        self.knn_graph = load_knn_graph(corpus_dir, self.papers)
+        # バッチはこの版のエンジンだけで実行する (版をまたいでまとめない)
+        self.batchers: Dict[str, QueryBatcher] = {}
+        if BATCH_ENABLED:
+            self.batchers = {
+                method: QueryBatcher(
+                    functools.partial(self.rank_batch, method),
+                    max_batch_size=BATCH_MAX_SIZE,
+                    max_wait_ms=BATCH_MAX_WAIT_MS,
+                )
+                for method in available_methods()
+            }
+
+    def browse_order(self) -> np.ndarray:
+        """
+        空クエリで返す論文の順序 (papers 内インデックス)。版から決まるシードでシャッフルするため、
+        /search・/search/page・/search/stream で同じ順序になり、ページをまたいでも重複・欠落しない
+        """
+        if self._browse_order is None:
+            seed = int(hashlib.sha1(self.version.encode("utf-8")).hexdigest()[:8], 16)
+            self._browse_order = np.random.default_rng(seed).permutation(len(self.papers))
+        return self._browse_order
+
+    def rank_batch(self, method, queries, top_ns, masks=None):
+        return self.get_engine(method).rank_batch(queries, top_ns, masks=masks)
+
+    def build_engine(self, method: str):
+        """1 つの検索方法のエンジンを構築する。エンジンのスナップショットがあればそこから読み込む"""
+        papers = self.papers
+        snapshot_dir = self.corpus_dir / ENGINE_SNAPSHOT_DIR
+        if method == "tfidf":
+            return TfidfSearch(papers, artifacts_dir=self.corpus_dir / TFIDF_ARTIFACTS_DIR)
+        if method == "embedding":
+            options = dict(
+                ann_index_path=self.corpus_dir / IVF_INDEX_FILE if ANN_INDEX == "ivf" else None,
+                nprobe=IVF_NPROBE,
+                query_cache=query_cache,
+            )
+            engine = load_embedding_snapshot(snapshot_dir, papers, dtype=EMBEDDING_DTYPE, **options)
+            if engine is not None:
+                return engine
+            try:
+                return EmbeddingSearch(
+                    papers, embeddings=self.embeddings, has_embedding=self.has_embedding, dtype=EMBEDDING_DTYPE,
+                    **options,
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=500, detail=str(e))
+        if method == "bm25":
+            engine = load_bm25_snapshot(snapshot_dir, papers)
+            return engine if engine is not None else BM25Search(papers)
+        if method == "hybrid":
+            return HybridSearch(
+                self.get_engine("bm25"), self.get_engine("embedding"), rrf_k=HYBRID_RRF_K, depth=HYBRID_DEPTH
+            )
+        raise ValueError(f"Invalid search method: {method}")
+
+    def get_engine(self, method: str):
+        """検索エンジンを返す。同時に届いたリクエストやウォームアップと重複して構築しないようにロックを取る"""
+        engine = self.engines.get(method)
+        if engine is None:
+            with self.lock:
+                engine = self.engines.get(method)
+                if engine is None:
+                    start = time.perf_counter()
+                    engine = self.build_engine(method)
+                    self.engines[method] = engine
+                    print(f"Built {method} engine for {self.version} in {time.perf_counter() - start:.2f}s.")
+        return engine
+
+    def build_engines(self):
+        """利用可能なすべての検索方法のエンジンを構築する"""
+        return {method: self.get_engine(method) for method in sorted(available_methods())}
+
+    def get_filter_columns(self) -> FilterColumns:
+        """絞り込み用の列。エンジンのスナップショットに含まれていればそこから読み込む"""
+        if self.filter_columns is None:
+            with self.lock:
+                if self.filter_columns is None:
+                    columns = load_filter_snapshot(self.corpus_dir / ENGINE_SNAPSHOT_DIR, self.papers)
+                    self.filter_columns = columns if columns is not None else FilterColumns(self.papers)
+        return self.filter_columns
+
+    def filter_mask(self, filters: SearchFilters):
+        """絞り込み条件に合う論文のマスク。条件が無い場合は None"""
+        if filters.is_empty():
+            return None
+        return self.get_filter_columns().mask(filters)
+
+    def warm_up(self):
+        """すべてのエンジンと絞り込み用の列を構築し、埋め込みモデルを読み込んでおく"""
+        start = time.perf_counter()
+        self.get_filter_columns()
+        self.build_engines()
+        if "embedding" in self.engines:
+            self.engines["embedding"].model
+        print(f"Warm-up of {self.version} finished in {time.perf_counter() - start:.2f}s.")
+
+
+def reload_corpus(version: Optional[str] = None) -> CorpusState:
+    """
+    コーパスを読み込み直す。新しい版のエンジンをすべて構築してから state を差し替えるため、
+    差し替え直後のリクエストも構築を待たない。差し替えは参照の代入 1 回で、処理中のリクエストは古い版を使い続ける。
+    version を省略した場合は CURRENT が指す版 (無ければ CORPUS_DIR) を読み込む。
+    """
+    global state
+    corpus_dir, version = resolve_corpus() if version is None else (CORPORA_DIR / version, version)
+    if corpus_dir != CORPUS_DIR and not corpus_exists(corpus_dir):
+        raise FileNotFoundError(f"{corpus_dir} is not a corpus directory")
+    reload_status.update(status="loading", version=version, error=None)
+    try:
+        new_state = CorpusState(corpus_dir, version)
+        new_state.warm_up()
+    except Exception as e:
+        reload_status.update(status="failed", error=str(e))
+        raise
+    state = new_state
+    # 古い版の結果はキーに版を含むため使われないが、キャッシュの容量を空けるために消しておく
+    result_cache.clear()
+    reload_status.update(status="idle")
+    print(f"Switched to corpus version {version}.")
+    return new_state
+
+
+def start_reload(version: Optional[str] = None) -> bool:
+    """バックグラウンドのスレッドで reload_corpus を実行する。既に再読み込み中の場合は False"""
+    if not reload_lock.acquire(blocking=False):
+        return False
+
+    def run():
+        try:
+            reload_corpus(version)
+        except Exception as e:
+            print(f"Reload of corpus version {version or 'CURRENT'} failed: {e}")
+        finally:
+            reload_lock.release()
+
+    threading.Thread(target=run, name="corpus-reload", daemon=True).start()
+    return True
+
+
+def watch_corpus(interval: float):
+    """CORPORA_DIR/CURRENT を interval 秒ごとに確認し、指す版が変わったら再読み込みする"""
+    last = read_current_version(CORPORA_DIR)
+    while True:
+        time.sleep(interval)
+        version = read_current_version(CORPORA_DIR)
+        # 再読み込み中で開始できなかった場合は次の確認時に再試行する
+        if version is not None and version != last and start_reload(version):
+            last = version
 
 
 @app.on_event("startup")
 def startup_event():
-    global search_engine
-    load_data()
-    if SEARCH_METHOD == "tfidf":
-        search_engine = TfidfSearch(papers)
-    elif SEARCH_METHOD == "embedding":
-        try:
-            search_engine = EmbeddingSearch(papers)
-        except ValueError as e:
-            raise HTTPException(status_code=500, detail=str(e))
-    else:
-        raise ValueError("Invalid SEARCH_METHOD")
-    print(f"Using {SEARCH_METHOD} search method.")
+    """
+    起動時はデータのメモリマップと軽い索引の読み込みだけを行う。
+    エンジンとモデルは最初のリクエストで構築するか、STARTUP_WARMUP に応じて事前に構築する。
+    """
+    global state
+    corpus_dir, version = resolve_corpus()
+    state = CorpusState(corpus_dir, version)
+    if STARTUP_WARMUP == "eager":
+        state.warm_up()
+    elif STARTUP_WARMUP == "background":
+        threading.Thread(target=state.warm_up, name="warm-up", daemon=True).start()
+    if CORPUS_WATCH_INTERVAL:
+        threading.Thread(target=watch_corpus, args=(CORPUS_WATCH_INTERVAL,), name="corpus-watch", daemon=True).start()
+    methods = ", ".join(sorted(available_methods()))
+    print(f"Serving corpus version {version} with {SEARCH_METHOD} search method (available: {methods}).")
 
 
 class Author(BaseModel):
@@ -94,64 +387,328 @@ class SearchResult(BaseModel):
     sessions: Optional[List[Session]] = []
 
 
+def search_filters(
+    date_from: Optional[date] = Query(None, description="最初のセッションの日付がこの日以降 (YYYY-MM-DD)"),
+    date_to: Optional[date] = Query(None, description="最初のセッションの日付がこの日以前 (YYYY-MM-DD)"),
+    content_type: List[str] = Query([], description="details.content_type (複数指定可)"),
+    venue: List[str] = Query([], description="セッション会場 (複数指定可)"),
+    author: Optional[str] = Query(None, description="著者名または所属に含まれる語"),
+) -> SearchFilters:
+    """検索系エンドポイント共通の絞り込みパラメータ"""
+    return SearchFilters(
+        date_from=date_from, date_to=date_to, content_types=content_type, venues=venue, author=author
+    )
+
+
+def resolve_method(method: Optional[str]) -> str:
+    method = method or SEARCH_METHOD
+    methods = available_methods()
+    if method not in methods:
+        raise HTTPException(status_code=400, detail=f"Invalid method. Available: {sorted(methods)}")
+    return method
+
+
+def resolve_fields(fields: Optional[str]):
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def rank_query(current: CorpusState, query: str, top_n: int, method: str, filters: SearchFilters, mask):
+    """
+    上位 top_n 件の (current.papers 内インデックス, スコア) を返す。
+    同じ (版, クエリ, top_n, 検索方法, 絞り込み条件) の結果はキャッシュから再利用する。
+    クエリが空の場合は、絞り込み条件に合う論文を browse_order の順にスコア 0.0 で返す。
+    """
+    if query.strip() == "":
+        order = current.browse_order()
+        if mask is not None:
+            order = order[mask[order]]
+        indices = order[:top_n]
+        return indices, np.zeros(len(indices), dtype=np.float32)
+    key = (current.version, normalize_query(query), top_n, method, filters.cache_key())
+    ranked = result_cache.get(key)
+    if ranked is None:
+        if method in current.batchers:
+            # 同時に届いたクエリとまとめて 1 回の encode と行列積で処理する
+            ranked = await current.batchers[method].submit(query, top_n, mask)
+        else:
+            ranked = await run_in_threadpool(lambda: current.get_engine(method).rank(query, top_n, None, mask))
+        result_cache.put(key, ranked)
+    return ranked
+
+
 @app.get("/search", response_model=List[SearchResult])
-def search(
+async def search(
     query: str = Query("", description="Search query string"),
-    top_n: int = Query(10, ge=1, le=2000)
+    top_n: int = Query(10, ge=1, le=MAX_RESULTS),
+    method: Optional[str] = Query(None, description="検索方法: embedding, bm25, hybrid, tfidf (省略時は既定の方法)"),
+    fields: Optional[str] = Query(None, description="返すフィールド (カンマ区切り、例: id,title,score)"),
+    filters: SearchFilters = Depends(search_filters),
 ):
-    assert search_engine is not None, "Search engine not initialized"
-    
-    # クエリが空の場合、ランダムな論文を返す
-    if query.strip() == "":
-        print("Empty query, returning random papers.")
-        # ランダムに top_n 件を取得
-        if not papers:
-            raise HTTPException(status_code=500, detail="No papers available")
-        random_results = random.sample(papers, min(top_n, len(papers)))
-        # スコアは 0.0 で返す
-        results = []
-        for paper in random_results:
-            results.append({
-                "id": paper["id"],
-                "url": paper["url"],
-                "title": paper["title"],
-                "abstract": paper.get("abstract") or "",
-                "score": 0.0,
-                "authors": paper.get("authors", []),
-                "details": paper.get("details", {}),
-                "sessions": paper.get("sessions", []),
-            })
-        return results
-    else:
-        results = search_engine.search(query, top_n=top_n)
-        return results
+    current = state
+    method = resolve_method(method)
+    projection = resolve_fields(fields)
+    # 絞り込み条件は上位 k 件の選択前にエンジン内で適用する
+    mask = current.filter_mask(filters)
+
+    # クエリが空の場合、シャッフルした論文をスコア 0.0 で返す (/search/page と同じ順序)
+    if query.strip() == "" and not len(current.papers):
+        raise HTTPException(status_code=500, detail="No papers available")
+    indices, scores = await rank_query(current, query, top_n, method, filters, mask)
+    results = [to_result(current.papers[idx], score, projection) for idx, score in zip(indices, scores)]
+    if projection is not None:
+        # フィールドを絞った場合は SearchResult の検証を行わずにそのまま返す
+        return JSONResponse(results)
+    return results
+
+
+@app.get("/search/page")
+async def search_page(
+    query: str = Query("", description="Search query string"),
+    limit: int = Query(20, ge=1, le=200, description="1 ページの件数"),
+    cursor: Optional[str] = Query(None, description="前のページの next_cursor"),
+    method: Optional[str] = Query(None, description="検索方法: embedding, bm25, hybrid, tfidf (省略時は既定の方法)"),
+    fields: Optional[str] = Query(None, description="返すフィールド (カンマ区切り、例: id,title,score)"),
+    filters: SearchFilters = Depends(search_filters),
+):
+    """
+    カーソルによるページング検索。順位は同点時も論文 ID で決定的なため、
+    ページをまたいで重複・欠落は起きない。空クエリの場合は /search と同じシャッフル順に返す
+    (順序は版から決まるため、カーソルの版の照合で取り違えも検出できる)。
+    カーソルはコーパスの版にも結び付けるため、再読み込み後に古いカーソルを渡すと 400 を返す。
+    """
+    current = state
+    method = resolve_method(method)
+    projection = resolve_fields(fields)
+    key = (current.version, normalize_query(query), method, filters.cache_key())
+    try:
+        offset = decode_cursor(cursor, key) if cursor else 0
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    mask = current.filter_mask(filters)
+    # 次のページの有無を判定するため 1 件多くランク付けする
+    depth = ranking_depth(offset + limit + 1)
+    indices, scores = await rank_query(current, query, depth, method, filters, mask)
+    page = range(offset, min(offset + limit, len(indices)))
+    results = [to_result(current.papers[indices[i]], scores[i], projection) for i in page]
+    has_more = offset + limit < len(indices)
+    return JSONResponse({
+        "results": results,
+        "next_cursor": encode_cursor(offset + limit, key) if has_more else None,
+    })
+
+
+@app.get("/search/stream")
+async def search_stream(
+    query: str = Query("", description="Search query string"),
+    top_n: int = Query(10, ge=1, le=MAX_RESULTS),
+    method: Optional[str] = Query(None, description="検索方法: embedding, bm25, hybrid, tfidf (省略時は既定の方法)"),
+    fields: Optional[str] = Query(None, description="返すフィールド (カンマ区切り、例: id,title,score)"),
+    filters: SearchFilters = Depends(search_filters),
+):
+    """
+    検索結果を NDJSON (1 行 1 件) で返す。ランク付けは最初の行を送る前に top_n 件すべて終えるため、
+    最初の結果までの時間は /search と変わらない。1 件ずつシリアライズして送るので、
+    件数が多い場合に応答全体をメモリ上に作らずに済む。
+    """
+    current = state
+    method = resolve_method(method)
+    projection = resolve_fields(fields)
+    mask = current.filter_mask(filters)
+    indices, scores = await rank_query(current, query, top_n, method, filters, mask)
+
+    def generate():
+        for idx, score in zip(indices, scores):
+            yield json.dumps(to_result(current.papers[idx], score, projection), ensure_ascii=False) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@app.get("/papers/{paper_id}/similar", response_model=List[SearchResult])
+def similar_papers(
+    paper_id: int,
+    top_n: int = Query(10, ge=1, le=200),
+    fields: Optional[str] = Query(None, description="返すフィールド (カンマ区切り、例: id,title,score)"),
+    filters: SearchFilters = Depends(search_filters),
+):
+    """
+    指定した論文に類似した論文を返す (More like this)。
+    事前計算した kNN グラフがあればその近傍リストから O(k) で返し、
+    無い場合や、保存済みの k 件では top_n 件に足りない場合 (top_n > k、または絞り込みで減った場合) は
+    保存済みの埋め込みをクエリとして検索する。いずれもモデルの呼び出しは行わない。
+    """
+    current = state
+    projection = resolve_fields(fields)
+    row = current.paper_rows.get(paper_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Paper not found")
+    mask = current.filter_mask(filters)
+    can_search = "embedding" in available_methods()
+    ranked = None
+    if current.knn_graph is not None:
+        ranked = current.knn_graph.similar(row, top_n, mask=mask)
+        if len(ranked[0]) < top_n and current.knn_graph.truncated(row) and can_search:
+            ranked = None
+    elif not can_search:
+        raise HTTPException(status_code=503, detail="Similar papers are not available")
+    if ranked is None:
+        ranked = current.get_engine("embedding").rank_similar(row, top_n, mask=mask)
+    indices, scores = ranked
+    results = [to_result(current.papers[idx], score, projection) for idx, score in zip(indices, scores)]
+    if projection is not None:
+        return JSONResponse(results)
+    return results
+
+
+def get_coordinate_set(method: str) -> CoordinateSet:
+    """
+    座標ファイルは初回要求時に読み込み、以降はメモリ上の配列と事前エンコード済みの応答を使う。
+    前処理で座標ファイルが書き換えられた (サイズか更新日時が変わった) 場合は読み込み直す
+    """
+    path = COORDINATE_PATHS[method]
+    fingerprint = content_fingerprint(path.parent, (path.name,))
+    cached = coordinate_sets.get(method)
+    if cached is None or cached[0] != fingerprint:
+        cached = coordinate_sets[method] = (fingerprint, CoordinateSet.from_json(path))
+    return cached[1]
+
+
+def coordinate_response(request: Request, method: str, fmt: str) -> Response:
+    if fmt not in COORDINATE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format. Available: {list(COORDINATE_FORMATS)}")
+    coords = get_coordinate_set(method)
+    variants = coords.encoded(fmt)
+    etag = variants["etag"].decode("ascii")
+    headers = {
+        "ETag": etag,
+        "Last-Modified": coords.last_modified,
+        "Cache-Control": "public, max-age=0, must-revalidate",
+        "Vary": "Accept-Encoding",
+    }
+    # クライアントが同じ版を持っていれば本文を返さない
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    encoding = choose_encoding(request.headers.get("accept-encoding"), variants)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=variants[encoding], media_type=COORDINATE_MEDIA_TYPES[fmt], headers=headers)
 
-def load_coordinates(path: Path) -> Dict[str, List[float]]:
-    if path.exists():
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
 
 @app.get("/dimensions", response_model=Dict[str, List[float]])
-def get_dimensions(method: str = Query("umap", description="次元削減手法: umap, pca, tsne")):
-    if method == "umap":
-        coords = load_coordinates(UMAP_PATH)
-    elif method == "pca":
-        coords = load_coordinates(PCA_PATH)
-    elif method == "tsne":
-        coords = load_coordinates(TSNE_PATH)
-    else:
+def get_dimensions(
+    request: Request,
+    method: str = Query("umap", description="次元削減手法: umap, pca, tsne"),
+    format: str = Query("dict", description="応答形式: dict (id をキーとする辞書), arrays (ids/x/y の配列), binary"),
+):
+    if method not in COORDINATE_PATHS:
         raise HTTPException(status_code=400, detail="Invalid method")
-    return coords
+    return coordinate_response(request, method, format)
+
+
+@app.get("/dimensions/viewport")
+def get_viewport(
+    xmin: float,
+    ymin: float,
+    xmax: float,
+    ymax: float,
+    method: str = Query("umap", description="次元削減手法: umap, pca, tsne"),
+    max_points: int = Query(2000, ge=1, le=20000, description="これを超える場合はクラスタにまとめて返す"),
+    resolution: int = Query(64, ge=1, le=512, description="クラスタにまとめる際の 1 辺のビン数"),
+):
+    """
+    矩形 (ビューポート) 内の点だけを返す。点数が max_points を超える低ズーム時は、
+    resolution x resolution のビンごとに重心・点数・代表論文 ID にまとめて返す。
+    """
+    if method not in COORDINATE_PATHS:
+        raise HTTPException(status_code=400, detail="Invalid method")
+    coords = get_coordinate_set(method)
+    indices = coords.grid.query_bbox(xmin, ymin, xmax, ymax)
+    if len(indices) <= max_points:
+        return {
+            "mode": "points",
+            "ids": coords.ids[indices].tolist(),
+            "x": coords.coords[indices, 0].tolist(),
+            "y": coords.coords[indices, 1].tolist(),
+        }
+    cx, cy, counts, representative = coords.grid.clusters(indices, xmin, ymin, xmax, ymax, resolution)
+    return {
+        "mode": "clusters",
+        "x": cx.tolist(),
+        "y": cy.tolist(),
+        "count": counts.tolist(),
+        "representative_ids": coords.ids[representative].tolist(),
+    }
+
+
+@app.get("/dimensions/nearest")
+def get_nearest(
+    x: float,
+    y: float,
+    method: str = Query("umap", description="次元削減手法: umap, pca, tsne"),
+    k: int = Query(10, ge=1, le=200),
+):
+    """2 次元マップ上で (x, y) に近い論文を距離の近い順に返す"""
+    if method not in COORDINATE_PATHS:
+        raise HTTPException(status_code=400, detail="Invalid method")
+    coords = get_coordinate_set(method)
+    indices, distances = coords.grid.nearest(x, y, k)
+    return {
+        "ids": coords.ids[indices].tolist(),
+        "x": coords.coords[indices, 0].tolist(),
+        "y": coords.coords[indices, 1].tolist(),
+        "distance": distances.tolist(),
+    }
 
 
 @app.get("/umap", response_model=Dict[str, List[float]])
-def get_umap_coordinates():
-    if UMAP_PATH.exists():
-        with open(UMAP_PATH, "r", encoding="utf-8") as f:
-            umap_coords = json.load(f)
-        return umap_coords
-    return {}
+def get_umap_coordinates(request: Request):
+    return coordinate_response(request, "umap", "dict")
+
+# キャッシュのヒット率確認用エンドポイント
+@app.get("/cache/stats")
+def cache_stats():
+    stats = {"query_embedding": query_cache.stats(), "results": result_cache.stats()}
+    if state is not None and state.batchers:
+        stats["batchers"] = {method: b.stats() for method, b in state.batchers.items()}
+    return stats
+
+
+@app.get("/version")
+def get_version():
+    """提供中のコーパスの版と、再読み込みの状態"""
+    current = state
+    return {
+        "version": current.version,
+        "papers": len(current.papers),
+        "loaded_at": current.loaded_at,
+        "engines": sorted(current.engines),
+        "reload": dict(reload_status),
+    }
+
+
+@app.post("/admin/reload", status_code=202)
+def admin_reload(
+    version: Optional[str] = Query(None, description="読み込む版 (省略時は CURRENT が指す版)"),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """
+    コーパスをバックグラウンドで読み込み直し、エンジンの構築が終わってから差し替える。
+    進み具合は /version の reload で確認できる。
+    """
+    token = os.environ.get(ADMIN_TOKEN_ENV)
+    if not token:
+        raise HTTPException(status_code=403, detail=f"Reload is disabled; set {ADMIN_TOKEN_ENV} to enable it")
+    if not hmac.compare_digest(x_admin_token or "", token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+    if version is not None:
+        if not VERSION_PATTERN.fullmatch(version):
+            raise HTTPException(status_code=400, detail="Invalid version")
+        if not corpus_exists(CORPORA_DIR / version):
+            raise HTTPException(status_code=404, detail=f"Corpus version {version} not found")
+    if not start_reload(version):
+        raise HTTPException(status_code=409, detail="A reload is already in progress")
+    return {"status": "loading", "version": version or read_current_version(CORPORA_DIR) or str(CORPUS_DIR)}
 
 # ヘルスチェック用エンドポイント
 @app.get("/check")
@@ -160,8 +717,22 @@ def health_check():
     return {"status": "ok"}
 
 
-handler = Mangum(app)
+_mangum = None
+
+
+def handler(event, context):
+    """
+    Lambda のハンドラー。mangum は最初の呼び出し時に import してアダプターを作成する。
+    (モジュールの import 時に読み込まないことで、コールドスタートを短くする)
+    """
+    global _mangum
+    if _mangum is None:
+        from mangum import Mangum
+        _mangum = Mangum(app)
+    return _mangum(event, context)
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(app, host="0.0.0.0", port=8000)
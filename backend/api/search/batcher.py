@@ -0,0 +1,71 @@
+import asyncio
+import functools
+
+
+class QueryBatcher:
+    def __init__(self, rank_batch, max_batch_size=32, max_wait_ms=5.0):
+        """
+        短い時間窓の間に届いたクエリをまとめ、検索エンジンの rank_batch を 1 回だけ呼び出すバッチャー。
+        エンコーダの forward と類似度計算がクエリ数に関わらず 1 回で済み、各呼び出し元には自分の結果だけが返ります。
+        イベントループ上でのみ使用する想定のため、ロックは使いません。
+
+        Args:
+            rank_batch (callable): (queries, top_ns, masks=...) を受け取り、クエリごとの結果のリストを返す関数
+            max_batch_size (int): 1 バッチの最大クエリ数。達した時点ですぐに実行する
+            max_wait_ms (float): 最初のクエリが届いてからバッチを実行するまでの最大待ち時間 (ミリ秒)
+        """
+        self.rank_batch = rank_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._pending = []
+        self._timer = None
+        self.batches = 0
+        self.queries = 0
+
+    async def submit(self, query, top_n, mask=None):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((query, top_n, mask, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        self.batches += 1
+        self.queries += len(batch)
+        queries = [query for query, _, _, _ in batch]
+        top_ns = [top_n for _, top_n, _, _ in batch]
+        masks = [mask for _, _, mask, _ in batch]
+        loop = asyncio.get_running_loop()
+        try:
+            # 重い計算はスレッドプールで実行し、イベントループを塞がない
+            results = await loop.run_in_executor(
+                None, functools.partial(self.rank_batch, queries, top_ns, masks=masks)
+            )
+        except Exception as e:
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "mean_batch_size": self.queries / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+        }
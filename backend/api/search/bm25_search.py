@@ -0,0 +1,119 @@
+import re
+import unicodedata
+from collections import Counter
+
+import numpy as np
+
+from backend.api.search.results import paper_ids, to_result
+from backend.api.search.topk import select_top_k
+
+# アクセント付き・CJK の著者名も 1 語として扱えるよう Unicode の単語文字で区切る
+TOKEN_PATTERN = re.compile(r"\w+")
+# 分かち書きの規則を変えた場合に上げる (古いスナップショットの語彙を使わないため)
+TOKENIZER_VERSION = 2
+# ポスティングが長く検索の役に立たない語 (TfidfVectorizer の stop_words="english" の代わり)
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for from has have in into is it its of on or our such that the their "
+    "these this to was we were which while with".split()
+)
+
+
+def words(text):
+    """NFKC 正規化と casefold を行ってから単語に分ける (例: "Müller" -> ["müller"])"""
+    return TOKEN_PATTERN.findall(unicodedata.normalize("NFKC", text).casefold())
+
+
+def tokenize(text):
+    return [t for t in words(text) if t not in STOP_WORDS]
+
+
+def document_text(paper):
+    """検索対象のテキスト。著者名での検索に対応するため、タイトル・アブストラクトに著者名を加える"""
+    authors = " ".join(a.get("name") or "" for a in paper.get("authors") or [])
+    return f"{paper.get('title') or ''} {paper.get('abstract') or ''} {authors}"
+
+
+class BM25Search:
+    def __init__(self, papers, k1=1.5, b=0.75):
+        """
+        転置インデックスによる BM25 検索。
+        各ポスティングには BM25 の重み (idf と文書長正規化を含む) をあらかじめ計算して保持するため、
+        検索時はクエリ語のポスティングを足し合わせるだけで、コーパス全体を走査しません。
+
+        Args:
+            papers (Sequence): 論文データのシーケンス (list または PaperStore)
+            k1 (float): 語頻度の飽和パラメータ
+            b (float): 文書長による正規化の強さ
+        """
+        self.papers = papers
+        self.ids = paper_ids(papers)
+        self.k1 = k1
+        self.b = b
+        self.vocabulary = {}
+        postings = []
+        doc_lengths = np.zeros(len(papers), dtype=np.float32)
+        for doc, paper in enumerate(papers):
+            counts = Counter(tokenize(document_text(paper)))
+            doc_lengths[doc] = sum(counts.values())
+            for term, tf in counts.items():
+                term_id = self.vocabulary.setdefault(term, len(self.vocabulary))
+                postings.append((term_id, doc, tf))
+
+        # 語 ID 順に並べ替えて CSR 形式 (offsets, docs, weights) にする
+        postings = np.array(postings, dtype=np.int64).reshape(-1, 3)
+        postings = postings[np.lexsort((postings[:, 1], postings[:, 0]))]
+        term_ids, docs, tfs = postings[:, 0], postings[:, 1], postings[:, 2].astype(np.float32)
+        df = np.bincount(term_ids, minlength=len(self.vocabulary))
+        self.offsets = np.concatenate([[0], np.cumsum(df)]).astype(np.int64)
+        self.docs = docs.astype(np.int32)
+
+        n = max(len(papers), 1)
+        idf = np.log(1 + (n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avgdl = doc_lengths.mean() if len(papers) else 1.0
+        norm = k1 * (1 - b + b * doc_lengths[docs] / max(avgdl, 1e-9))
+        self.weights = (idf[term_ids] * tfs * (k1 + 1) / (tfs + norm)).astype(np.float32)
+
+    @classmethod
+    def from_arrays(cls, papers, vocabulary, offsets, docs, weights, k1=1.5, b=0.75):
+        """構築済みの転置インデックス (エンジンのスナップショットなど) から作成する"""
+        engine = cls.__new__(cls)
+        engine.papers = papers
+        engine.ids = paper_ids(papers)
+        engine.k1 = k1
+        engine.b = b
+        engine.vocabulary = vocabulary
+        engine.offsets = offsets
+        engine.docs = docs
+        engine.weights = weights
+        return engine
+
+    def rank(self, query, top_n=10, min_score=None, mask=None):
+        """上位の論文の papers 内インデックスとスコアを返す (mask が False の論文は除く)"""
+        term_ids = [self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary]
+        if not term_ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        # クエリ語のポスティングだけを集めて文書ごとに重みを合計する
+        slices = [slice(self.offsets[t], self.offsets[t + 1]) for t in term_ids]
+        docs = np.concatenate([self.docs[s] for s in slices])
+        weights = np.concatenate([self.weights[s] for s in slices])
+        candidates, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights).astype(np.float32)
+        selected = select_top_k(
+            scores,
+            top_n,
+            ids=self.ids[candidates],
+            min_score=min_score,
+            mask=mask[candidates] if mask is not None else None,
+        )
+        return candidates[selected].astype(np.int64), scores[selected]
+
+    def rank_batch(self, queries, top_ns, min_score=None, masks=None):
+        masks = masks if masks is not None else [None] * len(top_ns)
+        return [
+            self.rank(query, top_n, min_score=min_score, mask=mask)
+            for query, top_n, mask in zip(queries, top_ns, masks)
+        ]
+
+    def search(self, query, top_n=10, min_score=None, mask=None):
+        indices, scores = self.rank(query, top_n=top_n, min_score=min_score, mask=mask)
+        return [to_result(self.papers[idx], score) for idx, score in zip(indices, scores)]
@@ -0,0 +1,68 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_query(query: str) -> str:
+    """キャッシュのキーとして使うため、クエリの大文字小文字と空白の揺れを正規化する"""
+    return " ".join(query.lower().split())
+
+
+class LRUCache:
+    def __init__(self, maxsize=1024, ttl=None):
+        """
+        件数 (maxsize) と有効期限 (ttl 秒) で上限を設けたスレッドセーフな LRU キャッシュ。
+        ヒット・ミスの回数を記録し、stats() で参照できます。
+
+        Args:
+            maxsize (int): 保持する最大件数
+            ttl (float, optional): エントリの有効期限 (秒)。None の場合は期限なし
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """キーに対応する値を返す。存在しないか期限切れの場合は None を返す"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
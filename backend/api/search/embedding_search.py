@@ -1,52 +1,186 @@
+import threading
+from pathlib import Path
+
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+
+from backend.api.search.cache import normalize_query
+from backend.api.search.results import paper_ids, to_result
+from backend.api.search.vector_index import ExactIndex
+from backend.api.search.ivf_index import IVFIndex
+from backend.core.corpus_store import EMBEDDING_FILES, content_fingerprint
+
+# モデル名 -> 読み込み済みの SentenceTransformer (コーパスの再読み込みで作り直したエンジンとも共有する)
+_models = {}
+_models_lock = threading.Lock()
 
 
+def load_model(model_name):
+    """
+    SentenceTransformer は最初にクエリをエンコードする時点で import・読み込みする。
+    (torch を含めて数秒かかるため、起動時や埋め込みを使わないリクエストでは読み込まない)
+    """
+    model = _models.get(model_name)
+    if model is None:
+        with _models_lock:
+            model = _models.get(model_name)
+            if model is None:
+                from sentence_transformers import SentenceTransformer
+                model = _models[model_name] = SentenceTransformer(model_name)
+    return model
+
 class EmbeddingSearch:
-    def __init__(self, papers, embedding_key="embedding", model_name="all-MiniLM-L6-v2"):
+    def __init__(self, papers, embedding_key="embedding", model_name="all-MiniLM-L6-v2",
+                 embeddings=None, has_embedding=None, dtype="float32", ann_index_path=None, nprobe=8,
+                 query_cache=None):
         """
         論文データのリストを受け取り、各エントリに対して embedding キーがあるもののみを利用します。
         embedding キーがあるものを抽出して、NumPy 配列に変換します。
+        コーパスストアから読み込んだ埋め込み行列 (embeddings) が渡された場合は、それをそのまま利用します。
+        論文の dict は保持せず、papers 内の行番号 (rows) だけを保持します。
+        埋め込み行列は読み込み時に一度だけ L2 正規化され、検索は 1 回の行列ベクトル積で行われます。
 
         Args:
-            papers (list): 論文データのリスト。各エントリは "embedding" キーを持っていることが期待される。
+            papers (Sequence): 論文データのシーケンス (list または PaperStore)。
+                各エントリは "embedding" キーを持っていることが期待される。
             embedding_key (str): 埋め込みが保存されているキー
             model_name (str): クエリを埋め込みに変換するために使用する SentenceTransformer モデル名
+            embeddings (np.ndarray, optional): papers と行が対応する埋め込み行列
+            has_embedding (np.ndarray, optional): 各行に埋め込みが存在するかどうかのマスク
+            dtype (str): 埋め込み行列を保持する精度 ("float32", "float16", "int8")
+            ann_index_path (Path, optional): 事前に構築した IVF インデックスのパス。
+                指定された場合は総当たりの代わりに近似最近傍検索を行う。
+            nprobe (int): IVF インデックスで検索時に走査するリスト数
+            query_cache (LRUCache, optional): クエリ埋め込みのキャッシュ
         """
-        self.all_papers = papers
-        # "embedding" が有効なエントリのみをフィルタリング
-        self.valid_papers = [paper for paper in papers if paper.get(embedding_key) is not None]
-        if not self.valid_papers:
-            raise ValueError("No valid embeddings found in papers.")
-        # 各エントリの埋め込みを NumPy 配列に変換
-        self.embeddings = np.array([paper.get(embedding_key) for paper in self.valid_papers])
-        # もし 1D になってしまっている場合は、2D に reshape する
-        if self.embeddings.ndim == 1:
-            self.embeddings = self.embeddings.reshape(1, -1)
-        self.model = SentenceTransformer(model_name)
-
-    def search(self, query, top_n=10):
-        # クエリの埋め込みを計算
-        query_embedding = self.model.encode(query)
-        if query_embedding.ndim == 1:
-            query_embedding = query_embedding.reshape(1, -1)
-        # コサイン類似度を計算
-        similarities = cosine_similarity(query_embedding, self.embeddings).flatten()
-        top_indices = np.argsort(similarities)[::-1][:top_n]
-        results = []
-        for idx in top_indices:
-            paper = self.valid_papers[idx]
-            results.append(
-                {
-                    "id": paper["id"],
-                    "url": paper["url"],
-                    "title": paper["title"],
-                    "abstract": paper.get("abstract",''),
-                    "score": float(similarities[idx]) or 0.0 ,
-                    "authors": paper.get("authors", []),
-                    "details": paper.get("details", {}),
-                    "sessions": paper.get("sessions", []),
-                }
+        self.papers = papers
+        if embeddings is not None:
+            if has_embedding is None:
+                has_embedding = np.ones(len(papers), dtype=bool)
+            self.rows = np.flatnonzero(has_embedding)
+            if len(self.rows) == 0:
+                raise ValueError("No valid embeddings found in papers.")
+            embeddings = embeddings if has_embedding.all() else embeddings[has_embedding]
+        else:
+            # "embedding" が有効なエントリのみを対象にする
+            self.rows = np.array(
+                [i for i, paper in enumerate(papers) if paper.get(embedding_key) is not None], dtype=np.int64
             )
-        return results
+            if len(self.rows) == 0:
+                raise ValueError("No valid embeddings found in papers.")
+            # 各エントリの埋め込みを NumPy 配列に変換
+            embeddings = np.array([papers[i].get(embedding_key) for i in self.rows], dtype=np.float32)
+        # 同点時の並び順に使う論文 ID
+        self.ids = paper_ids(papers)[self.rows]
+        # もし 1D になってしまっている場合は、2D に reshape する
+        if embeddings.ndim == 1:
+            embeddings = embeddings.reshape(1, -1)
+        self._init_index(ExactIndex(embeddings, dtype=dtype), model_name, ann_index_path, nprobe, query_cache)
+
+    @classmethod
+    def from_index(cls, papers, exact_index, rows, model_name="all-MiniLM-L6-v2", ann_index_path=None,
+                   nprobe=8, query_cache=None):
+        """正規化済みの ExactIndex と行番号 (エンジンのスナップショットなど) から作成する"""
+        engine = cls.__new__(cls)
+        engine.papers = papers
+        engine.rows = np.asarray(rows)
+        engine.ids = paper_ids(papers)[engine.rows]
+        engine._init_index(exact_index, model_name, ann_index_path, nprobe, query_cache)
+        return engine
+
+    def _init_index(self, exact_index, model_name, ann_index_path, nprobe, query_cache):
+        self.exact_index = exact_index
+        self.index = self.exact_index
+        if ann_index_path is not None:
+            try:
+                # 埋め込みが変わった後の古いインデックスは使わず、総当たりにフォールバックする
+                fingerprint = content_fingerprint(Path(ann_index_path).parent, EMBEDDING_FILES)
+                self.index = IVFIndex.load(
+                    ann_index_path, self.exact_index, nprobe=nprobe, ids=self.ids, fingerprint=fingerprint
+                )
+                print(f"Loaded IVF index with {self.index.nlist} lists from {ann_index_path}.")
+            except (OSError, ValueError) as e:
+                print(f"Could not load ANN index ({e}); falling back to exact search.")
+        self.query_cache = query_cache
+        self.model_name = model_name
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = load_model(self.model_name)
+        return self._model
+
+    def encode_query(self, query):
+        """
+        クエリの埋め込みを計算する (キャッシュがあれば再利用する)。
+        all-MiniLM-L6-v2 は大文字小文字を区別しないため、正規化したクエリで埋め込んでも結果は変わらない。
+        """
+        if self.query_cache is None:
+            return self.model.encode(query)
+        key = normalize_query(query)
+        embedding = self.query_cache.get(key)
+        if embedding is None:
+            embedding = self.model.encode(key)
+            self.query_cache.put(key, embedding)
+        return embedding
+
+    def encode_queries(self, queries):
+        """複数のクエリの埋め込みを、キャッシュに無いものだけ 1 回の encode 呼び出しで計算する"""
+        if self.query_cache is None:
+            return np.atleast_2d(self.model.encode(list(queries)))
+        keys = [normalize_query(q) for q in queries]
+        cached = [self.query_cache.get(key) for key in keys]
+        missing = sorted({key for key, emb in zip(keys, cached) if emb is None})
+        if missing:
+            encoded = dict(zip(missing, np.atleast_2d(self.model.encode(missing))))
+            for key, emb in encoded.items():
+                self.query_cache.put(key, emb)
+            cached = [emb if emb is not None else encoded[key] for key, emb in zip(keys, cached)]
+        return np.stack(cached)
+
+    def rank(self, query, top_n=10, min_score=None, mask=None):
+        """
+        上位の論文の papers 内インデックスとスコアを返す。
+        mask (papers と同じ長さの真偽値配列) が指定された場合は、True の論文だけを対象にする。
+        """
+        query_embedding = self.encode_query(query)
+        # 正規化済み行列との内積でコサイン類似度を計算し、上位を選択
+        top_indices, scores = self.index.search(
+            query_embedding, top_n, ids=self.ids, min_score=min_score, mask=self._row_mask(mask)
+        )
+        return self.rows[top_indices], scores
+
+    def rank_batch(self, queries, top_ns, min_score=None, masks=None):
+        """複数のクエリをまとめて埋め込み・採点し、クエリごとの (インデックス, スコア) を返す"""
+        query_embeddings = self.encode_queries(queries)
+        row_masks = [self._row_mask(mask) for mask in masks] if masks is not None else None
+        results = self.index.search_batch(
+            query_embeddings, top_ns, ids=self.ids, min_score=min_score, masks=row_masks
+        )
+        return [(self.rows[top_indices], scores) for top_indices, scores in results]
+
+    def rank_similar(self, row, top_n=10, min_score=None, mask=None):
+        """
+        papers の row 番目の論文に類似した論文を、保存済みの埋め込みをクエリとして検索する (モデルは使わない)。
+        row 自身は結果に含めない。埋め込みを持たない論文の場合は空の結果を返す。
+        """
+        local = int(np.searchsorted(self.rows, row))
+        if local >= len(self.rows) or self.rows[local] != row:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        query_embedding = self.exact_index.matrix[local].astype(np.float32)
+        row_mask = self._row_mask(mask)
+        row_mask = np.ones(len(self.rows), dtype=bool) if row_mask is None else row_mask.copy()
+        row_mask[local] = False
+        top_indices, scores = self.index.search(
+            query_embedding, top_n, ids=self.ids, min_score=min_score, mask=row_mask
+        )
+        return self.rows[top_indices], scores
+
+    def _row_mask(self, mask):
+        """papers 全体に対するマスクを、埋め込みを持つ行 (rows) に対するマスクに変換する"""
+        return mask[self.rows] if mask is not None else None
+
+    def search(self, query, top_n=10, min_score=None, mask=None):
+        indices, scores = self.rank(query, top_n=top_n, min_score=min_score, mask=mask)
+        # 上位に入った論文についてのみ dict を作成する
+        return [to_result(self.papers[idx], score) for idx, score in zip(indices, scores)]
@@ -0,0 +1,138 @@
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import List, Optional
+
+import numpy as np
+
+from backend.api.search.bm25_search import words
+from backend.api.search.search_config import SESSION_YEAR
+
+# 論文の URL に含まれる開催年 (例: https://programs.sigchi.org/chi/2025/program/content/188211)
+URL_YEAR_PATTERN = re.compile(r"/((?:19|20)\d{2})/")
+# 絞り込み列の作り方を変えた場合に上げる (古いスナップショットを使わないため)
+FILTER_COLUMNS_VERSION = 3
+
+
+def paper_year(paper, default=SESSION_YEAR) -> int:
+    """セッション日付に補完する年。論文の URL に年が含まれればそれを、無ければ default を使う"""
+    match = URL_YEAR_PATTERN.search(paper.get("url") or "")
+    return int(match.group(1)) if match else default
+
+
+def parse_session_date(session_date, year=SESSION_YEAR) -> Optional[date]:
+    """セッションの日付文字列から日付部分を取り出して date に変換する。失敗した場合は None"""
+    if not session_date:
+        return None
+    date_part = session_date.split("|")[0].strip()
+    try:
+        return datetime.strptime(f"{date_part} {year}", "%a, %d %b %Y").date()
+    except ValueError:
+        return None
+
+
+@dataclass(frozen=True)
+class SearchFilters:
+    """/search で指定できる絞り込み条件。空のフィールドは条件なしを意味する"""
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    content_types: List[str] = field(default_factory=list)
+    venues: List[str] = field(default_factory=list)
+    author: Optional[str] = None
+
+    def is_empty(self) -> bool:
+        return not (self.date_from or self.date_to or self.content_types or self.venues or self.author)
+
+    def cache_key(self):
+        return (
+            self.date_from,
+            self.date_to,
+            tuple(sorted(self.content_types)),
+            tuple(sorted(self.venues)),
+            tuple(words(self.author or "")),
+        )
+
+
+class FilterColumns:
+    def __init__(self, papers, year=SESSION_YEAR):
+        """
+        絞り込みに使う列を論文の読み込み時に一度だけ作成する。
+        検索時は SearchFilters から真偽値のマスクを作り、上位 k 件の選択前にエンジンへ渡します。
+
+        - session_day: 最初のセッションの日付 (date.toordinal、不明は -1)。
+          年は論文の URL から取り、取れない場合は year を使う
+        - content_type: details.content_type のカテゴリコード
+        - venue_rows: 会場ごとの論文インデックス (複数セッションのいずれか)
+        - person_rows: 著者名・所属のトークンごとの論文インデックス
+        """
+        n = len(papers)
+        self.size = n
+        self.year = year
+        self.session_day = np.full(n, -1, dtype=np.int32)
+        self.content_type = np.full(n, -1, dtype=np.int16)
+        self.content_type_codes = {}
+        venue_rows = {}
+        person_rows = {}
+        for i, paper in enumerate(papers):
+            sessions = paper.get("sessions") or []
+            if sessions:
+                day = parse_session_date(sessions[0].get("session_date"), year=paper_year(paper, year))
+                if day is not None:
+                    self.session_day[i] = day.toordinal()
+            content_type = (paper.get("details") or {}).get("content_type")
+            if content_type:
+                code = self.content_type_codes.setdefault(content_type, len(self.content_type_codes))
+                self.content_type[i] = code
+            for venue in {s.get("session_venue") for s in sessions if s.get("session_venue")}:
+                venue_rows.setdefault(venue, []).append(i)
+            tokens = set()
+            for author in paper.get("authors") or []:
+                tokens.update(words(f"{author.get('name') or ''} {author.get('affiliation') or ''}"))
+            for token in tokens:
+                person_rows.setdefault(token, []).append(i)
+        self.venue_rows = {k: np.array(v, dtype=np.int32) for k, v in venue_rows.items()}
+        self.person_rows = {k: np.array(v, dtype=np.int32) for k, v in person_rows.items()}
+
+    @classmethod
+    def from_arrays(cls, session_day, content_type, content_type_codes, venue_rows, person_rows, year=SESSION_YEAR):
+        """構築済みの列 (エンジンのスナップショットなど) から作成する"""
+        columns = cls.__new__(cls)
+        columns.size = len(session_day)
+        columns.year = year
+        columns.session_day = session_day
+        columns.content_type = content_type
+        columns.content_type_codes = content_type_codes
+        columns.venue_rows = venue_rows
+        columns.person_rows = person_rows
+        return columns
+
+    def _rows_mask(self, rows) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        mask[rows] = True
+        return mask
+
+    def mask(self, filters: Optional[SearchFilters]) -> Optional[np.ndarray]:
+        """条件に合う論文を True とするマスクを返す。条件が無い場合は None"""
+        if filters is None or filters.is_empty():
+            return None
+        mask = np.ones(self.size, dtype=bool)
+        if filters.date_from or filters.date_to:
+            mask &= self.session_day >= 0
+            if filters.date_from:
+                mask &= self.session_day >= filters.date_from.toordinal()
+            if filters.date_to:
+                mask &= self.session_day <= filters.date_to.toordinal()
+        if filters.content_types:
+            codes = [self.content_type_codes[c] for c in filters.content_types if c in self.content_type_codes]
+            mask &= np.isin(self.content_type, codes)
+        if filters.venues:
+            rows = [self.venue_rows[v] for v in filters.venues if v in self.venue_rows]
+            mask &= self._rows_mask(np.concatenate(rows)) if rows else False
+        if filters.author:
+            # 全てのトークンが著者名または所属のいずれかに含まれる論文
+            for token in words(filters.author):
+                rows = self.person_rows.get(token)
+                if rows is None:
+                    return np.zeros(self.size, dtype=bool)
+                mask &= self._rows_mask(rows)
+        return mask
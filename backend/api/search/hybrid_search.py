@@ -0,0 +1,71 @@
+import numpy as np
+
+from backend.api.search.results import to_result
+from backend.api.search.topk import select_top_k
+
+
+def reciprocal_rank_fusion(rankings, top_n, ids, k=60):
+    """
+    複数の検索結果の順位を Reciprocal Rank Fusion (sum 1 / (k + rank)) で統合する。
+
+    Args:
+        rankings (list): 各エンジンの (インデックス, スコア) のリスト
+        top_n (int): 取得する件数
+        ids (np.ndarray): papers 全体の論文 ID (同点時の並び順に使用)
+        k (int): RRF の定数
+
+    Returns:
+        (インデックス, 統合スコア)
+    """
+    fused = {}
+    for indices, _ in rankings:
+        for rank, idx in enumerate(indices):
+            fused[int(idx)] = fused.get(int(idx), 0.0) + 1.0 / (k + rank + 1)
+    if not fused:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    candidates = np.fromiter(fused.keys(), dtype=np.int64, count=len(fused))
+    scores = np.fromiter(fused.values(), dtype=np.float32, count=len(fused))
+    selected = select_top_k(scores, top_n, ids=ids[candidates])
+    return candidates[selected], scores[selected]
+
+
+class HybridSearch:
+    def __init__(self, bm25, embedding, rrf_k=60, depth=100):
+        """
+        BM25 (キーワード) と埋め込み (意味) の検索結果を RRF で統合するハイブリッド検索。
+        両エンジンは同じ papers を共有している必要があります。
+
+        Args:
+            bm25 (BM25Search): キーワード検索エンジン
+            embedding (EmbeddingSearch): 埋め込み検索エンジン
+            rrf_k (int): RRF の定数
+            depth (int): 各エンジンから取得する候補数 (top_n の方が大きい場合は top_n)
+        """
+        self.bm25 = bm25
+        self.embedding = embedding
+        self.papers = bm25.papers
+        self.ids = bm25.ids
+        self.rrf_k = rrf_k
+        self.depth = depth
+
+    def rank(self, query, top_n=10, min_score=None, mask=None):
+        return self.rank_batch([query], [top_n], min_score=min_score, masks=[mask])[0]
+
+    def rank_batch(self, queries, top_ns, min_score=None, masks=None):
+        depths = [max(top_n, self.depth) for top_n in top_ns]
+        masks = masks if masks is not None else [None] * len(top_ns)
+        # 埋め込み側はまとめて encode と行列積を行う (絞り込みは両エンジンの候補選択前に適用する)
+        dense = self.embedding.rank_batch(queries, depths, masks=masks)
+        results = []
+        for query, top_n, depth, mask, dense_ranking in zip(queries, top_ns, depths, masks, dense):
+            sparse_ranking = self.bm25.rank(query, depth, mask=mask)
+            indices, scores = reciprocal_rank_fusion([sparse_ranking, dense_ranking], top_n, self.ids, k=self.rrf_k)
+            if min_score is not None:
+                keep = scores >= min_score
+                indices, scores = indices[keep], scores[keep]
+            results.append((indices, scores))
+        return results
+
+    def search(self, query, top_n=10, min_score=None, mask=None):
+        indices, scores = self.rank(query, top_n=top_n, min_score=min_score, mask=mask)
+        return [to_result(self.papers[idx], score) for idx, score in zip(indices, scores)]
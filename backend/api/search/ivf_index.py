@@ -0,0 +1,124 @@
+import numpy as np
+from pathlib import Path
+
+from backend.api.search.topk import select_top_k
+from backend.api.search.vector_index import BLOCK_ROWS, ExactIndex, VectorIndex, normalize_rows
+
+# コーパスディレクトリ内の IVF インデックスのファイル名
+IVF_INDEX_FILE = "ivf_index.npz"
+
+
+def spherical_kmeans(vectors, n_clusters, n_iter=20, seed=0):
+    """
+    正規化済みベクトルに対する球面 k-means (内積で割り当て、重心を再正規化)。
+
+    Returns:
+        (centroids, assignments)
+    """
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    n_clusters = max(1, min(n_clusters, n))
+    centroids = vectors[rng.choice(n, n_clusters, replace=False)]
+    assignments = np.zeros(n, dtype=np.int64)
+    for _ in range(n_iter):
+        for start in range(0, n, BLOCK_ROWS):
+            block = vectors[start:start + BLOCK_ROWS]
+            assignments[start:start + BLOCK_ROWS] = np.argmax(block @ centroids.T, axis=1)
+        # クラスタ順に並べ替えて reduceat で各クラスタの和を求める
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=n_clusters)
+        nonempty = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[nonempty]
+        sums = np.zeros_like(centroids)
+        sums[nonempty] = np.add.reduceat(vectors[order], starts, axis=0)
+        # 空になったクラスタはランダムな点で初期化し直す
+        empty = np.flatnonzero(counts == 0)
+        sums[empty] = vectors[rng.choice(n, len(empty), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids, assignments
+
+
+class IVFIndex(VectorIndex):
+    def __init__(self, exact: ExactIndex, centroids, list_offsets, list_rows, nprobe=8):
+        """
+        転置ファイル (IVF) 方式の近似最近傍インデックス。
+        行をクラスタ (リスト) に分けておき、クエリに近い nprobe 個のリストに属する行だけを
+        ExactIndex の正規化済み行列で採点します。
+
+        Args:
+            exact (ExactIndex): 採点に使う正規化済みの行列
+            centroids (np.ndarray): 各リストの重心 (nlist, D)
+            list_offsets (np.ndarray): list_rows 内での各リストの開始位置 (nlist + 1)
+            list_rows (np.ndarray): リスト順に並べた行番号 (N)
+            nprobe (int): 検索時に走査するリスト数
+        """
+        if len(list_rows) != len(exact):
+            raise ValueError(f"IVF index covers {len(list_rows)} rows but the corpus has {len(exact)}.")
+        self.exact = exact
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_rows = list_rows
+        self.nprobe = nprobe
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, exact: ExactIndex, nlist=None, n_iter=20, seed=0, nprobe=8):
+        """ExactIndex の行列から k-means でリストを作成する (オフラインでの構築用)"""
+        n = len(exact)
+        if nlist is None:
+            nlist = int(4 * np.sqrt(n))
+        centroids, assignments = spherical_kmeans(exact.dense(), nlist, n_iter=n_iter, seed=seed)
+        list_rows = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=len(centroids))
+        list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(exact, centroids, list_offsets, list_rows, nprobe=nprobe)
+
+    def save(self, path: Path, ids=None, fingerprint=None):
+        """
+        Args:
+            ids (np.ndarray, optional): 各行の論文 ID。読み込み時の整合性確認に使う
+            fingerprint (str, optional): 構築元の埋め込みのフィンガープリント (corpus_store.content_fingerprint)
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        extra = {}
+        if ids is not None:
+            extra["ids"] = np.asarray(ids)
+        if fingerprint is not None:
+            extra["fingerprint"] = np.array(fingerprint)
+        np.savez(path, centroids=self.centroids, list_offsets=self.list_offsets, list_rows=self.list_rows, **extra)
+        print(f"IVF index with {self.nlist} lists saved to {path}")
+
+    @classmethod
+    def load(cls, path: Path, exact: ExactIndex, nprobe=8, ids=None, fingerprint=None):
+        """
+        保存したインデックスを読み込む。ids・fingerprint を指定した場合、構築時の値と異なれば
+        (行数が同じでも埋め込みが変わっていれば) ValueError を送出する
+        """
+        with np.load(path) as data:
+            if ids is not None and ("ids" not in data or not np.array_equal(data["ids"], ids)):
+                raise ValueError("IVF index was built for a different corpus; rebuild it.")
+            if fingerprint is not None and ("fingerprint" not in data or str(data["fingerprint"]) != fingerprint):
+                raise ValueError("IVF index was built from different embeddings; rebuild it.")
+            return cls(exact, data["centroids"], data["list_offsets"], data["list_rows"], nprobe=nprobe)
+
+    def search(self, query_embedding, top_n, ids=None, min_score=None, mask=None):
+        query = normalize_rows(query_embedding)
+        # クエリに近いリストを nprobe 個選び、その行だけを採点する
+        probe = select_top_k(self.centroids @ query, self.nprobe)
+        rows = np.concatenate(
+            [self.list_rows[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probe]
+        )
+        # 絞り込み条件は走査したリスト内の行にだけ適用される (条件が厳しいと件数が不足し得る)
+        scores = self.exact.subset_scores(query, rows)
+        selected = select_top_k(
+            scores,
+            top_n,
+            ids=ids[rows] if ids is not None else None,
+            min_score=min_score,
+            mask=mask[rows] if mask is not None else None,
+        )
+        return rows[selected], scores[selected]
@@ -0,0 +1,116 @@
+import numpy as np
+from pathlib import Path
+
+from backend.api.search.vector_index import ExactIndex
+
+# コーパスディレクトリ内の kNN グラフのファイル名
+KNN_GRAPH_FILE = "knn_graph.npz"
+# グラフ構築時に一度に採点するクエリ行数 (一時メモリは GRAPH_BLOCK_ROWS x N の float32)
+GRAPH_BLOCK_ROWS = 1024
+
+
+class KNNGraph:
+    def __init__(self, indptr, neighbors, scores, ids, fingerprint=None):
+        """
+        各論文の類似論文上位 k 件を CSR 形式で保持する近傍グラフ。
+        行 i の近傍は neighbors[indptr[i]:indptr[i + 1]] で、類似度の降順に並んでいます。
+        埋め込みを持たない論文の行は空です。
+
+        Args:
+            indptr (np.ndarray): 各行の開始位置 (N + 1, int64)
+            neighbors (np.ndarray): 近傍論文の papers 内インデックス (int32)
+            scores (np.ndarray): 近傍とのコサイン類似度 (float16)
+            ids (np.ndarray): 構築時のコーパスの論文 ID (N,)。読み込み時の整合性確認に使う
+            fingerprint (str, optional): 構築元の埋め込みのフィンガープリント (corpus_store.content_fingerprint)
+        """
+        self.indptr = indptr
+        self.neighbors = neighbors
+        self.scores = scores
+        self.ids = ids
+        self.fingerprint = fingerprint
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def k(self) -> int:
+        return int(np.diff(self.indptr).max(initial=0))
+
+    @classmethod
+    def build(cls, exact: ExactIndex, rows, ids, n_papers, k=50, block_rows=GRAPH_BLOCK_ROWS, fingerprint=None):
+        """
+        ExactIndex の全行について上位 k 件の近傍を求める (オフラインでの構築用)。
+        block_rows 行ずつ行列積を取るため、N x N の類似度行列は作らない。
+
+        Args:
+            exact (ExactIndex): 埋め込みを持つ論文の正規化済み行列
+            rows (np.ndarray): exact の各行に対応する papers 内インデックス
+            ids (np.ndarray): papers 全体の論文 ID (N,)。同点時の並び順に使う
+            n_papers (int): papers の件数
+            k (int): 1 論文あたりの近傍数
+        """
+        n = len(exact)
+        k = max(0, min(k, n - 1))
+        matrix = exact.dense()
+        row_ids = ids[rows]
+        neighbors = np.empty((n, k), dtype=np.int32)
+        scores = np.empty((n, k), dtype=np.float32)
+        for start in range(0, n, block_rows):
+            stop = min(start + block_rows, n)
+            block = exact.scores(matrix[start:stop])
+            # 自分自身は近傍に含めない
+            block[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+            part = np.argpartition(-block, k - 1, axis=1)[:, :k] if 0 < k < n else np.argsort(-block, axis=1)[:, :k]
+            part_scores = np.take_along_axis(block, part, axis=1)
+            # 類似度の降順、同点は論文 ID の昇順
+            order = np.lexsort((row_ids[part], -part_scores), axis=1)
+            neighbors[start:stop] = rows[np.take_along_axis(part, order, axis=1)]
+            scores[start:stop] = np.take_along_axis(part_scores, order, axis=1)
+
+        counts = np.zeros(n_papers, dtype=np.int64)
+        counts[rows] = k
+        indptr = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        # rows は昇順なので、行列の行順に並べればそのまま CSR の順になる
+        return cls(indptr, neighbors.ravel(), scores.ravel().astype(np.float16), np.asarray(ids), fingerprint)
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        extra = {"fingerprint": np.array(self.fingerprint)} if self.fingerprint is not None else {}
+        np.savez(path, indptr=self.indptr, neighbors=self.neighbors, scores=self.scores, ids=self.ids, **extra)
+        print(f"kNN graph (k={self.k}) for {len(self)} papers saved to {path}")
+
+    @classmethod
+    def load(cls, path: Path, ids=None, fingerprint=None):
+        """
+        保存したグラフを読み込む。ids が構築時のコーパスと異なる場合や、
+        fingerprint が構築時の埋め込みと異なる (ID が同じでも埋め込みが変わった) 場合は ValueError
+        """
+        with np.load(path) as data:
+            stored = str(data["fingerprint"]) if "fingerprint" in data else None
+            graph = cls(data["indptr"], data["neighbors"], data["scores"], data["ids"], stored)
+        if ids is not None and not np.array_equal(graph.ids, ids):
+            raise ValueError("kNN graph was built for a different corpus; rebuild it.")
+        if fingerprint is not None and graph.fingerprint != fingerprint:
+            raise ValueError("kNN graph was built from different embeddings; rebuild it.")
+        return graph
+
+    def truncated(self, row) -> bool:
+        """row の近傍リストが k 件で打ち切られている (保存されていない近傍がある) か"""
+        return self.indptr[row + 1] - self.indptr[row] >= self.k
+
+    def similar(self, row, top_n=10, min_score=None, mask=None):
+        """
+        row の論文に類似した論文の (papers 内インデックス, スコア) を返す。
+        保存済みの近傍 (k 件) だけを見るため、top_n が k より大きい場合や絞り込み条件が厳しい場合は
+        top_n 件に満たないことがある (truncated(row) が True なら、埋め込みで検索すればさらに見つかる)。
+        """
+        start, end = self.indptr[row], self.indptr[row + 1]
+        neighbors = self.neighbors[start:end]
+        scores = self.scores[start:end].astype(np.float32)
+        keep = np.ones(len(neighbors), dtype=bool)
+        if mask is not None:
+            keep &= mask[neighbors]
+        if min_score is not None:
+            keep &= scores >= min_score
+        return neighbors[keep][:top_n].astype(np.int64), scores[keep][:top_n]
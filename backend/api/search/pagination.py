@@ -0,0 +1,41 @@
+import base64
+import hashlib
+import json
+
+# ページングで 1 回にランク付けする件数の上限 (/search の top_n の上限と同じ)
+MAX_RESULTS = 2000
+
+
+def query_fingerprint(key) -> str:
+    """検索条件 (コーパスの版・クエリ・検索方法・絞り込み条件) から、カーソルの取り違えを検出するための短いハッシュを作る"""
+    return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:12]
+
+
+def encode_cursor(offset: int, key) -> str:
+    payload = json.dumps({"o": offset, "q": query_fingerprint(key)}).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, key) -> int:
+    """カーソルから次の開始位置を取り出す。不正なカーソルや別の検索条件のカーソルは ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        offset = int(payload["o"])
+        fingerprint = payload["q"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if fingerprint != query_fingerprint(key) or offset < 0:
+        raise ValueError("Cursor does not match this query")
+    return offset
+
+
+def ranking_depth(end: int) -> int:
+    """
+    ページの終端 end までを含むランキングの件数。
+    2 のべき乗に切り上げることで、連続するページが同じランキング (結果キャッシュ) を再利用できる。
+    """
+    depth = 64
+    while depth < end:
+        depth *= 2
+    return min(depth, MAX_RESULTS)
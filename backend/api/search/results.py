@@ -0,0 +1,54 @@
+import numpy as np
+
+
+def paper_ids(papers):
+    """論文シーケンスの ID 配列を返す (PaperStore は保持している ids をそのまま使う)"""
+    ids = getattr(papers, "ids", None)
+    if ids is not None:
+        return np.asarray(ids)
+    return np.array([paper["id"] for paper in papers], dtype=np.int64)
+
+
+RESULT_FIELDS = ("id", "url", "title", "abstract", "score", "authors", "details", "sessions")
+
+
+def parse_fields(fields):
+    """カンマ区切りの fields= パラメータを検証してタプルにする (id は常に含める)。未指定なら None"""
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in RESULT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {unknown}. Available: {list(RESULT_FIELDS)}")
+    return tuple(f for f in RESULT_FIELDS if f == "id" or f in requested)
+
+
+def to_result(paper, score, fields=None):
+    """
+    論文データから検索結果の dict を作成する (上位 N 件に入った論文に対してのみ呼ばれる)。
+    fields が指定された場合は、そのフィールドだけを含める。
+    """
+    if fields is not None:
+        result = {}
+        for name in fields:
+            if name == "score":
+                result[name] = float(score) or 0.0
+            elif name == "abstract":
+                result[name] = paper.get("abstract") or ""
+            elif name in ("authors", "sessions"):
+                result[name] = paper.get(name, [])
+            elif name == "details":
+                result[name] = paper.get(name, {})
+            else:
+                result[name] = paper[name]
+        return result
+    return {
+        "id": paper["id"],
+        "url": paper["url"],
+        "title": paper["title"],
+        "abstract": paper.get("abstract") or "",
+        "score": float(score) or 0.0,
+        "authors": paper.get("authors", []),
+        "details": paper.get("details", {}),
+        "sessions": paper.get("sessions", []),
+    }
@@ -1,3 +1,42 @@
-# 検索方法の設定: "tfidf" または "embedding"
+# 検索方法の設定: "tfidf"、"embedding"、"bm25" または "hybrid" (/search の method 省略時に使われる)
 SEARCH_METHOD = "embedding"  # デフォルトは embedding を使う例
 # SEARCH_METHOD = "tfidf"  # デフォルトは embedding を使う例
+
+# /search の method パラメータで選択できる検索方法 (エンジンは最初に使われた時点で構築する)
+ENABLED_METHODS = ["embedding", "bm25", "hybrid"]
+
+# ハイブリッド検索 (BM25 + 埋め込みの Reciprocal Rank Fusion) の設定
+HYBRID_RRF_K = 60
+HYBRID_DEPTH = 100  # 各エンジンから取得する候補数
+
+# セッション日付 (例: "Mon, 28 Apr | 3:22 PM") には年が含まれないため、日付での絞り込みに使う年。
+# 論文の URL に年が含まれる場合 (例: .../chi/2025/program/content/188211) はそちらを優先する
+SESSION_YEAR = 2025
+
+# 埋め込み行列を保持する精度: "float32" (既定)、省メモリ用の "float16" または "int8"
+EMBEDDING_DTYPE = "float32"
+
+# 近似最近傍インデックス: None (総当たり) または "ivf" (scripts/build_ann_index.py で事前に構築)
+ANN_INDEX = None
+# IVF インデックスで検索時に走査するリスト数 (大きいほど再現率が上がり、遅くなる)
+IVF_NPROBE = 8
+
+# クエリ埋め込みのキャッシュ (正規化したクエリ文字列 -> 埋め込み)
+QUERY_CACHE_SIZE = 1024
+QUERY_CACHE_TTL = 3600  # 秒
+# 検索結果のキャッシュ ((クエリ, top_n, 検索方法) -> 上位の論文インデックスとスコア)
+RESULT_CACHE_SIZE = 1024
+RESULT_CACHE_TTL = 600  # 秒
+
+# 同時に届いた /search クエリをまとめて 1 回の encode と行列積で処理するマイクロバッチ
+BATCH_ENABLED = True
+BATCH_MAX_SIZE = 32
+BATCH_MAX_WAIT_MS = 5
+
+# 起動時のエンジン構築とモデル読み込み: None (最初のリクエストで構築)、
+# "background" (起動後に別スレッドで構築) または "eager" (起動処理の中で構築)
+# Lambda ではリクエストの合間にスレッドが止まるため None か "eager" を使う
+STARTUP_WARMUP = "background"
+
+# data/corpora/CURRENT を確認する間隔 (秒)。指す版が変わるとバックグラウンドで読み込み直して差し替える (None で無効)
+CORPUS_WATCH_INTERVAL = 30
@@ -0,0 +1,189 @@
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from backend.api.search.bm25_search import TOKENIZER_VERSION, BM25Search
+from backend.api.search.embedding_search import EmbeddingSearch
+from backend.api.search.filters import FILTER_COLUMNS_VERSION, FilterColumns
+from backend.api.search.results import paper_ids
+from backend.api.search.search_config import SESSION_YEAR
+from backend.api.search.vector_index import ExactIndex
+from backend.core.corpus_store import content_fingerprint
+
+# コーパスディレクトリ内のエンジンのスナップショット (scripts/build_engine_snapshot.py で作成)
+# スナップショットは常に <corpus_dir>/ENGINE_SNAPSHOT_DIR に置き、親のコーパスの内容と照合する
+ENGINE_SNAPSHOT_DIR = "engine_snapshot"
+META_FILE = "meta.json"
+
+
+def _pack_rows(rows_by_key):
+    """キーごとの行番号の辞書を (キーのリスト, 開始位置, 連結した行番号) の CSR 形式にする"""
+    keys = sorted(rows_by_key)
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(rows_by_key[key]) for key in keys])
+    rows = np.concatenate([rows_by_key[key] for key in keys]) if keys else np.empty(0, dtype=np.int32)
+    return keys, offsets, rows.astype(np.int32)
+
+
+def _unpack_rows(keys, offsets, rows):
+    """_pack_rows の逆変換。各値は rows (メモリマップ) のビューなのでコピーしない"""
+    return {key: rows[offsets[i]:offsets[i + 1]] for i, key in enumerate(keys)}
+
+
+def save_engine_snapshot(snapshot_dir: Path, papers, embedding=None, bm25=None, filters=None):
+    """
+    構築済みのエンジンの配列を .npy ファイルとして保存します。
+    読み込み時は np.load のメモリマップで開くだけなので、正規化や転置インデックスの構築を省けます。
+    複数のワーカープロセスが同じファイルを開いた場合は OS のページキャッシュを共有するため、
+    ワーカー数を増やしてもこれらの配列の分のメモリは増えません。
+    一時ディレクトリに書き込んでから置き換えるため、書きかけのスナップショットが読まれることはありません。
+
+    - ids.npy: 構築時のコーパスの論文 ID (読み込み時の整合性確認用)
+    - embedding_matrix.npy / embedding_rows.npy: 正規化 (量子化) 済みの埋め込み行列と papers 内の行番号
+    - bm25_offsets.npy / bm25_docs.npy / bm25_weights.npy: BM25 の転置インデックス (CSR)
+    - filter_*.npy: 絞り込み用の列 (会場・著者トークンごとの行番号は CSR)
+    - meta.json: コーパスのフィンガープリント、埋め込み行列の精度、BM25 の語彙 (語 ID の順) とパラメータ、絞り込み列のキー
+    """
+    snapshot_dir = Path(snapshot_dir)
+    snapshot_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=snapshot_dir.parent, prefix=f".{snapshot_dir.name}."))
+    meta = {"corpus": content_fingerprint(snapshot_dir.parent)}
+    try:
+        np.save(tmp_dir / "ids.npy", paper_ids(papers))
+        if embedding is not None:
+            np.save(tmp_dir / "embedding_matrix.npy", np.asarray(embedding.exact_index.matrix))
+            np.save(tmp_dir / "embedding_rows.npy", embedding.rows)
+            meta["embedding"] = {"dtype": embedding.exact_index.dtype}
+        if bm25 is not None:
+            np.save(tmp_dir / "bm25_offsets.npy", bm25.offsets)
+            np.save(tmp_dir / "bm25_docs.npy", bm25.docs)
+            np.save(tmp_dir / "bm25_weights.npy", bm25.weights)
+            terms = sorted(bm25.vocabulary, key=bm25.vocabulary.get)
+            meta["bm25"] = {"tokenizer": TOKENIZER_VERSION, "k1": bm25.k1, "b": bm25.b, "vocabulary": terms}
+        if filters is not None:
+            np.save(tmp_dir / "filter_session_day.npy", filters.session_day)
+            np.save(tmp_dir / "filter_content_type.npy", filters.content_type)
+            venues, venue_offsets, venue_rows = _pack_rows(filters.venue_rows)
+            np.save(tmp_dir / "filter_venue_offsets.npy", venue_offsets)
+            np.save(tmp_dir / "filter_venue_rows.npy", venue_rows)
+            persons, person_offsets, person_rows = _pack_rows(filters.person_rows)
+            np.save(tmp_dir / "filter_person_offsets.npy", person_offsets)
+            np.save(tmp_dir / "filter_person_rows.npy", person_rows)
+            meta["filters"] = {
+                "version": FILTER_COLUMNS_VERSION,
+                "year": filters.year,
+                "content_type_codes": filters.content_type_codes,
+                "venues": venues,
+                "persons": persons,
+            }
+        with open(tmp_dir / META_FILE, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        if snapshot_dir.exists():
+            shutil.rmtree(snapshot_dir)
+        os.replace(tmp_dir, snapshot_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    parts = [part for part in meta if part != "corpus"]
+    print(f"Engine snapshot ({', '.join(parts) or 'ids only'}) saved to {snapshot_dir}")
+
+
+def _load_meta(snapshot_dir: Path, papers):
+    """
+    スナップショットのメタデータを読み込む。無い場合や、コーパスの論文 ID・内容と一致しない場合は None
+    (ID が同じでも、再取得などでタイトルや埋め込みが変わったコーパスには使わない)
+    """
+    snapshot_dir = Path(snapshot_dir)
+    if not (snapshot_dir / META_FILE).exists():
+        return None
+    with open(snapshot_dir / META_FILE, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("corpus") != content_fingerprint(snapshot_dir.parent):
+        print(f"Engine snapshot in {snapshot_dir} is stale; ignoring it.")
+        return None
+    if not np.array_equal(np.load(snapshot_dir / "ids.npy"), paper_ids(papers)):
+        print(f"Engine snapshot in {snapshot_dir} was built for a different corpus; ignoring it.")
+        return None
+    return meta
+
+
+def _bm25_usable(meta, k1, b):
+    bm25 = meta.get("bm25", {})
+    return (bm25.get("tokenizer"), bm25.get("k1"), bm25.get("b")) == (TOKENIZER_VERSION, k1, b)
+
+
+def _filters_usable(meta, year):
+    filters = meta.get("filters", {})
+    return filters.get("version") == FILTER_COLUMNS_VERSION and filters.get("year") == year
+
+
+def snapshot_parts(snapshot_dir: Path, papers, dtype="float32", k1=1.5, b=0.75, year=SESSION_YEAR):
+    """
+    現在のコーパス (論文 ID・内容) と設定に対して使えるスナップショットの部分 ("embedding"、"bm25"、"filters")。
+    配列は開かずにメタデータだけで判定する
+    """
+    meta = _load_meta(snapshot_dir, papers)
+    if not meta:
+        return set()
+    parts = set()
+    if meta.get("embedding", {}).get("dtype") == dtype:
+        parts.add("embedding")
+    if _bm25_usable(meta, k1, b):
+        parts.add("bm25")
+    if _filters_usable(meta, year):
+        parts.add("filters")
+    return parts
+
+
+def load_embedding_snapshot(snapshot_dir: Path, papers, dtype="float32", **kwargs):
+    """スナップショットから EmbeddingSearch を作成する。使えない場合は None (通常の構築にフォールバック)"""
+    meta = _load_meta(snapshot_dir, papers)
+    if not meta or meta.get("embedding", {}).get("dtype") != dtype:
+        return None
+    snapshot_dir = Path(snapshot_dir)
+    matrix = np.load(snapshot_dir / "embedding_matrix.npy", mmap_mode="r")
+    rows = np.load(snapshot_dir / "embedding_rows.npy")
+    return EmbeddingSearch.from_index(papers, ExactIndex.from_normalized(matrix, dtype=dtype), rows, **kwargs)
+
+
+def load_bm25_snapshot(snapshot_dir: Path, papers, k1=1.5, b=0.75):
+    """スナップショットから BM25Search を作成する。使えない場合 (パラメータが異なる場合を含む) は None"""
+    meta = _load_meta(snapshot_dir, papers)
+    if not meta or not _bm25_usable(meta, k1, b):
+        return None
+    snapshot_dir = Path(snapshot_dir)
+    vocabulary = {term: i for i, term in enumerate(meta["bm25"]["vocabulary"])}
+    return BM25Search.from_arrays(
+        papers,
+        vocabulary,
+        np.load(snapshot_dir / "bm25_offsets.npy"),
+        np.load(snapshot_dir / "bm25_docs.npy", mmap_mode="r"),
+        np.load(snapshot_dir / "bm25_weights.npy", mmap_mode="r"),
+        k1=k1,
+        b=b,
+    )
+
+
+def load_filter_snapshot(snapshot_dir: Path, papers, year=SESSION_YEAR):
+    """スナップショットから FilterColumns を作成する。使えない場合は None"""
+    meta = _load_meta(snapshot_dir, papers)
+    if not meta or not _filters_usable(meta, year):
+        return None
+    snapshot_dir = Path(snapshot_dir)
+    meta = meta["filters"]
+
+    def load(name):
+        return np.load(snapshot_dir / f"filter_{name}.npy", mmap_mode="r")
+
+    return FilterColumns.from_arrays(
+        load("session_day"),
+        load("content_type"),
+        meta["content_type_codes"],
+        _unpack_rows(meta["venues"], np.load(snapshot_dir / "filter_venue_offsets.npy"), load("venue_rows")),
+        _unpack_rows(meta["persons"], np.load(snapshot_dir / "filter_person_offsets.npy"), load("person_rows")),
+        year=year,
+    )
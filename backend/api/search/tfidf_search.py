@@ -1,35 +1,148 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+
+from backend.api.search.results import paper_ids, to_result
+from backend.api.search.topk import select_top_k
+from backend.core.corpus_store import content_fingerprint
+
+# コーパスディレクトリ内の TF-IDF の学習結果 (scripts/build_tfidf.py で作成)
+TFIDF_ARTIFACTS_DIR = "tfidf"
+TFIDF_META_FILE = "meta.json"
+# TfidfVectorizer の設定 (変えた場合はフィンガープリントも変わり、再学習される)
+VECTORIZER_PARAMS = {"stop_words": "english"}
+
+
+def documents(papers):
+    """各論文のタイトルとアブストラクトを連結した文書を返すジェネレータ"""
+    return (f"{p.get('title') or ''} {p.get('abstract') or ''}" for p in papers)
+
+
+def corpus_fingerprint(corpus_dir: Path) -> str:
+    """
+    コーパスのファイル (content_fingerprint)・ベクトライザーの設定・scikit-learn のバージョンから求めるフィンガープリント。
+    保存済みの学習結果がこのコーパスに使えるかの判定に使う。論文の内容は読まないため起動時にも軽い。
+    """
+    import sklearn
+
+    digest = hashlib.sha256()
+    digest.update(json.dumps([sklearn.__version__, VECTORIZER_PARAMS], sort_keys=True).encode("utf-8"))
+    digest.update(content_fingerprint(corpus_dir).encode("ascii"))
+    return digest.hexdigest()
+
+
+def load_artifacts_meta(artifacts_dir: Path):
+    """保存済みの学習結果のメタデータ (フィンガープリント・語彙など)。無い場合は None"""
+    path = Path(artifacts_dir) / TFIDF_META_FILE
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
 
 class TfidfSearch:
-    def __init__(self, papers):
+    def __init__(self, papers, artifacts_dir=None):
         """
-        papers: 論文データのリスト。各エントリは "title" と "abstract" を含む想定。
+        papers: 論文データのシーケンス (list または PaperStore)。各エントリは "title" と "abstract" を含む想定。
+        文書の文字列は学習時にジェネレータで渡すだけで、保持はしません。
+        scikit-learn は import に時間がかかるため、このエンジンを構築する時点で import します。
+
+        artifacts_dir: save() で保存した学習結果のディレクトリ (<corpus_dir>/TFIDF_ARTIFACTS_DIR)。
+        フィンガープリントが一致すれば語彙・IDF・文書行列を読み込み、一致しない (または無い) 場合だけ学習し直します。
         """
         self.papers = papers
-        # 各論文のタイトルとアブストラクトを連結した文書を作成
-        self.documents = [f"{p.get('title','')} {p.get('abstract','')}" for p in papers]
-        self.vectorizer = TfidfVectorizer(stop_words="english")
-        self.tfidf_matrix = self.vectorizer.fit_transform(self.documents)
-        
-    def search(self, query, top_n=10):
+        self.ids = paper_ids(papers)
+        # 学習前に求めておき、学習中にコーパスが置き換えられても古い内容の結果として保存されるようにする
+        self.fingerprint = corpus_fingerprint(Path(artifacts_dir).parent) if artifacts_dir is not None else None
+        if artifacts_dir is not None and self._load(Path(artifacts_dir)):
+            return
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        self.vectorizer = TfidfVectorizer(**VECTORIZER_PARAMS)
+        self.tfidf_matrix = self.vectorizer.fit_transform(documents(papers))
+
+    def _load(self, artifacts_dir: Path) -> bool:
+        """
+        保存済みの学習結果を読み込む。フィンガープリントが一致しない場合は False。
+        文書行列の配列はメモリマップで開くため、複数のワーカープロセスで同じページを共有します。
+        """
+        meta = load_artifacts_meta(artifacts_dir)
+        if meta is None:
+            return False
+        if meta.get("fingerprint") != self.fingerprint:
+            print(f"TF-IDF artifacts in {artifacts_dir} are stale; refitting. Run scripts/build_tfidf.py to update them.")
+            return False
+        from scipy import sparse
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        vocabulary = {term: i for i, term in enumerate(meta["vocabulary"])}
+        self.vectorizer = TfidfVectorizer(**VECTORIZER_PARAMS, vocabulary=vocabulary)
+        self.vectorizer.idf_ = np.load(artifacts_dir / "idf.npy")
+        arrays = [np.load(artifacts_dir / f"matrix_{name}.npy", mmap_mode="r") for name in ("data", "indices", "indptr")]
+        self.tfidf_matrix = sparse.csr_matrix(tuple(arrays), shape=tuple(meta["shape"]), copy=False)
+        return True
+
+    def save(self, artifacts_dir: Path):
+        """
+        語彙 (meta.json)・IDF (idf.npy)・文書行列 (matrix_data/indices/indptr.npy, CSR) とフィンガープリントを保存します。
+        artifacts_dir はコーパスディレクトリ直下に置き、フィンガープリントはそのコーパスのファイルから求めます。
+        一時ディレクトリに書き込んでから置き換えるため、書きかけの学習結果が読まれることはありません。
+        """
+        artifacts_dir = Path(artifacts_dir)
+        fingerprint = self.fingerprint or corpus_fingerprint(artifacts_dir.parent)
+        artifacts_dir.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(dir=artifacts_dir.parent, prefix=f".{artifacts_dir.name}."))
+        try:
+            vocabulary = self.vectorizer.vocabulary_
+            terms = sorted(vocabulary, key=vocabulary.get)
+            np.save(tmp_dir / "idf.npy", self.vectorizer.idf_)
+            matrix = self.tfidf_matrix.tocsr()
+            for name in ("data", "indices", "indptr"):
+                np.save(tmp_dir / f"matrix_{name}.npy", getattr(matrix, name))
+            meta = {"fingerprint": fingerprint, "shape": list(matrix.shape), "vocabulary": terms}
+            with open(tmp_dir / TFIDF_META_FILE, "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+            if artifacts_dir.exists():
+                shutil.rmtree(artifacts_dir)
+            os.replace(tmp_dir, artifacts_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        print(f"TF-IDF artifacts ({len(terms)} terms, {self.tfidf_matrix.nnz} non-zeros) saved to {artifacts_dir}")
+
+
+    def _similarities(self, query_vecs) -> np.ndarray:
+        """
+        クエリと全文書のコサイン類似度 (Q, N)。
+        TfidfVectorizer の出力は行ごとに L2 正規化済みなので内積で求められる。
+        (cosine_similarity は呼び出しのたびに文書行列を正規化したコピーを作るため使わない)
+        """
+        return np.asarray((query_vecs @ self.tfidf_matrix.T).todense())
+
+    def rank(self, query, top_n=10, min_score=None, mask=None):
+        """上位の論文の papers 内インデックスとスコアを返す (mask が False の論文は除く)"""
         query_vec = self.vectorizer.transform([query])
-        similarities = cosine_similarity(query_vec, self.tfidf_matrix).flatten()
+        similarities = self._similarities(query_vec).flatten()
         # 類似度が高い順に上位 top_n 件のインデックスを取得
-        top_indices = np.argsort(similarities)[::-1][:top_n]
+        top_indices = select_top_k(similarities, top_n, ids=self.ids, min_score=min_score, mask=mask)
+        return top_indices, similarities[top_indices]
+
+    def rank_batch(self, queries, top_ns, min_score=None, masks=None):
+        """複数のクエリをまとめてベクトル化し、1 回の疎行列積で採点する"""
+        query_vecs = self.vectorizer.transform(list(queries))
+        similarities = self._similarities(query_vecs)
+        masks = masks if masks is not None else [None] * len(top_ns)
         results = []
-        for idx in top_indices:
-            paper = self.papers[idx]
-            results.append({
-                "id": paper["id"],
-                "url": paper["url"],
-                "title": paper["title"],
-                "abstract": paper["abstract"],
-                "score": float(similarities[idx]),
-                "authors": paper.get("authors", []),
-                "details": paper.get("details", {}),
-                "sessions": paper.get("sessions", []),
-            })
+        for row, top_n, mask in zip(similarities, top_ns, masks):
+            top_indices = select_top_k(row, top_n, ids=self.ids, min_score=min_score, mask=mask)
+            results.append((top_indices, row[top_indices]))
         return results
 
+    def search(self, query, top_n=10, min_score=None, mask=None):
+        indices, scores = self.rank(query, top_n=top_n, min_score=min_score, mask=mask)
+        return [to_result(self.papers[idx], score) for idx, score in zip(indices, scores)]
@@ -0,0 +1,57 @@
+import numpy as np
+
+
+def select_top_k(scores, k, ids=None, min_score=None, mask=None):
+    """
+    スコア配列から上位 k 件のインデックスを、スコアの降順で返します。
+    全件ソート (argsort) ではなく argpartition による部分選択を使うため、
+    コーパスが大きくなっても O(N + k log k) で済みます。
+
+    同点の場合は ids (論文 ID) の昇順で並べるため、結果は常に決定的になります。
+    ids が無い場合はインデックスの昇順を使います。
+
+    Args:
+        scores (np.ndarray): 1 次元のスコア配列
+        k (int): 取得する件数
+        ids (np.ndarray, optional): scores と対応する論文 ID の配列 (同点時の並び順に使用)
+        min_score (float, optional): この値未満のスコアは結果に含めない
+        mask (np.ndarray, optional): scores と同じ長さの真偽値配列。False の要素は結果に含めない
+
+    Returns:
+        np.ndarray: 上位 k 件 (以下) のインデックス
+    """
+    scores = np.asarray(scores)
+    candidates = None
+    if min_score is not None or mask is not None:
+        keep = np.ones(len(scores), dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        if min_score is not None:
+            keep = keep & (scores >= min_score)
+        candidates = np.flatnonzero(keep)
+        scores = scores[candidates]
+        if ids is not None:
+            ids = np.asarray(ids)[candidates]
+
+    n = len(scores)
+    k = min(int(k), n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    if k < n:
+        part = np.argpartition(-scores, k - 1)[:k]
+        kth = scores[part].min()
+        # k 番目のスコアと同点の要素は分割の境界をまたぐため、ID の小さい順に補う
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)
+        need = k - len(above)
+        if len(ties) > need:
+            if ids is not None:
+                ties = ties[np.argpartition(ids[ties], need - 1)[:need]]
+            else:
+                ties = ties[:need]
+        selected = np.concatenate([above, ties])
+    else:
+        selected = np.arange(n)
+
+    tie_key = ids[selected] if ids is not None else selected
+    selected = selected[np.lexsort((tie_key, -scores[selected]))]
+    return candidates[selected] if candidates is not None else selected
@@ -0,0 +1,128 @@
+import numpy as np
+from abc import ABC, abstractmethod
+
+from backend.api.search.topk import select_top_k
+
+# int8 量子化時のスケール (正規化済みベクトルの各要素は [-1, 1] に収まる)
+INT8_SCALE = 127.0
+# float16 / int8 の行列を float32 に戻して計算する際のブロック行数
+BLOCK_ROWS = 16384
+
+
+def normalize_rows(matrix) -> np.ndarray:
+    """各行を L2 正規化した float32 の行列を返す (ノルム 0 の行はそのまま)"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class VectorIndex(ABC):
+    @abstractmethod
+    def search(self, query_embedding, top_n, ids=None, min_score=None, mask=None):
+        """
+        クエリ埋め込みに類似した行を検索する。
+
+        Args:
+            query_embedding (np.ndarray): クエリ埋め込み (D,)
+            top_n (int): 取得する件数
+            ids (np.ndarray, optional): 各行の論文 ID (同点時の並び順に使用)
+            min_score (float, optional): この値未満のスコアは結果に含めない
+            mask (np.ndarray, optional): 各行を検索対象とするかどうかの真偽値配列 (絞り込み条件)
+
+        Returns:
+            (rows, scores): 上位の行番号と、そのコサイン類似度
+        """
+        pass
+
+    def search_batch(self, query_embeddings, top_ns, ids=None, min_score=None, masks=None):
+        """複数のクエリをまとめて検索する。既定ではクエリごとに search を呼ぶ"""
+        masks = masks if masks is not None else [None] * len(top_ns)
+        return [
+            self.search(query, top_n, ids=ids, min_score=min_score, mask=mask)
+            for query, top_n, mask in zip(query_embeddings, top_ns, masks)
+        ]
+
+
+class ExactIndex(VectorIndex):
+    def __init__(self, embeddings, dtype="float32"):
+        """
+        埋め込み行列を読み込み時に一度だけ L2 正規化して保持し、
+        クエリとのコサイン類似度を 1 回の行列ベクトル積で計算する総当たりインデックス。
+
+        Args:
+            embeddings (np.ndarray): 埋め込み行列 (N, D)
+            dtype (str): 保持する精度。"float32"、省メモリ用の "float16" または "int8"
+        """
+        if dtype not in ("float32", "float16", "int8"):
+            raise ValueError(f"Unsupported dtype: {dtype}")
+        self.dtype = dtype
+        normalized = normalize_rows(embeddings)
+        if dtype == "float16":
+            self.matrix = normalized.astype(np.float16)
+        elif dtype == "int8":
+            self.matrix = np.round(normalized * INT8_SCALE).astype(np.int8)
+        else:
+            self.matrix = normalized
+
+    @classmethod
+    def from_normalized(cls, matrix, dtype="float32"):
+        """正規化・量子化済みの行列 (スナップショットから読み込んだものなど) をそのまま使う"""
+        index = cls.__new__(cls)
+        index.dtype = dtype
+        index.matrix = matrix
+        return index
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes
+
+    def scores(self, query_embeddings) -> np.ndarray:
+        """
+        クエリ埋め込み (D,) または (Q, D) とのコサイン類似度を返す。
+        戻り値は (N,) または (Q, N) の float32 配列。
+        """
+        queries = normalize_rows(query_embeddings)
+        if self.dtype == "float32":
+            return (self.matrix @ queries.T).T
+        # 低精度の行列はブロックごとに float32 に戻してから積を取り、一時メモリを抑える
+        out = np.empty((len(self),) + queries.shape[:-1], dtype=np.float32)
+        for start in range(0, len(self), BLOCK_ROWS):
+            block = self.matrix[start:start + BLOCK_ROWS].astype(np.float32)
+            out[start:start + BLOCK_ROWS] = block @ queries.T
+        if self.dtype == "int8":
+            out /= INT8_SCALE
+        return out.T
+
+    def dense(self) -> np.ndarray:
+        """保持している行列を float32 の正規化済み行列として返す"""
+        if self.dtype == "int8":
+            return normalize_rows(self.matrix.astype(np.float32) / INT8_SCALE)
+        return self.matrix.astype(np.float32, copy=False)
+
+    def subset_scores(self, query_embedding, rows) -> np.ndarray:
+        """指定した行だけについて、クエリとのコサイン類似度を返す"""
+        query = normalize_rows(query_embedding)
+        block = self.matrix[rows].astype(np.float32, copy=False)
+        scores = block @ query
+        if self.dtype == "int8":
+            scores /= INT8_SCALE
+        return scores
+
+    def search(self, query_embedding, top_n, ids=None, min_score=None, mask=None):
+        scores = self.scores(query_embedding)
+        rows = select_top_k(scores, top_n, ids=ids, min_score=min_score, mask=mask)
+        return rows, scores[rows]
+
+    def search_batch(self, query_embeddings, top_ns, ids=None, min_score=None, masks=None):
+        # 1 回の行列積で全クエリを採点してから、クエリごとに上位を選択する
+        scores = self.scores(np.atleast_2d(query_embeddings))
+        masks = masks if masks is not None else [None] * len(top_ns)
+        results = []
+        for row_scores, top_n, mask in zip(scores, top_ns, masks):
+            rows = select_top_k(row_scores, top_n, ids=ids, min_score=min_score, mask=mask)
+            results.append((rows, row_scores[rows]))
+        return results
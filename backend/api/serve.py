@@ -0,0 +1,82 @@
+"""
+複数のワーカープロセスで API を起動します。
+
+    python -m backend.api.serve --workers 4
+
+親プロセスで読み取り専用の配列 (埋め込み行列・BM25 の転置インデックス・TF-IDF の文書行列・絞り込み列) を
+コーパスディレクトリ内の .npy ファイルとして一度だけ用意してから uvicorn のワーカーを起動します。
+各ワーカーはこれらをメモリマップで開くため OS のページキャッシュ上の同じページを共有し、
+ワーカー数を増やしてもコーパスの分のメモリは増えません (クエリ用の SentenceTransformer はワーカーごとに読み込みます)。
+
+gunicorn で起動する場合は先に --prepare-only で配列を用意しておきます。
+
+    python -m backend.api.serve --prepare-only
+    gunicorn -w 4 -k uvicorn.workers.UvicornWorker backend.api.main:app
+"""
+import argparse
+import time
+from pathlib import Path
+
+from backend.api import main
+from backend.api.search.bm25_search import BM25Search
+from backend.api.search.embedding_search import EmbeddingSearch
+from backend.api.search.filters import FilterColumns
+from backend.api.search.search_config import EMBEDDING_DTYPE
+from backend.api.search.snapshot import ENGINE_SNAPSHOT_DIR, save_engine_snapshot, snapshot_parts
+from backend.api.search.tfidf_search import TFIDF_ARTIFACTS_DIR, TfidfSearch, corpus_fingerprint, load_artifacts_meta
+from backend.core.corpus_store import PaperStore, corpus_exists, load_embeddings
+
+
+def prepare_shared_arrays(corpus_dir: Path, methods, dtype=EMBEDDING_DTYPE):
+    """
+    ワーカーがメモリマップで開く配列を用意します。
+    既存のスナップショット・TF-IDF の学習結果が現在のコーパス (論文 ID と内容のフィンガープリント) と
+    一致する場合は作り直しません。再取得で内容だけが変わった場合も作り直します。
+    """
+    start = time.perf_counter()
+    papers = PaperStore(corpus_dir)
+    snapshot_dir = corpus_dir / ENGINE_SNAPSHOT_DIR
+    use_embedding = "embedding" in methods
+    use_bm25 = "bm25" in methods
+    required = {"filters"} | ({"embedding"} if use_embedding else set()) | ({"bm25"} if use_bm25 else set())
+    if required <= snapshot_parts(snapshot_dir, papers, dtype=dtype):
+        print(f"Engine snapshot in {snapshot_dir} is up to date.")
+    else:
+        embedding = bm25 = None
+        if use_embedding:
+            embeddings, _, has_embedding = load_embeddings(corpus_dir)
+            embedding = EmbeddingSearch(papers, embeddings=embeddings, has_embedding=has_embedding, dtype=dtype)
+        if use_bm25:
+            bm25 = BM25Search(papers)
+        save_engine_snapshot(snapshot_dir, papers, embedding=embedding, bm25=bm25, filters=FilterColumns(papers))
+
+    if "tfidf" in methods:
+        tfidf_dir = corpus_dir / TFIDF_ARTIFACTS_DIR
+        meta = load_artifacts_meta(tfidf_dir)
+        if meta is None or meta.get("fingerprint") != corpus_fingerprint(corpus_dir):
+            TfidfSearch(papers).save(tfidf_dir)
+        else:
+            print(f"TF-IDF artifacts in {tfidf_dir} are up to date.")
+    papers.close()
+    print(f"Shared arrays ready in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="共有の配列を用意してから複数ワーカーで API を起動します")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--prepare-only", action="store_true", help="配列を用意するだけで API は起動しない")
+    args = parser.parse_args()
+
+    corpus_dir, version = main.resolve_corpus()
+    if corpus_exists(corpus_dir):
+        print(f"Preparing corpus version {version} in {corpus_dir}...")
+        prepare_shared_arrays(corpus_dir, main.available_methods())
+    else:
+        print(f"{corpus_dir} does not exist; each worker will build its own engines. "
+              "Run scripts/convert_to_corpus.py to share them.")
+    if not args.prepare_only:
+        import uvicorn
+
+        uvicorn.run("backend.api.main:app", host=args.host, port=args.port, workers=args.workers)
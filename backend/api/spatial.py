@@ -0,0 +1,102 @@
+import numpy as np
+
+
+class GridIndex:
+    def __init__(self, coords: np.ndarray, points_per_cell: int = 8):
+        """
+        2 次元座標に対する一様グリッドの空間インデックス。
+        各点をセルに割り当ててセル順に並べ (CSR 形式)、矩形検索や近傍検索で
+        関係するセルの点だけを調べます。
+
+        Args:
+            coords (np.ndarray): 座標 (N, 2)
+            points_per_cell (int): 1 セルあたりの平均点数の目安
+        """
+        self.coords = np.asarray(coords, dtype=np.float32)
+        n = len(self.coords)
+        self.size = max(1, int(np.ceil(np.sqrt(n / points_per_cell)))) if n else 1
+        if n:
+            self.lo = self.coords.min(axis=0)
+            self.hi = self.coords.max(axis=0)
+        else:
+            self.lo = np.zeros(2, dtype=np.float32)
+            self.hi = np.ones(2, dtype=np.float32)
+        self.cell_size = np.maximum((self.hi - self.lo) / self.size, 1e-9)
+        cx, cy = self._cell(self.coords) if n else (np.empty(0, dtype=np.int64),) * 2
+        cells = cx * self.size + cy
+        self.order = np.argsort(cells, kind="stable")
+        counts = np.bincount(cells, minlength=self.size * self.size)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    def _cell(self, points):
+        cell = np.floor((np.atleast_2d(points) - self.lo) / self.cell_size).astype(np.int64)
+        cell = np.clip(cell, 0, self.size - 1)
+        return cell[:, 0], cell[:, 1]
+
+    def _points_in_cells(self, x0, x1, y0, y1) -> np.ndarray:
+        """セル範囲 [x0, x1] x [y0, y1] に含まれる点のインデックス"""
+        chunks = []
+        for cx in range(x0, x1 + 1):
+            start = self.offsets[cx * self.size + y0]
+            end = self.offsets[cx * self.size + y1 + 1]
+            chunks.append(self.order[start:end])
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
+
+    def query_bbox(self, xmin, ymin, xmax, ymax) -> np.ndarray:
+        """矩形内の点のインデックスを返す"""
+        if len(self.coords) == 0 or xmin > xmax or ymin > ymax:
+            return np.empty(0, dtype=np.int64)
+        (x0,), (y0,) = self._cell([xmin, ymin])
+        (x1,), (y1,) = self._cell([xmax, ymax])
+        candidates = self._points_in_cells(x0, x1, y0, y1)
+        pts = self.coords[candidates]
+        inside = (pts[:, 0] >= xmin) & (pts[:, 0] <= xmax) & (pts[:, 1] >= ymin) & (pts[:, 1] <= ymax)
+        return np.sort(candidates[inside])
+
+    def nearest(self, x, y, k=10):
+        """
+        (x, y) に近い k 点のインデックスと距離を返す。
+        中心のセルから外側のリングへ順に広げ、k 番目の距離より外側のリングに達したら打ち切る。
+        """
+        n = len(self.coords)
+        k = min(k, n)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        target = np.array([x, y], dtype=np.float32)
+        (cx,), (cy,) = self._cell(target)
+        ring = 0
+        while True:
+            x0, x1 = max(cx - ring, 0), min(cx + ring, self.size - 1)
+            y0, y1 = max(cy - ring, 0), min(cy + ring, self.size - 1)
+            candidates = self._points_in_cells(x0, x1, y0, y1)
+            covers_all = x0 == 0 and y0 == 0 and x1 == self.size - 1 and y1 == self.size - 1
+            if len(candidates) >= k or covers_all:
+                dist = np.linalg.norm(self.coords[candidates] - target, axis=1)
+                kth = np.partition(dist, k - 1)[k - 1] if len(dist) >= k else np.inf
+                # 調べた範囲の外側にある点までの最短距離が kth 以上なら結果は確定
+                reach = ring * float(self.cell_size.min())
+                if covers_all or kth <= reach:
+                    order = np.lexsort((candidates, dist))[:k]
+                    return candidates[order], dist[order].astype(np.float32)
+            ring += 1
+
+    def clusters(self, indices: np.ndarray, xmin, ymin, xmax, ymax, resolution=64):
+        """
+        矩形内の点を resolution x resolution のビンにまとめる (低ズーム時の間引き)。
+
+        Returns:
+            (x, y, count, representative): 各ビンの重心・点数・重心に最も近い点のインデックス
+        """
+        pts = self.coords[indices]
+        span = np.maximum(np.array([xmax - xmin, ymax - ymin], dtype=np.float32), 1e-9)
+        bins = np.clip(((pts - [xmin, ymin]) / span * resolution).astype(np.int64), 0, resolution - 1)
+        keys = bins[:, 0] * resolution + bins[:, 1]
+        unique, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        cx = np.bincount(inverse, weights=pts[:, 0]) / counts
+        cy = np.bincount(inverse, weights=pts[:, 1]) / counts
+        # 各ビンで重心に最も近い点を代表点とする
+        dist = np.hypot(pts[:, 0] - cx[inverse], pts[:, 1] - cy[inverse])
+        order = np.lexsort((dist, inverse))
+        first = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        representative = indices[order[first]]
+        return cx.astype(np.float32), cy.astype(np.float32), counts, representative
@@ -0,0 +1,220 @@
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import tempfile
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# コーパスディレクトリ内のファイル名
+EMBEDDINGS_FILE = "embeddings.npy"
+IDS_FILE = "ids.npy"
+HAS_EMBEDDING_FILE = "has_embedding.npy"
+METADATA_FILE = "metadata.jsonl"
+OFFSETS_FILE = "metadata.offsets.npy"
+CORPUS_FILES = (METADATA_FILE, OFFSETS_FILE, EMBEDDINGS_FILE, IDS_FILE, HAS_EMBEDDING_FILE)
+# 派生ファイル (エンジンのスナップショット・IVF インデックス・kNN グラフ) の鮮度確認に使うファイル
+CONTENT_FILES = (METADATA_FILE, EMBEDDINGS_FILE, IDS_FILE, HAS_EMBEDDING_FILE)
+EMBEDDING_FILES = (EMBEDDINGS_FILE, IDS_FILE, HAS_EMBEDDING_FILE)
+# 版ごとのコーパスを並べたディレクトリ内で、API が読み込む版の名前を書いたファイル
+CURRENT_FILE = "CURRENT"
+
+
+def save_corpus(papers: List[Dict], corpus_dir: Path, embedding_key: str = "embedding",
+                embeddings: Optional[np.ndarray] = None, has_embedding: Optional[np.ndarray] = None):
+    """
+    論文データのリストをバイナリ形式のコーパスディレクトリに保存します。
+
+    - embeddings.npy: float32 の埋め込み行列 (N, D)。埋め込みが無い行はゼロ埋め
+    - ids.npy: 各行に対応する論文 ID (int64)
+    - has_embedding.npy: 各行に埋め込みが存在するかどうか (bool)
+    - metadata.jsonl: 埋め込みを除いた論文メタデータ (1 行 1 論文)
+    - metadata.offsets.npy: metadata.jsonl 内の各行の開始バイト位置 (N + 1 要素)
+
+    Args:
+        papers (list): 論文データのリスト
+        corpus_dir (Path): 保存先ディレクトリ
+        embedding_key (str): 埋め込みが保存されているキー
+        embeddings (np.ndarray, optional): papers と行が対応する埋め込み行列。
+            指定された場合は各論文の embedding キーではなくこちらを使う
+        has_embedding (np.ndarray, optional): embeddings の各行が有効かどうか
+
+    起動中の API が既存のファイルをメモリマップしている場合があるため、既存のファイルを上書き (切り詰め) せず、
+    同じ階層の一時ディレクトリに書き込んでからファイルごとに os.replace で置き換えます。
+    (置き換え前のファイルは、開いているプロセスが閉じるまで OS が保持します)
+    """
+    corpus_dir = Path(corpus_dir)
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=corpus_dir.parent, prefix=f".{corpus_dir.name}."))
+    try:
+        _write_corpus_files(papers, tmp_dir, embedding_key, embeddings, has_embedding)
+        for name in CORPUS_FILES:
+            os.replace(tmp_dir / name, corpus_dir / name)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    print(f"Corpus with {len(papers)} papers saved to {corpus_dir}")
+
+
+def _write_corpus_files(papers, corpus_dir: Path, embedding_key, embeddings, has_embedding):
+
+    from_papers = embeddings is None
+    if from_papers:
+        dim = next((len(p[embedding_key]) for p in papers if p.get(embedding_key)), 0)
+        embeddings = np.zeros((len(papers), dim), dtype=np.float32)
+        has_embedding = np.zeros(len(papers), dtype=bool)
+    else:
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if has_embedding is None:
+            has_embedding = np.ones(len(papers), dtype=bool)
+    ids = np.empty(len(papers), dtype=np.int64)
+    offsets = np.zeros(len(papers) + 1, dtype=np.int64)
+
+    with open(corpus_dir / METADATA_FILE, "wb") as f:
+        for i, paper in enumerate(papers):
+            ids[i] = paper["id"]
+            emb = paper.get(embedding_key) if from_papers else None
+            if emb:
+                embeddings[i] = emb
+                has_embedding[i] = True
+            meta = {k: v for k, v in paper.items() if k != embedding_key}
+            line = (json.dumps(meta, ensure_ascii=False) + "\n").encode("utf-8")
+            f.write(line)
+            offsets[i + 1] = offsets[i] + len(line)
+
+    np.save(corpus_dir / OFFSETS_FILE, offsets)
+    np.save(corpus_dir / EMBEDDINGS_FILE, embeddings)
+    np.save(corpus_dir / IDS_FILE, ids)
+    np.save(corpus_dir / HAS_EMBEDDING_FILE, has_embedding)
+
+
+def corpus_exists(corpus_dir: Path) -> bool:
+    """コーパスディレクトリに必要なファイルが揃っているかを返します"""
+    corpus_dir = Path(corpus_dir)
+    return all(
+        (corpus_dir / name).exists()
+        for name in (EMBEDDINGS_FILE, IDS_FILE, HAS_EMBEDDING_FILE, METADATA_FILE)
+    )
+
+
+def read_current_version(corpora_dir: Path) -> Optional[str]:
+    """版ごとのコーパスのディレクトリ (<corpora_dir>/<version>) のうち、CURRENT が指す版の名前。無ければ None"""
+    path = Path(corpora_dir) / CURRENT_FILE
+    if not path.exists():
+        return None
+    version = path.read_text(encoding="utf-8").strip()
+    return version or None
+
+
+def publish_corpus_version(corpora_dir: Path, version: str):
+    """CURRENT を version に書き換えます (一時ファイル経由で置き換えるため、読み手が書きかけの内容を見ることはありません)"""
+    corpora_dir = Path(corpora_dir)
+    if not corpus_exists(corpora_dir / version):
+        raise FileNotFoundError(f"{corpora_dir / version} is not a corpus directory")
+    tmp_path = corpora_dir / f".{CURRENT_FILE}.tmp"
+    tmp_path.write_text(version + "\n", encoding="utf-8")
+    os.replace(tmp_path, corpora_dir / CURRENT_FILE)
+
+
+def content_fingerprint(corpus_dir: Path, files=CONTENT_FILES) -> str:
+    """
+    コーパスのファイルのサイズと更新日時 (ns) から求めるフィンガープリント。
+    save_corpus はファイルを置き換えるため、内容が変われば ID が同じでも値が変わります。
+    コーパスから作った派生ファイルが古くないかの確認に使います。
+    """
+    digest = hashlib.sha256()
+    for name in files:
+        path = Path(corpus_dir) / name
+        if path.exists():
+            stat = path.stat()
+            digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_embeddings(corpus_dir: Path, mmap: bool = True) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    埋め込み行列・ID・埋め込み有無のマスクを読み込みます。
+    mmap=True の場合、埋め込み行列はメモリマップされ、必要なページだけが読み込まれます。
+
+    Returns:
+        (embeddings, ids, has_embedding)
+    """
+    corpus_dir = Path(corpus_dir)
+    mmap_mode: Optional[str] = "r" if mmap else None
+    embeddings = np.load(corpus_dir / EMBEDDINGS_FILE, mmap_mode=mmap_mode)
+    ids = np.load(corpus_dir / IDS_FILE)
+    has_embedding = np.load(corpus_dir / HAS_EMBEDDING_FILE)
+    return embeddings, ids, has_embedding
+
+
+def load_metadata(corpus_dir: Path) -> List[Dict]:
+    """埋め込みを除いた論文メタデータのリストを読み込みます"""
+    papers = []
+    with open(Path(corpus_dir) / METADATA_FILE, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                papers.append(json.loads(line))
+    return papers
+
+
+def build_offsets(metadata_path: Path) -> np.ndarray:
+    """metadata.jsonl を走査し、各行の開始バイト位置の配列 (N + 1 要素) を作成します"""
+    offsets = [0]
+    with open(metadata_path, "rb") as f:
+        for line in f:
+            offsets.append(offsets[-1] + len(line))
+    return np.array(offsets, dtype=np.int64)
+
+
+class PaperStore(Sequence):
+    """
+    metadata.jsonl をメモリマップし、オフセットインデックスを使って
+    要求された論文だけをその都度 dict にデコードする読み取り専用のシーケンス。
+    全論文の dict を常駐させないため、ワーカーあたりのメモリ使用量を抑えられます。
+    """
+
+    def __init__(self, corpus_dir: Path):
+        corpus_dir = Path(corpus_dir)
+        metadata_path = corpus_dir / METADATA_FILE
+        offsets_path = corpus_dir / OFFSETS_FILE
+        if offsets_path.exists():
+            self.offsets = np.load(offsets_path)
+        else:
+            self.offsets = build_offsets(metadata_path)
+        self.ids = np.load(corpus_dir / IDS_FILE)
+        self._file = open(metadata_path, "rb")
+        # 空ファイルは mmap できないため、その場合は空バイト列で代用する
+        if os.fstat(self._file.fileno()).st_size > 0:
+            self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._buf = b""
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("PaperStore index out of range")
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return json.loads(self._buf[start:end])
+
+    def close(self):
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+        self._file.close()
+
+
+def convert_json_to_corpus(json_path: Path, corpus_dir: Path, embedding_key: str = "embedding"):
+    """既存の embeddings.json (または scraped_data JSON) をコーパスディレクトリに変換します"""
+    if not os.path.exists(json_path):
+        raise FileNotFoundError(f"{json_path} does not exist.")
+    with open(json_path, "r", encoding="utf-8") as f:
+        papers = json.load(f)
+    save_corpus(papers, corpus_dir, embedding_key=embedding_key)
@@ -0,0 +1,165 @@
+from bs4 import BeautifulSoup, SoupStrainer
+import re
+
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:  # lxml はオプション。parser="lxml" を指定する場合のみ必要
+    LXML_AVAILABLE = False
+
+# 既定は従来どおり html.parser。lxml は高速だが、テキスト中の CR を LF に正規化するため
+# 既存データと完全に同じ出力にはならない (指定した場合のみ使う)
+DEFAULT_PARSER = "html.parser"
+PARSERS = ("html.parser", "lxml")
+
+# 取得対象のコンテンツページのベース URL (ローカルのスタブサーバーに差し替え可能)
+BASE_URL = "https://programs.sigchi.org/chi/2025/program/content"
+
+# 抽出に必要な要素 (タイトルと white-block) だけをツリーに残す
+CONTENT_STRAINER = SoupStrainer(["h3", "white-block"])
+
+# --- 各種セレクター・抽出ルール ---
+TITLE_SELECTOR = "h3.content-title"
+ABSTRACT_SELECTOR = "p.p-small"  # abstractは、Authorsブロック外の p.p-small を対象
+MAIN_PAGE_SELECTOR = "h2.full-name"  # 存在しない ID ではメインページが表示される
+
+
+def content_url(content_id: int, base_url: str = BASE_URL) -> str:
+    return f"{base_url.rstrip('/')}/{content_id}"
+
+
+def extract_title(soup):
+    elem = soup.select_one(TITLE_SELECTOR)
+    return elem.get_text(strip=True) if elem else None
+
+def extract_abstract(soup):
+    """
+    white-block 内で、<h4> に "Abstract" が含まれるブロックから
+    <p class="p-small"> のテキストを抽出します。
+    """
+    for block in soup.find_all("white-block"):
+        header = block.find("h4")
+        if header and "Abstract" in header.get_text():
+            p = block.find("p", class_="p-small")
+            if p:
+                return p.get_text(strip=True)
+    return None
+
+def extract_authors_block(block):
+    authors = []
+    for card in block.find_all("person-card"):
+        name_elem = card.find("h5")
+        aff_elem = card.find("p", class_="p-small")
+        name = name_elem.get_text(strip=True) if name_elem else ""
+        affiliation = aff_elem.get_text(strip=True) if aff_elem else ""
+        authors.append({"name": name, "affiliation": affiliation})
+    return authors
+
+def extract_authors(soup):
+    # Authorsブロック：white-block 内で、h4 に "Authors" が含まれるブロックを対象
+    for block in soup.find_all("white-block"):
+        header = block.find("h4")
+        if header and "Authors" in header.get_text():
+            return extract_authors_block(block)
+    return []
+
+def extract_details_block(block):
+    details = {}
+    # content-type を抽出
+    type_elem = block.select_one("content-type-label span.type-name")
+    details["content_type"] = type_elem.get_text(strip=True) if type_elem else None
+    # duration を抽出
+    duration_elem = block.select_one("duration-label")
+    details["duration"] = duration_elem.get_text(strip=True) if duration_elem else None
+    return details
+
+def extract_details(soup):
+    # Detailsブロック：white-block 内で、h4 に "Details" が含まれるブロックを対象
+    for block in soup.find_all("white-block"):
+        header = block.find("h4")
+        if header and "Details" in header.get_text():
+            return extract_details_block(block)
+    return {}
+
+def extract_sessions_block(session_block):
+    sessions = []
+    cards_container = session_block.select_one("div.cards-container")
+    if cards_container:
+        for card in cards_container.select("schedule-details-card"):
+            session = {}
+            # セッション名: schedule-info 内の h5.session-name-block > span.name
+            name_elem = card.select_one("div.schedule-info h5.session-name-block span.name")
+            session["session_name"] = name_elem.get_text(strip=True) if name_elem else None
+
+            # セッションの日付: date-label 内の conference-date > span.mat-mdc-tooltip-trigger
+            date_elem = card.select_one("date-label conference-date span.mat-mdc-tooltip-trigger")
+            if not date_elem:
+                # 代替パス（場合によっては schedule-info 内に含まれる）
+                date_elem = card.select_one("div.schedule-info date-label span.mat-mdc-tooltip-trigger")
+            if date_elem:
+                raw_text = date_elem.get_text(strip=True)
+                cleaned_text = re.sub(r'\s+', ' ', raw_text)
+                session["session_date"] = cleaned_text
+            else:
+                session["session_date"] = None
+
+            # セッション会場: location-container 内の a または span（リンク内テキスト）
+            venue_elem = card.select_one("div.location-container a span.mat-mdc-tooltip-trigger")
+            if not venue_elem:
+                venue_elem = card.select_one("div.location-container span.location")
+            session["session_venue"] = venue_elem.get_text(strip=True) if venue_elem else None
+
+            sessions.append(session)
+    return sessions
+
+def extract_sessions(soup):
+    # セッション情報は、白ブロックのうちクラスが "schedule-details-block" のもの
+    session_block = soup.select_one("white-block.schedule-details-block")
+    return extract_sessions_block(session_block) if session_block else []
+
+
+def extract_blocks(soup):
+    """
+    white-block を 1 回だけ走査し、見出し (h4) のテキストやクラスに応じて
+    abstract・authors・details・sessions を抽出します。
+    各項目は従来の extract_* 関数と同じく、条件に合う最初のブロックから取り出します。
+    """
+    abstract = None
+    authors = None
+    details = None
+    sessions = None
+    for block in soup.find_all("white-block"):
+        if sessions is None and "schedule-details-block" in (block.get("class") or []):
+            sessions = extract_sessions_block(block)
+        header = block.find("h4")
+        if not header:
+            continue
+        header_text = header.get_text()
+        if abstract is None and "Abstract" in header_text:
+            p = block.find("p", class_="p-small")
+            if p:
+                abstract = p.get_text(strip=True)
+        if authors is None and "Authors" in header_text:
+            authors = extract_authors_block(block)
+        if details is None and "Details" in header_text:
+            details = extract_details_block(block)
+    return {
+        "abstract": abstract,
+        "authors": authors if authors is not None else [],
+        "details": details if details is not None else {},
+        "sessions": sessions if sessions is not None else [],
+    }
+
+
+def parse_content(html, content_id: int, url: str, parser: str = DEFAULT_PARSER):
+    """
+    レンダリング済み HTML から論文情報の dict を作成します。
+    タイトルと white-block 以外の要素はツリーを作らずに読み飛ばし、white-block は 1 回だけ走査します。
+    """
+    soup = BeautifulSoup(html, parser, parse_only=CONTENT_STRAINER)
+    return {
+        "id": content_id,
+        "url": url,
+        "title": extract_title(soup),
+        **extract_blocks(soup),
+    }
@@ -0,0 +1,100 @@
+import gzip
+import hashlib
+import os
+import re
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from backend.core.scrape_store import ScrapeStore
+
+# レンダリング済み HTML の保存先 (<id>.html.gz) と、ハッシュ・取得日時の索引
+ARCHIVE_DIR = Path("data/raw_html")
+INDEX_FILE = "index.jsonl"
+
+# Angular が描画のたびに付け直す属性。内容の変化とはみなさない
+VOLATILE_ATTRIBUTE_PATTERN = re.compile(r'\s_ng(?:content|host)-[\w-]+(?:="[^"]*")?')
+
+
+def page_hash(html: str) -> str:
+    """描画ごとに変わる属性を取り除いた HTML の SHA-256"""
+    normalized = VOLATILE_ATTRIBUTE_PATTERN.sub("", html)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def read_pages_dir(pages_dir: Path) -> Iterator[Tuple[int, str]]:
+    """<id>.html / <id>.html.gz を並べたディレクトリのページをファイル名順に (id, html) で返します"""
+    for path in sorted(Path(pages_dir).glob("*.html*")):
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rt", encoding="utf-8", newline="") as f:
+            yield int(path.name.split(".")[0]), f.read()
+
+
+class HtmlArchive:
+    """
+    スクレイピングしたページの HTML を ID ごとに gzip で保存するアーカイブ。
+    索引 (index.jsonl) には ID ごとのハッシュと取得日時を追記し、
+    ハッシュが変わったページだけ HTML を書き直します。
+    """
+
+    def __init__(self, archive_dir: Path = ARCHIVE_DIR):
+        self.dir = Path(archive_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.index = ScrapeStore(self.dir / INDEX_FILE)
+
+    def page_path(self, content_id: int) -> Path:
+        return self.dir / f"{content_id}.html.gz"
+
+    def hash(self, content_id: int) -> Optional[str]:
+        entry = self.index.get(content_id)
+        return entry["sha256"] if entry else None
+
+    def put(self, content_id: int, html: str) -> bool:
+        """
+        ページを保存し、取得日時を記録します。
+
+        Returns:
+            bool: 前回保存したページから内容が変わった (または初めて保存した) 場合は True
+        """
+        digest = page_hash(html)
+        changed = digest != self.hash(content_id) or not self.page_path(content_id).exists()
+        if changed:
+            path = self.page_path(content_id)
+            fd, tmp_path = tempfile.mkstemp(dir=self.dir, prefix=f".{path.name}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+                    f.write(html.encode("utf-8"))
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        self.index.append({
+            "id": content_id,
+            "sha256": digest,
+            "fetched_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        })
+        return changed
+
+    def get(self, content_id: int) -> Optional[str]:
+        path = self.page_path(content_id)
+        if not path.exists():
+            return None
+        with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+            return f.read()
+
+    def pages(self) -> Iterator[Tuple[int, str]]:
+        """保存済みの全ページを ID 順に (id, html) で返します"""
+        for content_id in sorted(self.index.ids):
+            html = self.get(content_id)
+            if html is not None:
+                yield content_id, html
+
+    def close(self):
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,188 @@
+import json
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set
+
+# 追記ストアの既定のパスと、前処理スクリプトが読む正規化済みデータセットのパス
+STORE_PATH = Path("data/scraped_data.jsonl")
+EXPORT_PATH = Path("data/scraped_data_0314.json")
+# 再取得で内容が変わった論文 ID (下流の処理の無効化に使う)
+CHANGED_IDS_PATH = Path("data/changed_ids.json")
+
+# 追記時は "id" を先頭に書くため、行全体をパースせずに ID を取り出せる
+ID_PATTERN = re.compile(rb'^\{"id":\s*(-?\d+)')
+
+
+class ScrapeStore:
+    """
+    スクレイピング結果を 1 行 1 論文の JSON Lines として追記していくストア。
+
+    - 追記のたびに flush と fsync を行うため、中断しても書き込み済みの行は失われない
+    - 書きかけの末尾行 (改行で終わっていない、またはパースできない行) は開く際に切り詰める
+    - 同じ ID が複数回追記された場合は後の行が優先される
+    - 開く際に ID -> バイト位置のインデックスを作るため、取得済み ID の判定に全件のパースは不要
+    """
+
+    def __init__(self, path: Path = STORE_PATH, fsync: bool = True):
+        self.path = Path(path)
+        self.fsync = fsync
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.index: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._recover()
+        self._file = open(self.path, "ab")
+
+    def _recover(self):
+        """既存ファイルを走査してインデックスを作り、壊れた末尾を切り詰める"""
+        if not self.path.exists():
+            return
+        valid_end = 0
+        with open(self.path, "rb") as f:
+            offset = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                content_id = self._line_id(line)
+                if content_id is None:
+                    break
+                self.index[content_id] = offset
+                offset += len(line)
+                valid_end = offset
+        if valid_end < self.path.stat().st_size:
+            print(f"Truncating incomplete record at byte {valid_end} of {self.path}")
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_end)
+
+    @staticmethod
+    def _line_id(line: bytes) -> Optional[int]:
+        match = ID_PATTERN.match(line)
+        if match:
+            return int(match.group(1))
+        try:
+            return int(json.loads(line)["id"])
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    @property
+    def ids(self):
+        return self.index.keys()
+
+    def __contains__(self, content_id) -> bool:
+        return content_id in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def append(self, record: Dict):
+        """1 件のレコードを追記し、ディスクへの書き込みが完了してから戻ります"""
+        record = {"id": record["id"], **{k: v for k, v in record.items() if k != "id"}}
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.index[record["id"]] = offset
+
+    def get(self, content_id) -> Optional[Dict]:
+        offset = self.index.get(content_id)
+        if offset is None:
+            return None
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def records(self) -> Iterator[Dict]:
+        """各 ID の最新のレコードをファイル内の順に返します"""
+        latest = set(self.index.values())
+        with open(self.path, "rb") as f:
+            offset = 0
+            for line in f:
+                if offset in latest:
+                    yield json.loads(line)
+                offset += len(line)
+
+    def compact(self):
+        """各 ID の最新のレコードだけを残してファイルを書き直します (一時ファイル経由で置き換え)"""
+        with self._lock:
+            self._file.close()
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+            index = {}
+            try:
+                with os.fdopen(fd, "wb") as out:
+                    for record in sorted(self.records(), key=lambda r: r["id"]):
+                        index[record["id"]] = out.tell()
+                        out.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+                    out.flush()
+                    os.fsync(out.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                self._file = open(self.path, "ab")
+                raise
+            self.index = index
+            self._file = open(self.path, "ab")
+
+    def export_json(self, path: Path = EXPORT_PATH) -> List[Dict]:
+        """ID 順に並べた正規化済みのデータセットを JSON として (一時ファイル経由で) 書き出します"""
+        path = Path(path)
+        data = sorted(self.records(), key=lambda r: r["id"])
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=4)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        print(f"{len(data)} records exported to {path}")
+        return data
+
+    def import_json(self, path: Path):
+        """既存の JSON データセットのうち、未登録の ID をストアに取り込みます (移行用)"""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        added = 0
+        for record in data:
+            if record["id"] not in self.index:
+                self.append(record)
+                added += 1
+        print(f"{added} records imported from {path}")
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_changed_ids(path: Path = CHANGED_IDS_PATH) -> Set[int]:
+    """再取得で内容が変わり、下流の処理 (埋め込み・次元削減) をやり直すべき論文 ID を読み込みます"""
+    path = Path(path)
+    if not path.exists():
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return set(json.load(f))
+
+
+def record_changed_ids(ids, path: Path = CHANGED_IDS_PATH):
+    """内容が変わった論文 ID を、未処理の ID と合わせて (一時ファイル経由で) 保存します"""
+    path = Path(path)
+    changed = load_changed_ids(path) | set(ids)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(sorted(changed), f)
+    os.replace(tmp_path, path)
+
+
+def clear_changed_ids(path: Path = CHANGED_IDS_PATH):
+    """下流の処理がすべて完了した後に呼び出します"""
+    Path(path).unlink(missing_ok=True)
@@ -4,141 +4,217 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+# 抽出処理は Selenium なしで使えるよう extract モジュールにある (従来の import 先として再エクスポート)
+from backend.core.extract import (  # noqa: F401
+    BASE_URL, MAIN_PAGE_SELECTOR, TITLE_SELECTOR, content_url, extract_abstract, extract_authors,
+    extract_details, extract_sessions, extract_title, parse_content,
+)
+from contextlib import contextmanager
+from functools import lru_cache
 from pprint import pprint
+import queue
+import threading
 import time
-import re
 
-# --- 各種セレクター・抽出ルール ---
-TITLE_SELECTOR = "h3.content-title"
-ABSTRACT_SELECTOR = "p.p-small"  # abstractは、Authorsブロック外の p.p-small を対象
 
-def extract_title(soup):
-    elem = soup.select_one(TITLE_SELECTOR)
-    return elem.get_text(strip=True) if elem else None
+@lru_cache(maxsize=1)
+def chromedriver_path():
+    """ChromeDriver のインストール (バージョン確認を含む) はプロセスで 1 回だけ行う"""
+    return ChromeDriverManager().install()
 
-def extract_abstract(soup):
-    """
-    white-block 内で、<h4> に "Abstract" が含まれるブロックから
-    <p class="p-small"> のテキストを抽出します。
-    """
-    for block in soup.find_all("white-block"):
-        header = block.find("h4")
-        if header and "Abstract" in header.get_text():
-            p = block.find("p", class_="p-small")
-            if p:
-                return p.get_text(strip=True)
-    return None
-
-def extract_authors(soup):
-    authors = []
-    # Authorsブロック：white-block 内で、h4 に "Authors" が含まれるブロックを対象
-    for block in soup.find_all("white-block"):
-        header = block.find("h4")
-        if header and "Authors" in header.get_text():
-            for card in block.find_all("person-card"):
-                name_elem = card.find("h5")
-                aff_elem = card.find("p", class_="p-small")
-                name = name_elem.get_text(strip=True) if name_elem else ""
-                affiliation = aff_elem.get_text(strip=True) if aff_elem else ""
-                authors.append({"name": name, "affiliation": affiliation})
-            break
-    return authors
-
-def extract_details(soup):
-    details = {}
-    # Detailsブロック：white-block 内で、h4 に "Details" が含まれるブロックを対象
-    for block in soup.find_all("white-block"):
-        header = block.find("h4")
-        if header and "Details" in header.get_text():
-            # content-type を抽出
-            type_elem = block.select_one("content-type-label span.type-name")
-            details["content_type"] = type_elem.get_text(strip=True) if type_elem else None
-            # duration を抽出
-            duration_elem = block.select_one("duration-label")
-            details["duration"] = duration_elem.get_text(strip=True) if duration_elem else None
-            break
-    return details
-
-def extract_sessions(soup):
-    sessions = []
-    # セッション情報は、白ブロックのうちクラスが "schedule-details-block" のもの
-    session_block = soup.select_one("white-block.schedule-details-block")
-    if session_block:
-        cards_container = session_block.select_one("div.cards-container")
-        if cards_container:
-            for card in cards_container.select("schedule-details-card"):
-                session = {}
-                # セッション名: schedule-info 内の h5.session-name-block > span.name
-                name_elem = card.select_one("div.schedule-info h5.session-name-block span.name")
-                session["session_name"] = name_elem.get_text(strip=True) if name_elem else None
-
-                # セッションの日付: date-label 内の conference-date > span.mat-mdc-tooltip-trigger
-                date_elem = card.select_one("date-label conference-date span.mat-mdc-tooltip-trigger")
-                if not date_elem:
-                    # 代替パス（場合によっては schedule-info 内に含まれる）
-                    date_elem = card.select_one("div.schedule-info date-label span.mat-mdc-tooltip-trigger")
-                if date_elem:
-                    raw_text = date_elem.get_text(strip=True)
-                    cleaned_text = re.sub(r'\s+', ' ', raw_text)
-                    session["session_date"] = cleaned_text
-                else:
-                    session["session_date"] = None
-
-                # セッション会場: location-container 内の a または span（リンク内テキスト）
-                venue_elem = card.select_one("div.location-container a span.mat-mdc-tooltip-trigger")
-                if not venue_elem:
-                    venue_elem = card.select_one("div.location-container span.location")
-                session["session_venue"] = venue_elem.get_text(strip=True) if venue_elem else None
-
-                sessions.append(session)
-    return sessions
-
-def scrape_sigchi_content(content_id: int):
-    url = f"https://programs.sigchi.org/chi/2025/program/content/{content_id}"
-    
+
+def create_driver():
+    """ヘッドレス Chrome を起動します"""
     chrome_options = Options()
     chrome_options.add_argument("--headless")
     chrome_options.add_argument("--disable-gpu")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--window-size=1920,1080")
-    
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-    
+    return webdriver.Chrome(service=Service(chromedriver_path()), options=chrome_options)
+
+
+class RateLimiter:
+    """
+    全ワーカーで共有するレートリミッター。
+    ページ取得の開始間隔が 1 / rate 秒以上になるように呼び出し元を待たせます。
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class DriverPool:
+    """
+    長時間使い回す WebDriver のプール。
+    ドライバーは必要になった時点で最大 size 個まで起動され、close() でまとめて終了します。
+    """
+
+    def __init__(self, size: int, factory=create_driver):
+        self.size = size
+        self._factory = factory
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._drivers = []
+
+    def _take(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            driver = self._factory()
+        with self._lock:
+            self._drivers.append(driver)
+        return driver
+
+    def _discard(self, driver):
+        """壊れたドライバーを終了し、次回の取得時に作り直せるようにする"""
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @contextmanager
+    def acquire(self):
+        # 同時に貸し出すドライバーは size 個まで
+        self._slots.acquire()
+        try:
+            driver = self._take()
+            try:
+                yield driver
+            except (TimeoutException, ContentNotFound):
+                # TimeoutException は WebDriverException のサブクラスだが、ページ側の問題なのでドライバーは使い回す
+                self._idle.put(driver)
+                raise
+            except WebDriverException:
+                self._discard(driver)
+                raise
+            except BaseException:
+                self._idle.put(driver)
+                raise
+            else:
+                self._idle.put(driver)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+        while not self._idle.empty():
+            self._idle.get_nowait()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class content_settled:
+    """
+    タイトルが表示され、かつ white-block の数が連続したポーリングで変化しなくなったら
+    非同期読み込みが完了したとみなす WebDriverWait 用の条件。
+    固定時間の sleep の代わりに使います。
+    """
+
+    def __init__(self, stable_polls: int = 2):
+        self.stable_polls = stable_polls
+        self._last = None
+        self._stable = 0
+
+    def __call__(self, driver):
+        titles = driver.find_elements(By.CSS_SELECTOR, TITLE_SELECTOR)
+        if not titles or not titles[0].text.strip():
+            return False
+        count = len(driver.find_elements(By.CSS_SELECTOR, "white-block"))
+        if count and count == self._last:
+            self._stable += 1
+        else:
+            self._stable = 0
+        self._last = count
+        return self._stable >= self.stable_polls
+
+
+class ContentNotFound(Exception):
+    """コンテンツページではなくメインページが表示された (ID が存在しない) ことを表す例外"""
+
+
+def fetch_rendered_html(driver, url: str, timeout: float = 20, poll_frequency: float = 0.25,
+                        missing_grace: float = 2.0):
+    """
+    ページを開き、内容の読み込みが落ち着くまで待ってから HTML を返します。
+    タイトルの代わりにメインページが表示された場合は ContentNotFound を送出するため、
+    事前に別のリクエストで存在チェックをする必要はありません。
+    """
+    driver.get(url)
+    wait = WebDriverWait(driver, timeout, poll_frequency=poll_frequency)
+    wait.until(EC.any_of(
+        EC.presence_of_element_located((By.CSS_SELECTOR, TITLE_SELECTOR)),
+        EC.presence_of_element_located((By.CSS_SELECTOR, MAIN_PAGE_SELECTOR)),
+    ))
+    if not driver.find_elements(By.CSS_SELECTOR, TITLE_SELECTOR):
+        # ヘッダーだけが先に描画された可能性もあるため、少しだけタイトルを待つ
+        try:
+            WebDriverWait(driver, missing_grace, poll_frequency=poll_frequency).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, TITLE_SELECTOR))
+            )
+        except TimeoutException:
+            raise ContentNotFound(url)
+    wait.until(content_settled())
+    return driver.page_source
+
+
+def scrape_sigchi_content(content_id: int, driver=None, base_url: str = BASE_URL, timeout: float = 20):
+    """
+    1 件のコンテンツページをスクレイピングします。
+    driver を渡した場合はそれを使い回し、渡さない場合はこの呼び出しのためだけに起動して終了します。
+    """
+    url = content_url(content_id, base_url)
+    own_driver = driver is None
+    if own_driver:
+        driver = create_driver()
+
     try:
-        driver.get(url)
-        wait = WebDriverWait(driver, 20)
-        # タイトルが読み込まれるまで待機
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, TITLE_SELECTOR)))
-        # 固定待機で非同期読み込みを待つ
-        time.sleep(5)
-        
-        rendered_html = driver.page_source
-        soup = BeautifulSoup(rendered_html, "html.parser")
-        
-        title = extract_title(soup)
-        abstract = extract_abstract(soup)
-        authors = extract_authors(soup)
-        details = extract_details(soup)
-        sessions = extract_sessions(soup)
-        
-        return {
-            "id": content_id,
-            "url": url,
-            "title": title,
-            "abstract": abstract,
-            "authors": authors,
-            "details": details,
-            "sessions": sessions,
-        }
+        rendered_html = fetch_rendered_html(driver, url, timeout=timeout)
+        return parse_content(rendered_html, content_id, url)
+    except ContentNotFound:
+        print(f"Content {content_id} does not exist (main page was shown)")
+        return None
+    except TimeoutException:
+        print(f"Error scraping content {content_id}: timed out waiting for content")
+        return None
+    except WebDriverException:
+        # ドライバー自体の異常はプール側で作り直すために呼び出し元へ伝える
+        if not own_driver:
+            raise
+        print(f"Error scraping content {content_id}: driver failure")
+        return None
     except Exception as e:
         print(f"Error scraping content {content_id}: {e}")
         return None
     finally:
-        driver.quit()
+        if own_driver:
+            driver.quit()
 
 if __name__ == "__main__":
     content_data = scrape_sigchi_content(188582)
     print(content_data)
-
@@ -1,29 +1,57 @@
+import argparse
 import os
-import time
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
-from backend.core.scraper import scrape_sigchi_content
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from backend.core.html_archive import ARCHIVE_DIR, HtmlArchive
+from backend.core.scrape_store import CHANGED_IDS_PATH, STORE_PATH, ScrapeStore, record_changed_ids
+from backend.core.scraper import (
+    BASE_URL, ContentNotFound, DriverPool, RateLimiter, content_url, fetch_rendered_html, parse_content,
+)
 from pprint import pprint
 from bs4 import BeautifulSoup
 
+# 前処理スクリプトが読む JSON データセット (追記ストアから書き出す)
 OUTPUT_FILENAME = "data/scraped_data_0314.json"
+# 存在しないと判定した ID のキャッシュ (再実行時に即座にスキップする)
+MISSING_IDS_FILENAME = "data/missing_ids.json"
 
 
-def page_exists(url, timeout=10):
+def make_session(pool_size=4):
+    """ワーカー間で接続を使い回す requests.Session を作成します"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def page_exists(url, timeout=10, session=None, method="GET"):
     """
-    指定した URL に対して GET リクエストを行い、
-    ページ内に <h2 class="full-name">The ACM CHI conference on Human Factors in Computing Systems</h2>
-    が含まれていれば存在しないと判定します。
+    指定した URL に対してリクエストを行い、コンテンツページが存在するかを判定します。
+
+    - method="GET": ページ内に <h2 class="full-name">The ACM CHI conference on Human Factors in Computing Systems</h2>
+      が含まれているか、タイトルが無ければ存在しないと判定します。
+    - method="HEAD": 本文は取得せず、ステータスコードとリダイレクト先だけで判定する軽量なチェックです。
 
     Args:
         url (str): チェックする URL
         timeout (int): タイムアウト秒数
+        session (requests.Session, optional): 使い回すセッション
+        method (str): "GET" または "HEAD"
 
     Returns:
         bool: ページが存在すれば True、存在しなければ False
     """
+    http = session or requests
     try:
-        response = requests.get(url, allow_redirects=True, timeout=timeout)
+        if method == "HEAD":
+            response = http.head(url, allow_redirects=True, timeout=timeout)
+            # メインページへリダイレクトされた場合は存在しない
+            return response.status_code == 200 and response.url.rstrip("/") == url.rstrip("/")
+
+        response = http.get(url, allow_redirects=True, timeout=timeout)
         if response.status_code != 200:
             return False
 
@@ -49,77 +77,170 @@ def page_exists(url, timeout=10):
         return False
 
 
-def load_existing_data(filename):
-    """
-    既存のJSONファイルがあれば読み込む。なければ空リストを返す。
-    """
-    if os.path.exists(filename):
+def load_missing_ids(filename=MISSING_IDS_FILENAME):
+    """存在しないと判定済みの ID の集合を読み込みます"""
+    if not os.path.exists(filename):
+        return set()
+    try:
         with open(filename, "r", encoding="utf-8") as f:
-            try:
-                data = json.load(f)
-                return data
-            except Exception as e:
-                print(f"Error loading {filename}: {e}")
-                return []
-    else:
-        return []
+            return set(json.load(f))
+    except Exception as e:
+        print(f"Error loading {filename}: {e}")
+        return set()
 
 
-def save_to_json(data, filename=OUTPUT_FILENAME):
-    """
-    データをJSONファイルに保存する
-    """
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
-    print(f"Data saved to {filename}")
+def save_missing_ids(missing_ids, filename=MISSING_IDS_FILENAME):
+    """存在しない ID の集合を一時ファイル経由で保存します"""
+    tmp_filename = f"{filename}.tmp"
+    with open(tmp_filename, "w", encoding="utf-8") as f:
+        json.dump(sorted(missing_ids), f)
+    os.replace(tmp_filename, filename)
 
 
-def scrape_id_range(start_id, end_id, sleep_time=0.5, save_interval=10):
+def scrape_one(content_id, pool, limiter, base_url=BASE_URL, probe=None, session=None, retries=1):
     """
-    指定したID範囲のページについて、存在チェック後にスクレイピングを実施。
-    すでに取得済みのIDはスキップし、一定件数ごとに結果をファイルに保存する。
+    1 件の ID をスクレイピングします (ワーカースレッドで実行)。
+    probe を指定しない場合は、Selenium で読み込んだページ自体から存在を判定するため
+    ID あたりのリクエストは 1 回だけです。probe="HEAD"/"GET" を指定すると、
+    ブラウザを使う前に共有セッションで軽量な存在チェックを行います。
+    ドライバーが異常終了した場合はプールで作り直して retries 回まで再試行します。
+
+    Returns:
+        (status, html): status は "ok" / "missing" / "error"。html はレンダリング済みの HTML
     """
-    # 既存データを読み込み、取得済みのIDをセットで管理
-    results = load_existing_data(OUTPUT_FILENAME)
-    scraped_ids = {entry["id"] for entry in results}
-
-    base_url = "https://programs.sigchi.org/chi/2025/program/content"
-    count = 0
-    for content_id in range(start_id, end_id + 1):
-        print(f"Checking content ID: {content_id}")
-        if content_id in scraped_ids:
-            print("  Already scraped. Skipping.")
-            continue
-
-        url = f"{base_url}/{content_id}"
-        # ページ存在チェック（存在しない＝メインページへリダイレクトなどの場合）
-        if page_exists(url):
-            print("  Page does not exist (or redirect to main page). Skipping.")
-            time.sleep(sleep_time)
-            continue
-
-        print("  Page exists. Scraping...")
-        data = scrape_sigchi_content(content_id)
-        if data is not None and data.get("title"):
-            results.append(data)
-            scraped_ids.add(content_id)
-            print(f"  Valid data found: {data['title']}")
-        else:
-            print("  No valid data.")
+    url = content_url(content_id, base_url)
+    if probe is not None:
+        limiter.wait()
+        if not page_exists(url, session=session, method=probe):
+            return "missing", None
+
+    for attempt in range(retries + 1):
+        limiter.wait()
+        try:
+            with pool.acquire() as driver:
+                return "ok", fetch_rendered_html(driver, url)
+        except ContentNotFound:
+            return "missing", None
+        except TimeoutException:
+            print(f"  [{content_id}] Timed out waiting for content.")
+            return "error", None
+        except WebDriverException as e:
+            print(f"  [{content_id}] Driver failure (attempt {attempt + 1}): {e}")
+    return "error", None
+
+
+def scrape_id_range(start_id, end_id, workers=4, rate=2.0, save_interval=10, base_url=BASE_URL,
+                    store_path=STORE_PATH, probe=None, missing_filename=MISSING_IDS_FILENAME,
+                    recheck_missing=False, archive_dir=ARCHIVE_DIR, refresh=False,
+                    changed_ids_path=CHANGED_IDS_PATH):
+    """
+    指定したID範囲のページをスクレイピングする。
+    workers 個のドライバーを使い回して並行に取得し、全体のリクエスト開始頻度は
+    rate 回/秒以下に抑える。取得した HTML は ID ごとにアーカイブし、結果はその都度追記ストアに書き込む。
 
-        count += 1
-        time.sleep(sleep_time)
-        if count % save_interval == 0:
-            save_to_json(results, OUTPUT_FILENAME)
-            print("Intermediate data saved.")
+    通常はすでに取得済みのIDと、以前の実行で存在しないと判定したIDをスキップする。
+    refresh=True の場合は取得済みの ID を取り直し、ページのハッシュが変わったものだけ再抽出する。
+    抽出結果が変わった ID は changed_ids_path に記録し、下流の処理 (埋め込み・次元削減) で使う。
 
+    Returns:
+        list: 今回新たに取得した (または内容が変わった) データ
+    """
+    results = []
+    changed_ids = []
+    missing_ids = set() if recheck_missing else load_missing_ids(missing_filename)
+    with ScrapeStore(store_path) as store, HtmlArchive(archive_dir) as archive:
+        # 追記ストアが無い場合は従来の JSON から取得済みデータを移行する
+        if len(store) == 0 and os.path.exists(OUTPUT_FILENAME):
+            store.import_json(OUTPUT_FILENAME)
+        if refresh:
+            pending = [i for i in range(start_id, end_id + 1) if i in store]
+            print(f"Refreshing {len(pending)} scraped IDs.")
+        else:
+            pending = [i for i in range(start_id, end_id + 1) if i not in store and i not in missing_ids]
+            print(f"{end_id - start_id + 1 - len(pending)} IDs already scraped or known missing, {len(pending)} to check.")
+
+        limiter = RateLimiter(rate)
+        session = make_session(workers) if probe is not None else None
+        count = 0
+        unchanged = 0
+        with DriverPool(workers) as pool, ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(scrape_one, i, pool, limiter, base_url, probe, session): i for i in pending}
+            # 結果の集約と保存はメインスレッドだけで行う
+            for future in as_completed(futures):
+                content_id = futures[future]
+                try:
+                    status, html = future.result()
+                except Exception as e:
+                    print(f"  [{content_id}] Error: {e}")
+                    status, html = "error", None
+                count += 1
+                if count % save_interval == 0:
+                    save_missing_ids(missing_ids, missing_filename)
+
+                if status == "missing":
+                    if not refresh:
+                        missing_ids.add(content_id)
+                    print(f"  [{content_id}] Page does not exist (or redirect to main page).")
+                    continue
+                if html is None:
+                    print(f"  [{content_id}] No valid data.")
+                    continue
+
+                # ページのハッシュが変わっていなければ抽出し直す必要はない
+                if not archive.put(content_id, html) and content_id in store:
+                    unchanged += 1
+                    continue
+                previous = store.get(content_id)
+                data = parse_content(html, content_id, content_url(content_id, base_url))
+                if not data.get("title"):
+                    print(f"  [{content_id}] No valid data.")
+                elif data == previous:
+                    unchanged += 1
+                else:
+                    store.append(data)
+                    results.append(data)
+                    if previous is not None:
+                        changed_ids.append(content_id)
+                        print(f"  [{content_id}] Content changed: {data['title']}")
+                    else:
+                        print(f"  [{content_id}] Valid data found: {data['title']}")
+
+    save_missing_ids(missing_ids, missing_filename)
+    if changed_ids:
+        record_changed_ids(changed_ids, changed_ids_path)
+    if refresh:
+        print(f"{len(changed_ids)} changed, {unchanged} unchanged.")
+    results.sort(key=lambda entry: entry["id"])
     return results
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ID 範囲のコンテンツページを並行してスクレイピングします")
     # 例: ID 188211 ～ 189669 を対象
-    start_id = 188211
-    end_id = 189669
-    scraped_results = scrape_id_range(start_id, end_id, sleep_time=0.5, save_interval=10)
-    save_to_json(scraped_results, OUTPUT_FILENAME)
+    parser.add_argument("--start-id", type=int, default=188211)
+    parser.add_argument("--end-id", type=int, default=189669)
+    parser.add_argument("--workers", type=int, default=4, help="並行して使うブラウザの数")
+    parser.add_argument("--rate", type=float, default=2.0, help="全体でのリクエスト開始頻度の上限 (回/秒)")
+    parser.add_argument("--save-interval", type=int, default=10)
+    parser.add_argument("--base-url", default=BASE_URL, help="ローカルのスタブサーバーを使う場合に指定")
+    parser.add_argument("--store", default=STORE_PATH, help="結果を追記する JSON Lines ファイル")
+    parser.add_argument("--export", action="store_true", help="終了後に前処理用の JSON データセットを書き出す")
+    parser.add_argument("--probe", choices=["HEAD", "GET"], default=None,
+                        help="ブラウザで開く前に軽量な存在チェックを行う (既定では読み込んだページから判定)")
+    parser.add_argument("--missing-ids", default=MISSING_IDS_FILENAME, help="存在しない ID のキャッシュ")
+    parser.add_argument("--recheck-missing", action="store_true", help="存在しない ID のキャッシュを無視する")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR, help="取得した HTML の保存先")
+    parser.add_argument("--refresh", action="store_true",
+                        help="取得済みの ID を取り直し、内容が変わったものだけ更新する")
+    args = parser.parse_args()
+
+    scraped_results = scrape_id_range(
+        args.start_id, args.end_id, workers=args.workers, rate=args.rate,
+        save_interval=args.save_interval, base_url=args.base_url, store_path=args.store,
+        probe=args.probe, missing_filename=args.missing_ids, recheck_missing=args.recheck_missing,
+        archive_dir=args.archive_dir, refresh=args.refresh,
+    )
     pprint(scraped_results)
+    if args.export:
+        with ScrapeStore(args.store) as store:
+            store.export_json(OUTPUT_FILENAME)
@@ -3,13 +3,14 @@ import { SearchBar } from "../components/SearchBar";
 import { ScatterPlot } from "../components/ScatterPlot";
 import { CardGrid } from "../components/CardGrid";
 import { PaperDetailPanel } from "../components/PaperDetailPanel";
-import { searchPapers, getDimensionCoordinates } from "../utils/apiClient";
+import { searchPapers, getDimensionCoordinates, toSearchFilters } from "../utils/apiClient";
 import { Paper } from "../components/PaperCard";
 import { PageContainer } from "../components/PageContainer";
 import { OptionsPanel, DimReductionMethod } from "../components/OptionsPanel";
 import { DateRange } from "react-day-picker";
-import { filterPapersByDate } from "@/utils/filterByDate";
-import { filterPapersByContent } from "../utils/filterByContent";
+
+// 散布図の点に必要なフィールドだけを取得する（アブストラクトや著者は取得しない）
+const SCATTER_FIELDS = ["id", "url", "title", "score"];
 
 interface CoordData {
   [id: string]: [number, number];
@@ -51,23 +52,17 @@ export const HomePage: React.FC = () => {
     handleSearch();
   }, []);
 
-  // 検索実行：カード用（topN件）および散布図用（例として2000件）の結果を取得し、日付フィルタリングを適用
+  // 検索実行：カード用（topN件）および散布図用（例として2000件）の結果を取得する
   const handleSearch = async () => {
     setLoading(true);
     setError("");
     try {
-      const cardResults = await searchPapers(query, 2000);
-      const scatterResults = await searchPapers(query, 2000);
-      setCardPapers(filterPapersByContent(
-        filterPapersByDate(cardResults, dateRange),
-        selectedContentTypes
-      ).slice(0, topN));
-      setScatterPapers(
-        filterPapersByContent(
-          filterPapersByDate(scatterResults, dateRange),
-          selectedContentTypes
-        )
-      );
+      // 日付範囲・コンテンツ種別の絞り込みはどちらもサーバー側で行う
+      const filters = toSearchFilters(dateRange, selectedContentTypes);
+      const cardResults = await searchPapers(query, topN, undefined, filters);
+      const scatterResults = await searchPapers(query, 2000, undefined, filters, SCATTER_FIELDS);
+      setCardPapers(cardResults);
+      setScatterPapers(scatterResults);
     } catch (err) {
       setError("Search failed. Please try again.");
     }
@@ -84,8 +79,9 @@ export const HomePage: React.FC = () => {
     const customData: Paper[] = [];
     const sizes: number[] = [];
 
+    // カードに表示中の論文は全フィールドを取得済みなので、詳細パネル用にそちらを優先する
     const paperMap: { [id: string]: Paper } = {};
-    scatterPapers.forEach((p) => {
+    [...scatterPapers, ...cardPapers].forEach((p) => {
       paperMap[p.id] = p;
     });
 
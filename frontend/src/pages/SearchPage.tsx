@@ -1,13 +1,11 @@
 import React, { useEffect, useState } from "react";
 import { CardGrid } from "../components/CardGrid";
-import { searchPapers } from "../utils/apiClient";
+import { searchPapers, toSearchFilters } from "../utils/apiClient";
 import { Paper } from "../components/PaperCard";
 import { Input } from "@/components/ui/input";
 import { Button } from "@/components/ui/button";
 import { inputClass, buttonClass } from "@/theme/components";
 import { PageContainer } from "../components/PageContainer";
-import { filterPapersByDate } from "@/utils/filterByDate";
-import { filterPapersByContent } from "../utils/filterByContent";
 import { DateRange } from "react-day-picker";
 import { OptionsPanel } from "../components/OptionsPanel";
 
@@ -31,13 +29,14 @@ export const SearchPage: React.FC = () => {
     setLoading(true);
     setError("");
     try {
-      const data = await searchPapers(query, 2000);
-      setPapers(
-        filterPapersByContent(
-          filterPapersByDate(data, dateRange).slice(0, topN),
-          selectedContentTypes
-        )
+      // 日付・コンテンツ種別の絞り込みはサーバー側で上位 topN 件の選択前に適用される
+      const data = await searchPapers(
+        query,
+        topN,
+        undefined,
+        toSearchFilters(dateRange, selectedContentTypes)
       );
+      setPapers(data);
     } catch (err) {
       setError("Search failed. Please try again.");
     }
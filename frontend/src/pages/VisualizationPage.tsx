@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from "react";
-import { getDimensionCoordinates, searchPapers } from "../utils/apiClient";
+import { getDimensionCoordinates, searchPapers, toSearchFilters } from "../utils/apiClient";
 import { Paper } from "../components/PaperCard";
 import { Input } from "@/components/ui/input";
 import { Button } from "@/components/ui/button";
@@ -9,8 +9,6 @@ import { ScatterPlot } from "../components/ScatterPlot";
 import { PaperDetailPanel } from "../components/PaperDetailPanel";
 import { OptionsPanel, DimReductionMethod } from "../components/OptionsPanel";
 import { DateRange } from "react-day-picker";
-import { filterPapersByDate } from "@/utils/filterByDate";
-import { filterPapersByContent } from "../utils/filterByContent";
 
 interface CoordData {
   [id: string]: [number, number];
@@ -47,13 +45,14 @@ export const VisualizationPage: React.FC = () => {
     setLoading(true);
     setError("");
     try {
-      // Visualization 用のデータ（例として 2000 件）
-      const results = await searchPapers(query, 2000);
-      setPapers(
-        filterPapersByContent(
-          filterPapersByDate(results, dateRange),
-          selectedContentTypes
-        ));
+      // Visualization 用のデータ（例として 2000 件）。日付範囲・コンテンツ種別はサーバー側で絞り込む
+      const results = await searchPapers(
+        query,
+        2000,
+        undefined,
+        toSearchFilters(dateRange, selectedContentTypes)
+      );
+      setPapers(results);
     } catch (err) {
       setError("Search failed. Please try again.");
     }
@@ -1,4 +1,6 @@
 import axios from "axios";
+import { format } from "date-fns";
+import { DateRange } from "react-day-picker";
 
 // .envファイルに基づいてVITE_API_BASEがセットされる
 const API_BASE = import.meta.env.VITE_API_BASE || "http://127.0.0.1:8000";
@@ -6,13 +8,46 @@ const API_BASE = import.meta.env.VITE_API_BASE || "http://127.0.0.1:8000";
 const apiClient = axios.create({
   baseURL: API_BASE,
   timeout: 5000, // タイムアウト5秒
+  // 配列パラメータを content_type=a&content_type=b の形式で送る（FastAPI の List[str] に対応）
+  paramsSerializer: { indexes: null },
 });
 
+// /search のサーバー側絞り込み条件
+export interface SearchFilters {
+  date_from?: string; // YYYY-MM-DD
+  date_to?: string; // YYYY-MM-DD
+  content_type?: string[];
+  venue?: string[];
+  author?: string;
+}
+
+// 画面の日付範囲・コンテンツ種別の選択からサーバー側の絞り込み条件を作成する
+// 日付は範囲の両端が選ばれている場合だけ絞り込む（片側だけの選択中は日付で絞り込まない）
+export const toSearchFilters = (
+  dateRange: DateRange | undefined,
+  contentTypes: string[]
+): SearchFilters => {
+  const hasRange = Boolean(dateRange?.from && dateRange?.to);
+  return {
+    date_from: hasRange ? format(dateRange!.from!, "yyyy-MM-dd") : undefined,
+    date_to: hasRange ? format(dateRange!.to!, "yyyy-MM-dd") : undefined,
+    content_type: contentTypes.length > 0 ? contentTypes : undefined,
+  };
+};
+
 // 論文検索用API
-export const searchPapers = async (query: string, top_n: number = 10) => {
+// method: "embedding" | "bm25" | "hybrid" | "tfidf"（省略時はサーバーの既定）
+// fields: 返すフィールドのリスト（省略時は全フィールド。id は常に含まれる）
+export const searchPapers = async (
+  query: string,
+  top_n: number = 10,
+  method?: string,
+  filters: SearchFilters = {},
+  fields?: string[]
+) => {
   try {
     const response = await apiClient.get("/search", {
-      params: { query, top_n },
+      params: { query, top_n, method, ...filters, fields: fields?.join(",") },
     });
     return response.data;
   } catch (error) {
@@ -32,17 +67,71 @@ export const getUmapCoordinates = async () => {
   }
 };
 
-export const getDimensionCoordinates = async (method: string = "umap") => {
+// 座標は ids/x/y の配列形式（format=arrays）で受け取り、id をキーとする辞書に変換して返す
+export const getDimensionCoordinates = async (
+  method: string = "umap"
+): Promise<Record<string, [number, number]>> => {
   try {
     const response = await apiClient.get(`/dimensions`, {
-      params: { method }
+      params: { method, format: "arrays" }
     });
-    console.log("Response from /dimensions:", response.data);
-    return response.data;
+    const { ids, x, y } = response.data as { ids: number[]; x: number[]; y: number[] };
+    const coords: Record<string, [number, number]> = {};
+    ids.forEach((id, i) => {
+      coords[String(id)] = [x[i], y[i]];
+    });
+    return coords;
   } catch (error) {
     console.error("Error fetching dimension coordinates:", error);
     throw error;
   }
 };
 
+// ビューポート内の座標取得用API（点が多い場合はクラスタにまとめて返る）
+export const getViewportCoordinates = async (
+  bbox: { xmin: number; ymin: number; xmax: number; ymax: number },
+  method: string = "umap",
+  max_points: number = 2000
+) => {
+  try {
+    const response = await apiClient.get("/dimensions/viewport", {
+      params: { ...bbox, method, max_points },
+    });
+    return response.data;
+  } catch (error) {
+    console.error("Error fetching viewport coordinates:", error);
+    throw error;
+  }
+};
+
+// 2次元マップ上の近傍論文取得用API
+export const getNearestPapers = async (x: number, y: number, method: string = "umap", k: number = 10) => {
+  try {
+    const response = await apiClient.get("/dimensions/nearest", {
+      params: { x, y, method, k },
+    });
+    return response.data;
+  } catch (error) {
+    console.error("Error fetching nearest papers:", error);
+    throw error;
+  }
+};
+
+// 指定した論文に類似した論文（事前計算した近傍グラフから取得、モデルは呼ばない）
+export const getSimilarPapers = async (
+  paperId: number,
+  top_n: number = 10,
+  filters: SearchFilters = {}
+) => {
+  try {
+    const response = await apiClient.get(`/papers/${paperId}/similar`, {
+      params: { top_n, ...filters },
+    });
+    return response.data;
+  } catch (error) {
+    console.error("Error fetching similar papers:", error);
+    throw error;
+  }
+};
+
 export default apiClient;
@@ -0,0 +1,62 @@
+import argparse
+import time
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+from preprocess_utils import CORPUS_DIR  # noqa: F401 (backend を import できるようにする)
+from backend.api.search.topk import select_top_k
+from backend.api.search.vector_index import ExactIndex
+
+# all-MiniLM-L6-v2 の埋め込み次元
+DIM = 384
+
+
+def time_per_query(fn, queries, repeat=3):
+    """各クエリで fn を実行し、1 クエリあたりの中央値 (ms) を返す"""
+    timings = []
+    for _ in range(repeat):
+        for q in queries:
+            start = time.perf_counter()
+            fn(q)
+            timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+def baseline_search(embeddings, query, top_n):
+    """従来の実装: 毎回 cosine_similarity で正規化し、全件 argsort する"""
+    similarities = cosine_similarity(query.reshape(1, -1), embeddings).flatten()
+    return np.argsort(similarities)[::-1][:top_n]
+
+
+def benchmark(n_papers, n_queries=20, top_n=10, include_baseline=True):
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((n_papers, DIM)).astype(np.float32)
+    ids = np.arange(n_papers, dtype=np.int64)
+    queries = rng.standard_normal((n_queries, DIM)).astype(np.float32)
+
+    rows = []
+    if include_baseline:
+        embeddings64 = embeddings.astype(np.float64)
+        ms = time_per_query(lambda q, embeddings64=embeddings64: baseline_search(embeddings64, q, top_n), queries)
+        rows.append(("sklearn cosine + argsort (float64)", embeddings64.nbytes, ms))
+        del embeddings64
+
+    for dtype in ("float32", "float16", "int8"):
+        index = ExactIndex(embeddings, dtype=dtype)
+        ms = time_per_query(lambda q, index=index: select_top_k(index.scores(q), top_n, ids=ids), queries)
+        rows.append((f"ExactIndex matvec + top-k ({dtype})", index.nbytes, ms))
+        del index
+
+    print(f"\n{n_papers} papers x {DIM} dims, top_n={top_n}")
+    for name, nbytes, ms in rows:
+        print(f"  {name:<40} {nbytes / 1e6:>9.1f} MB  {ms:>8.2f} ms/query")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EmbeddingSearch のクエリあたりのレイテンシを計測します")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4_000, 40_000, 400_000])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--no-baseline", action="store_true", help="従来実装の計測を省略する")
+    args = parser.parse_args()
+    for size in args.sizes:
+        benchmark(size, n_queries=args.queries, top_n=args.top_n, include_baseline=not args.no_baseline)
@@ -0,0 +1,87 @@
+import argparse
+import json
+import time
+from pathlib import Path
+import numpy as np
+import preprocess_utils  # noqa: F401 (backend を import できるようにする)
+from bs4 import BeautifulSoup
+from backend.core.extract import (
+    LXML_AVAILABLE, extract_abstract, extract_authors, extract_details, extract_sessions, extract_title,
+    parse_content,
+)
+from backend.core.html_archive import read_pages_dir
+from stub_content_server import SCRAPED_DATA_PATH, render_content_page
+
+
+def load_pages(pages_dir=None, data_path=SCRAPED_DATA_PATH, limit=None):
+    """
+    計測対象のページを (id, html) のリストで返します。
+    pages_dir を指定した場合は保存済みの <id>.html / <id>.html.gz を、
+    指定しない場合はスクレイピング済み JSON から本番と同じ構造の HTML を生成して使います。
+    """
+    if pages_dir is not None:
+        pages = list(read_pages_dir(pages_dir))
+    else:
+        with open(data_path, "r", encoding="utf-8") as f:
+            pages = [(entry["id"], render_content_page(entry)) for entry in json.load(f)]
+    return pages[:limit]
+
+
+def pad_page(html, padding_kb):
+    """
+    生成したページの前後に、本番ページのナビゲーションやメニューに相当する
+    抽出対象外の要素を padding_kb KB 程度追加します
+    """
+    item = '<div class="menu-item"><a href="#"><span class="label">Program</span></a></div>'
+    filler = item * max(int(padding_kb * 1000 / len(item)) // 2, 0)
+    return html.replace("<body>", f"<body><nav>{filler}</nav>", 1).replace("</body>", f"<footer>{filler}</footer></body>", 1)
+
+
+def legacy_parse(html, content_id, url):
+    """従来の実装: html.parser で全体をパースし、extract_* ごとに white-block を走査する"""
+    soup = BeautifulSoup(html, "html.parser")
+    return {
+        "id": content_id,
+        "url": url,
+        "title": extract_title(soup),
+        "abstract": extract_abstract(soup),
+        "authors": extract_authors(soup),
+        "details": extract_details(soup),
+        "sessions": extract_sessions(soup),
+    }
+
+
+def time_per_page(fn, pages, repeat=3):
+    """各ページで fn を実行し、1 ページあたりの中央値と p95 (ms) を返す"""
+    timings = []
+    for _ in range(repeat):
+        for content_id, html in pages:
+            start = time.perf_counter()
+            fn(html, content_id, "")
+            timings.append(time.perf_counter() - start)
+    timings = np.array(timings) * 1000
+    return float(np.median(timings)), float(np.percentile(timings, 95))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="コンテンツページの抽出処理のページあたりの時間を計測します")
+    parser.add_argument("--pages-dir", type=Path, default=None, help="保存済みの HTML ページのディレクトリ")
+    parser.add_argument("--limit", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--padding-kb", type=float, default=100,
+                        help="生成ページに追加する抽出対象外のマークアップの量 (--pages-dir 指定時は無視)")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages_dir, limit=args.limit)
+    if args.pages_dir is None:
+        pages = [(content_id, pad_page(html, args.padding_kb)) for content_id, html in pages]
+    avg_kb = sum(len(html) for _, html in pages) / max(len(pages), 1) / 1000
+    print(f"{len(pages)} pages, {avg_kb:.1f} KB/page on average")
+
+    rows = [("legacy (html.parser, one scan per field)", legacy_parse)]
+    rows.append(("single pass (html.parser)", lambda h, i, u: parse_content(h, i, u, parser="html.parser")))
+    if LXML_AVAILABLE:
+        rows.append(("single pass (lxml)", lambda h, i, u: parse_content(h, i, u, parser="lxml")))
+    for name, fn in rows:
+        median, p95 = time_per_page(fn, pages, repeat=args.repeat)
+        print(f"  {name:<42} {median:>7.2f} ms/page (p95 {p95:.2f} ms)")
@@ -0,0 +1,76 @@
+"""
+API のコールドスタートを計測します。
+
+    python scripts/benchmark_startup.py --max-import-ms 1500
+
+別プロセスで backend.api.main の import、起動処理 (startup イベント)、最初の /health と /search を
+順に実行して所要時間を表示します。import 後に重いモジュール (sentence_transformers、torch、sklearn、mangum) が
+読み込まれていた場合や、import 時間が --max-import-ms を超えた場合は終了コード 1 で終了します。
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = ["sentence_transformers", "torch", "sklearn", "mangum", "uvicorn"]
+
+# 計測用の子プロセスで実行するコード (STARTUP_WARMUP の影響を受けないよう None にして起動する)
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import backend.api.main as main
+imported = time.perf_counter()
+loaded = [name for name in {heavy!r} if name in sys.modules]
+main.STARTUP_WARMUP = None
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    started = time.perf_counter()
+    client.get("/health")
+    health = time.perf_counter()
+    search_ms = None
+    if {query!r}:
+        t = time.perf_counter()
+        client.get("/search", params={{"query": {query!r}, "top_n": 10}})
+        search_ms = (time.perf_counter() - t) * 1000
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (started - imported) * 1000,
+    "first_health_ms": (health - started) * 1000,
+    "first_search_ms": search_ms,
+    "heavy_modules": loaded,
+}}))
+"""
+
+
+def measure(query):
+    code = CHILD.format(heavy=HEAVY_MODULES, query=query)
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API の import・起動・最初のリクエストの時間を計測します")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--query", default="", help="指定した場合、最初の /search (エンジン構築込み) も計測する")
+    parser.add_argument("--max-import-ms", type=float, default=None, help="import 時間の上限 (超えたら失敗)")
+    args = parser.parse_args()
+
+    results = [measure(args.query) for _ in range(args.repeat)]
+    keys = ["import_ms", "startup_ms", "first_health_ms"] + (["first_search_ms"] if args.query else [])
+    for key in keys:
+        values = sorted(r[key] for r in results)
+        print(f"{key:<18} median {values[len(values) // 2]:8.1f} ms  (min {values[0]:.1f}, max {values[-1]:.1f})")
+
+    failed = False
+    heavy = sorted({name for r in results for name in r["heavy_modules"]})
+    if heavy:
+        print(f"FAIL: heavy modules loaded at import time: {', '.join(heavy)}")
+        failed = True
+    import_ms = sorted(r["import_ms"] for r in results)[len(results) // 2]
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        print(f"FAIL: import took {import_ms:.1f} ms (limit {args.max_import_ms:.1f} ms)")
+        failed = True
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,22 @@
+import argparse
+from preprocess_utils import CORPUS_DIR
+from backend.core.corpus_store import EMBEDDING_FILES, content_fingerprint, corpus_exists, load_embeddings
+from backend.api.search.ivf_index import IVF_INDEX_FILE, IVFIndex
+from backend.api.search.vector_index import ExactIndex
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="コーパスの埋め込みから IVF インデックスを構築します")
+    parser.add_argument("--nlist", type=int, default=None, help="リスト (クラスタ) 数。既定は 4 * sqrt(N)")
+    parser.add_argument("--iter", type=int, default=20, help="k-means の反復回数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if not corpus_exists(CORPUS_DIR):
+        raise FileNotFoundError(f"{CORPUS_DIR} does not exist. Run scripts/convert_to_corpus.py first.")
+    print("Loading embeddings...")
+    fingerprint = content_fingerprint(CORPUS_DIR, EMBEDDING_FILES)
+    embeddings, ids, has_embedding = load_embeddings(CORPUS_DIR)
+    exact = ExactIndex(embeddings[has_embedding])
+    print(f"Building IVF index for {len(exact)} embeddings...")
+    index = IVFIndex.build(exact, nlist=args.nlist, n_iter=args.iter, seed=args.seed)
+    index.save(CORPUS_DIR / IVF_INDEX_FILE, ids=ids[has_embedding], fingerprint=fingerprint)
@@ -0,0 +1,34 @@
+import argparse
+import time
+from preprocess_utils import CORPUS_DIR
+from backend.core.corpus_store import PaperStore, corpus_exists, load_embeddings
+from backend.api.search.bm25_search import BM25Search
+from backend.api.search.embedding_search import EmbeddingSearch
+from backend.api.search.filters import FilterColumns
+from backend.api.search.search_config import EMBEDDING_DTYPE
+from backend.api.search.snapshot import ENGINE_SNAPSHOT_DIR, save_engine_snapshot
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="埋め込み検索と BM25 のエンジン・絞り込み列を構築し、API の起動時に読み込むスナップショットとして保存します"
+    )
+    parser.add_argument("--dtype", default=EMBEDDING_DTYPE, help="埋め込み行列の精度 (search_config と揃える)")
+    parser.add_argument("--no-embedding", action="store_true", help="埋め込み検索のスナップショットを作らない")
+    parser.add_argument("--no-bm25", action="store_true", help="BM25 のスナップショットを作らない")
+    args = parser.parse_args()
+
+    if not corpus_exists(CORPUS_DIR):
+        raise FileNotFoundError(f"{CORPUS_DIR} does not exist. Run scripts/convert_to_corpus.py first.")
+    papers = PaperStore(CORPUS_DIR)
+    embedding = bm25 = None
+    if not args.no_embedding:
+        embeddings, _, has_embedding = load_embeddings(CORPUS_DIR)
+        start = time.perf_counter()
+        embedding = EmbeddingSearch(papers, embeddings=embeddings, has_embedding=has_embedding, dtype=args.dtype)
+        print(f"Built embedding index for {len(embedding.rows)} papers in {time.perf_counter() - start:.1f}s")
+    if not args.no_bm25:
+        start = time.perf_counter()
+        bm25 = BM25Search(papers)
+        print(f"Built BM25 index ({len(bm25.vocabulary)} terms) in {time.perf_counter() - start:.1f}s")
+    filters = FilterColumns(papers)
+    save_engine_snapshot(CORPUS_DIR / ENGINE_SNAPSHOT_DIR, papers, embedding=embedding, bm25=bm25, filters=filters)
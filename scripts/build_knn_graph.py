@@ -0,0 +1,28 @@
+import argparse
+import time
+import numpy as np
+from preprocess_utils import CORPUS_DIR
+from backend.core.corpus_store import EMBEDDING_FILES, content_fingerprint, corpus_exists, load_embeddings
+from backend.api.search.knn_graph import GRAPH_BLOCK_ROWS, KNN_GRAPH_FILE, KNNGraph
+from backend.api.search.vector_index import ExactIndex
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="コーパスの埋め込みから類似論文の kNN グラフを構築します")
+    parser.add_argument("--k", type=int, default=50, help="1 論文あたりの近傍数")
+    parser.add_argument("--block-rows", type=int, default=GRAPH_BLOCK_ROWS, help="一度に採点する行数")
+    args = parser.parse_args()
+
+    if not corpus_exists(CORPUS_DIR):
+        raise FileNotFoundError(f"{CORPUS_DIR} does not exist. Run scripts/convert_to_corpus.py first.")
+    print("Loading embeddings...")
+    fingerprint = content_fingerprint(CORPUS_DIR, EMBEDDING_FILES)
+    embeddings, ids, has_embedding = load_embeddings(CORPUS_DIR)
+    rows = np.flatnonzero(has_embedding)
+    exact = ExactIndex(embeddings[has_embedding])
+    print(f"Building kNN graph (k={args.k}) for {len(exact)} embeddings...")
+    start = time.perf_counter()
+    graph = KNNGraph.build(
+        exact, rows, ids, len(ids), k=args.k, block_rows=args.block_rows, fingerprint=fingerprint
+    )
+    print(f"Built in {time.perf_counter() - start:.1f}s")
+    graph.save(CORPUS_DIR / KNN_GRAPH_FILE)
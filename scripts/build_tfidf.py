@@ -0,0 +1,21 @@
+import argparse
+import time
+from preprocess_utils import CORPUS_DIR
+from backend.core.corpus_store import PaperStore, corpus_exists
+from backend.api.search.tfidf_search import TFIDF_ARTIFACTS_DIR, TfidfSearch
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="TF-IDF を学習し、語彙・IDF・文書行列を API の起動時に読み込む学習結果として保存します"
+    )
+    parser.add_argument("--force", action="store_true", help="フィンガープリントが一致していても学習し直す")
+    args = parser.parse_args()
+
+    if not corpus_exists(CORPUS_DIR):
+        raise FileNotFoundError(f"{CORPUS_DIR} does not exist. Run scripts/convert_to_corpus.py first.")
+    papers = PaperStore(CORPUS_DIR)
+    artifacts_dir = CORPUS_DIR / TFIDF_ARTIFACTS_DIR
+    start = time.perf_counter()
+    engine = TfidfSearch(papers, artifacts_dir=None if args.force else artifacts_dir)
+    print(f"TF-IDF ready in {time.perf_counter() - start:.1f}s")
+    engine.save(artifacts_dir)
@@ -0,0 +1,10 @@
+from pathlib import Path
+from preprocess_utils import CORPUS_DIR
+from backend.core.corpus_store import convert_json_to_corpus
+
+# 変換元の JSON (埋め込み付き) と変換先のコーパスディレクトリ
+EMBEDDINGS_PATH = Path("data/embeddings.json")
+
+if __name__ == "__main__":
+    print(f"Converting {EMBEDDINGS_PATH} to binary corpus...")
+    convert_json_to_corpus(EMBEDDINGS_PATH, CORPUS_DIR)
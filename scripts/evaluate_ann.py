@@ -0,0 +1,67 @@
+import argparse
+import time
+import numpy as np
+from preprocess_utils import CORPUS_DIR
+from backend.core.corpus_store import corpus_exists, load_embeddings
+from backend.api.search.ivf_index import IVF_INDEX_FILE, IVFIndex
+from backend.api.search.vector_index import ExactIndex
+
+
+def synthetic_embeddings(n, dim=384, n_topics=200, seed=0):
+    """トピックの周りに分布する合成埋め込み (コーパスが無い場合や規模を変えて試す場合に使用)"""
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((n_topics, dim)).astype(np.float32)
+    return topics[rng.integers(0, n_topics, n)] + 0.8 * rng.standard_normal((n, dim)).astype(np.float32)
+
+
+def evaluate(exact, ivf, queries, ids, top_n):
+    """各 nprobe について recall@k とクエリあたりのレイテンシを表示する"""
+    ground_truth = []
+    start = time.perf_counter()
+    for q in queries:
+        rows, _ = exact.search(q, top_n, ids=ids)
+        ground_truth.append(set(rows.tolist()))
+    exact_ms = (time.perf_counter() - start) / len(queries) * 1000
+    print(f"  exact: {exact_ms:.2f} ms/query")
+
+    nprobes = [p for p in (1, 2, 4, 8, 16, 32, 64, 128) if p <= ivf.nlist]
+    for nprobe in nprobes:
+        ivf.nprobe = nprobe
+        hits = 0
+        start = time.perf_counter()
+        for q, truth in zip(queries, ground_truth):
+            rows, _ = ivf.search(q, top_n, ids=ids)
+            hits += len(truth.intersection(rows.tolist()))
+        ms = (time.perf_counter() - start) / len(queries) * 1000
+        recall = hits / sum(len(t) for t in ground_truth)
+        print(f"  nprobe={nprobe:<4} recall@{top_n}={recall:.3f}  {ms:.2f} ms/query")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="IVF インデックスの recall@k とレイテンシを総当たり検索と比較します")
+    parser.add_argument("--synthetic", type=int, default=None, help="指定した件数の合成データで評価する")
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-n", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    if args.synthetic is None and corpus_exists(CORPUS_DIR):
+        embeddings, ids, has_embedding = load_embeddings(CORPUS_DIR)
+        exact = ExactIndex(embeddings[has_embedding])
+        ids = ids[has_embedding]
+        index_path = CORPUS_DIR / IVF_INDEX_FILE
+        if index_path.exists() and args.nlist is None:
+            ivf = IVFIndex.load(index_path, exact)
+        else:
+            ivf = IVFIndex.build(exact, nlist=args.nlist)
+    else:
+        exact = ExactIndex(synthetic_embeddings(args.synthetic or 40_000))
+        ids = np.arange(len(exact), dtype=np.int64)
+        ivf = IVFIndex.build(exact, nlist=args.nlist)
+
+    # 既存の論文にノイズを加えたものをクエリとして使う
+    sample = exact.dense()[rng.choice(len(exact), args.queries)]
+    queries = sample + 0.05 * rng.standard_normal(sample.shape).astype(np.float32)
+    print(f"{len(exact)} embeddings, nlist={ivf.nlist}, {args.queries} queries")
+    evaluate(exact, ivf, queries, ids, args.top_n)
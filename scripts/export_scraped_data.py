@@ -0,0 +1,17 @@
+import argparse
+from pathlib import Path
+import preprocess_utils  # noqa: F401 (リポジトリルートを sys.path に追加する)
+from backend.core.scrape_store import EXPORT_PATH, STORE_PATH, ScrapeStore
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="スクレイピング結果の追記ストアを圧縮し、前処理用の JSON を書き出します")
+    parser.add_argument("--store", type=Path, default=STORE_PATH)
+    parser.add_argument("--output", type=Path, default=EXPORT_PATH)
+    parser.add_argument("--no-compact", action="store_true", help="追記ストアの書き直しを行わない")
+    args = parser.parse_args()
+
+    with ScrapeStore(args.store) as store:
+        if not args.no_compact:
+            store.compact()
+            print(f"Compacted {args.store} to {len(store)} records")
+        store.export_json(args.output)
@@ -1,13 +1,21 @@
+import argparse
+import hashlib
 import json
 import os
+import time
 from pathlib import Path
+import numpy as np
 from tqdm import tqdm
 from sentence_transformers import SentenceTransformer
-import time
+from preprocess_utils import CORPUS_DIR, atomic_write_json
+from backend.core.corpus_store import save_corpus
 
 # 入力となるスクレイピング済みデータと出力先
 SCRAPED_DATA_PATH = Path("data/scraped_data_0314.json")
 EMBEDDINGS_PATH = Path("data/embeddings.json")
+# 計算済みの埋め込みを追記していくチェックポイント (シャード) の保存先
+SHARD_DIR = Path("data/embedding_shards")
+MODEL_NAME = "all-MiniLM-L6-v2"
 
 
 def load_scraped_data(path: Path):
@@ -21,44 +29,121 @@ def load_scraped_data(path: Path):
 
 def save_embeddings(data, path: Path):
     """計算済みデータを JSON ファイルに保存します"""
-    os.makedirs(path.parent, exist_ok=True)
-    with open(str(path), "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+    atomic_write_json(data, path, ensure_ascii=False, indent=4)
     print(f"Embeddings saved to {path}")
 
 
-def compute_embeddings(data, save_interval=10, output_path=EMBEDDINGS_PATH):
+def entry_text(entry):
+    """埋め込みの対象となるテキスト (title と abstract の連結)"""
+    return f"{entry.get('title') or ''} {entry.get('abstract') or ''}".strip()
+
+
+def text_hash(text, model_name=MODEL_NAME):
+    """テキストとモデル名のハッシュ。これが変わった論文だけを再計算する"""
+    return hashlib.sha1(f"{model_name}\n{text}".encode("utf-8")).hexdigest()
+
+
+def write_shard(shard_dir: Path, ids, hashes, embeddings):
+    """計算済みの埋め込みを新しいシャードファイルとして追記します (既存のシャードは書き換えない)"""
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    name = f"shard-{time.time_ns()}.npz"
+    tmp_path = shard_dir / f".{name}.tmp.npz"
+    np.savez(tmp_path, ids=np.asarray(ids, dtype=np.int64), hashes=np.asarray(hashes, dtype="S40"),
+             embeddings=np.asarray(embeddings, dtype=np.float32))
+    os.replace(tmp_path, shard_dir / name)
+
+
+def load_shards(shard_dir: Path):
+    """全シャードを古い順に読み込み、論文 ID -> (テキストハッシュ, 埋め込み) の辞書を返します (新しいものが優先)"""
+    cache = {}
+    if not shard_dir.exists():
+        return cache
+    for path in sorted(shard_dir.glob("shard-*.npz")):
+        with np.load(path) as shard:
+            for id_, h, emb in zip(shard["ids"], shard["hashes"], shard["embeddings"]):
+                cache[int(id_)] = (h.decode("ascii"), emb)
+    return cache
+
+
+def compact_shards(shard_dir: Path, cache, keep_ids):
+    """現在の論文に対応する埋め込みだけを 1 つのシャードにまとめ、古いシャードを削除します"""
+    old_shards = sorted(shard_dir.glob("shard-*.npz"))
+    ids = [id_ for id_ in keep_ids if id_ in cache]
+    if ids:
+        write_shard(shard_dir, ids, [cache[id_][0] for id_ in ids], np.stack([cache[id_][1] for id_ in ids]))
+    for path in old_shards:
+        path.unlink()
+
+
+def compute_embeddings(data, batch_size=64, checkpoint_size=1024, processes=0, shard_dir=SHARD_DIR,
+                       model_name=MODEL_NAME):
     """
     各論文の title と abstract を結合してテキストを作成し、
-    SentenceTransformer モデルで埋め込みを計算します。
-    すでに embedding が存在する場合はスキップし、一定件数ごとに中間結果を保存します。
+    SentenceTransformer モデルでまとめて (batch_size 件ずつ) 埋め込みを計算します。
+    checkpoint_size 件ごとに計算結果をシャードファイルとして追記するため、中断しても
+    再実行時は未計算の論文とテキストが変わった論文だけを計算します。
+
+    Returns:
+        (embeddings, has_embedding): data と行が対応する埋め込み行列と、有効な行のマスク
     """
-    model = SentenceTransformer("all-MiniLM-L6-v2")
-    for i, entry in enumerate(tqdm(data, desc="Computing embeddings")):
-        # すでに埋め込みが計算済みならスキップ
-        if "embedding" in entry and entry["embedding"]:
-            continue
-
-        title = entry.get("title", "")
-        abstract = entry.get("abstract", "")
-        combined_text = f"{title} {abstract}".strip()
-        if combined_text:
-            embedding = model.encode(combined_text).tolist()
-            entry["embedding"] = embedding
-        else:
-            entry["embedding"] = None
-
-        # 定期的に中間結果を保存
-        if (i + 1) % save_interval == 0:
-            save_embeddings(data, output_path)
-            print(f"Intermediate save after {i + 1} entries.")
-    return data
+    cache = load_shards(shard_dir)
+    texts = [entry_text(entry) for entry in data]
+    hashes = [text_hash(text, model_name) for text in texts]
+    todo = [
+        i for i, (entry, text, h) in enumerate(zip(data, texts, hashes))
+        if text and cache.get(entry["id"], (None,))[0] != h
+    ]
+    print(f"{len(data) - len(todo)} embeddings reused, {len(todo)} to compute.")
+
+    if todo:
+        model = SentenceTransformer(model_name)
+        pool = model.start_multi_process_pool(target_devices=["cpu"] * processes) if processes > 1 else None
+        try:
+            for start in tqdm(range(0, len(todo), checkpoint_size), desc="Computing embeddings"):
+                chunk = todo[start:start + checkpoint_size]
+                chunk_texts = [texts[i] for i in chunk]
+                if pool is not None:
+                    encoded = model.encode_multi_process(chunk_texts, pool, batch_size=batch_size)
+                else:
+                    encoded = model.encode(chunk_texts, batch_size=batch_size)
+                chunk_ids = [data[i]["id"] for i in chunk]
+                chunk_hashes = [hashes[i] for i in chunk]
+                write_shard(shard_dir, chunk_ids, chunk_hashes, encoded)
+                for id_, h, emb in zip(chunk_ids, chunk_hashes, encoded):
+                    cache[id_] = (h, emb)
+        finally:
+            if pool is not None:
+                model.stop_multi_process_pool(pool)
+        compact_shards(shard_dir, cache, [entry["id"] for entry in data])
+
+    dim = next((len(emb) for _, emb in cache.values()), 0)
+    embeddings = np.zeros((len(data), dim), dtype=np.float32)
+    has_embedding = np.zeros(len(data), dtype=bool)
+    for i, (entry, text, h) in enumerate(zip(data, texts, hashes)):
+        cached = cache.get(entry["id"])
+        if text and cached is not None and cached[0] == h:
+            embeddings[i] = cached[1]
+            has_embedding[i] = True
+    return embeddings, has_embedding
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="論文の埋め込みをバッチで計算し、コーパスとして保存します")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--checkpoint-size", type=int, default=1024, help="この件数ごとにシャードを追記する")
+    parser.add_argument("--processes", type=int, default=0, help="2 以上で CPU のマルチプロセスプールを使う")
+    parser.add_argument("--write-json", action="store_true", help="従来形式の embeddings.json も出力する")
+    args = parser.parse_args()
+
     print("Loading scraped data...")
     scraped_data = load_scraped_data(SCRAPED_DATA_PATH)
     print("Computing embeddings for each entry...")
-    data_with_embeddings = compute_embeddings(scraped_data, save_interval=10, output_path=EMBEDDINGS_PATH)
+    embeddings, has_embedding = compute_embeddings(
+        scraped_data, batch_size=args.batch_size, checkpoint_size=args.checkpoint_size, processes=args.processes
+    )
     print("Saving final results...")
-    save_embeddings(data_with_embeddings, EMBEDDINGS_PATH)
+    save_corpus(scraped_data, CORPUS_DIR, embeddings=embeddings, has_embedding=has_embedding)
+    if args.write_json:
+        for entry, emb, ok in zip(scraped_data, embeddings, has_embedding):
+            entry["embedding"] = emb.tolist() if ok else None
+        save_embeddings(scraped_data, EMBEDDINGS_PATH)
@@ -1,32 +1,29 @@
-import json
-import numpy as np
+import argparse
 from pathlib import Path
-from sklearn.decomposition import PCA
-from preprocess_utils import load_data, extract_embeddings
+from preprocess_utils import load_data, extract_embeddings, default_source, reduce_incremental, atomic_write_json
+from backend.api.dim_reduction.pca_reducer import PCAReducer
 
 # 保存先パス
 EMBEDDINGS_PATH = Path("data/embeddings.json")
 PCA_OUTPUT_PATH = Path("data/pca_coordinates.json")
-
-def compute_pca(embeddings, n_components=2):
-    """PCA によって高次元の埋め込みを n_components 次元に削減する。"""
-    pca = PCA(n_components=n_components)
-    pca_embeddings = pca.fit_transform(embeddings)
-    return pca_embeddings
+PCA_MODEL_PATH = Path("data/models/pca_reducer.pkl")
 
 def save_results(ids, reduced_embeddings, output_path: Path):
     """各論文のIDと削減後の座標のマッピングを JSON に保存する。"""
     result = {str(id_): coord.tolist() for id_, coord in zip(ids, reduced_embeddings)}
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=4)
+    atomic_write_json(result, output_path, ensure_ascii=False, indent=4)
     print(f"PCA coordinates saved to {output_path}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PCA 座標を計算します (既定では新しい論文だけを既存のレイアウトに射影)")
+    parser.add_argument("--full-rebuild", action="store_true", help="全件で学習し直す")
+    args = parser.parse_args()
+
     print("Loading embeddings data...")
-    data = load_data(EMBEDDINGS_PATH)
+    data = load_data(default_source(EMBEDDINGS_PATH))
     embeddings, ids = extract_embeddings(data)
     print(f"Computing PCA for {len(ids)} embeddings...")
-    pca_embeddings = compute_pca(embeddings)
+    ids, pca_embeddings = reduce_incremental(
+        PCAReducer, embeddings, ids, PCA_OUTPUT_PATH, PCA_MODEL_PATH, full_rebuild=args.full_rebuild
+    )
     save_results(ids, pca_embeddings, PCA_OUTPUT_PATH)
-
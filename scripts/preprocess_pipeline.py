@@ -0,0 +1,155 @@
+import argparse
+import hashlib
+import importlib
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import numpy as np
+from preprocess_utils import (
+    load_data,
+    extract_embeddings,
+    default_source,
+    reduce_incremental,
+    atomic_write_json,
+)
+from backend.core.corpus_store import EMBEDDINGS_FILE
+from backend.core.scrape_store import CHANGED_IDS_PATH, clear_changed_ids, load_changed_ids
+
+EMBEDDINGS_PATH = Path("data/embeddings.json")
+# 各ステージの入力ハッシュとパラメータを記録するファイル
+STATE_PATH = Path("data/.pipeline_state.json")
+
+# 次元削減ステージ: リデューサーのクラス、パラメータ、出力先
+STAGES = {
+    "pca": {
+        "reducer": "backend.api.dim_reduction.pca_reducer:PCAReducer",
+        "params": {"n_components": 2},
+        "output": Path("data/pca_coordinates.json"),
+        "model": Path("data/models/pca_reducer.pkl"),
+    },
+    "umap": {
+        "reducer": "backend.api.dim_reduction.umap_reducer:UMAPReducer",
+        "params": {"n_neighbors": 15, "min_dist": 0.1, "n_components": 2, "metric": "cosine"},
+        "output": Path("data/umap_coordinates.json"),
+        "model": Path("data/models/umap_reducer.pkl"),
+    },
+    "tsne": {
+        "reducer": "backend.api.dim_reduction.tsne_reducer:TSNEReducer",
+        "params": {"n_components": 2, "perplexity": 30, "learning_rate": 200},
+        "output": Path("data/tsne_coordinates.json"),
+        "model": Path("data/models/tsne_reducer.pkl"),
+    },
+}
+
+
+def content_hash(embeddings, ids) -> str:
+    """埋め込み行列と ID の内容ハッシュ"""
+    h = hashlib.sha256()
+    h.update(np.ascontiguousarray(embeddings, dtype=np.float32).tobytes())
+    h.update(np.asarray(ids, dtype=np.int64).tobytes())
+    return h.hexdigest()
+
+
+def params_hash(stage) -> str:
+    """リデューサーのクラスとパラメータのハッシュ"""
+    spec = STAGES[stage]
+    payload = json.dumps({"reducer": spec["reducer"], "params": spec["params"]}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_state():
+    """前回実行時の各ステージの入力ハッシュとパラメータを読み込む"""
+    if not STATE_PATH.exists():
+        return {}
+    with open(STATE_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def run_stage(stage, embeddings, ids, full_rebuild, changed_ids=()):
+    """ワーカープロセスで 1 つの次元削減ステージを実行し、座標を原子的に書き出す"""
+    spec = STAGES[stage]
+    module_name, class_name = spec["reducer"].split(":")
+    reducer_cls = getattr(importlib.import_module(module_name), class_name)
+    start = time.perf_counter()
+    ids, coords = reduce_incremental(
+        lambda: reducer_cls(**spec["params"]),
+        embeddings,
+        ids,
+        spec["output"],
+        spec["model"],
+        full_rebuild=full_rebuild,
+        changed_ids=changed_ids,
+    )
+    result = {str(id_): coord.tolist() for id_, coord in zip(ids, coords)}
+    atomic_write_json(result, spec["output"], ensure_ascii=False, indent=4)
+    return stage, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="埋め込みを一度だけ読み込み、PCA/UMAP/t-SNE を並列に計算します (入力が変わっていないステージは省略)"
+    )
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--workers", type=int, default=None, help="プロセス数 (既定はステージ数)")
+    parser.add_argument("--force", action="store_true", help="入力が変わっていなくても実行する")
+    parser.add_argument("--full-rebuild", action="store_true", help="学習済みモデルを使わずに全件で学習し直す")
+    args = parser.parse_args()
+
+    print("Loading embeddings data...")
+    source = default_source(EMBEDDINGS_PATH)
+    data = load_data(source)
+    embeddings, ids = extract_embeddings(data)
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    input_hash = content_hash(embeddings, ids)
+    state = load_state()
+    # 再取得で内容が変わった論文は、既存の座標を使わずに射影し直す
+    changed_ids = load_changed_ids()
+    if changed_ids:
+        print(f"{len(changed_ids)} papers changed since the last run.")
+
+    pending = []
+    for stage in args.stages:
+        current = {"input": input_hash, "params": params_hash(stage)}
+        previous = state.get(stage) or {}
+        if not args.force and previous == current and STAGES[stage]["output"].exists():
+            print(f"[{stage}] inputs unchanged; skipping.")
+            continue
+        # パラメータが変わった場合は、保存済みモデルへの射影ではなく全件で学習し直す
+        full_rebuild = args.full_rebuild or previous.get("params") != current["params"]
+        pending.append((stage, current, full_rebuild))
+
+    if not pending:
+        print("All stages are up to date.")
+    else:
+        print(f"Running {', '.join(s for s, _, _ in pending)} for {len(ids)} embeddings...")
+        keys = {stage: current for stage, current, _ in pending}
+        failed = []
+        with ProcessPoolExecutor(max_workers=args.workers or len(pending)) as pool:
+            futures = {
+                pool.submit(run_stage, stage, embeddings, ids, full_rebuild, changed_ids): stage
+                for stage, _, full_rebuild in pending
+            }
+            for future in as_completed(futures):
+                stage = futures[future]
+                try:
+                    _, elapsed = future.result()
+                except Exception as e:
+                    print(f"[{stage}] failed: {e}")
+                    failed.append(stage)
+                    continue
+                print(f"[{stage}] done in {elapsed:.1f}s")
+                # 成功したステージだけ記録し、失敗したステージは次回も実行する
+                state[stage] = keys[stage]
+                atomic_write_json(state, STATE_PATH, indent=2)
+        if failed:
+            raise SystemExit(f"Failed stages: {', '.join(failed)}")
+
+    # 変更された論文はすべてのステージに反映済み (埋め込みが変わっていなければ座標も変わらない)。
+    # ただし再取得後に埋め込みをまだ計算し直していない場合は、次回の実行のために残しておく
+    if changed_ids and set(args.stages) == set(STAGES):
+        embeddings_file = source / EMBEDDINGS_FILE if source.is_dir() else source
+        if embeddings_file.stat().st_mtime >= CHANGED_IDS_PATH.stat().st_mtime:
+            clear_changed_ids()
+        else:
+            print(f"Embeddings are older than {CHANGED_IDS_PATH}; run preprocess_embeddings.py first.")
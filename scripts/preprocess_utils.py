@@ -1,9 +1,25 @@
 import json
+import os
+import sys
+import tempfile
 import numpy as np
 from pathlib import Path
 
+# scripts/ から backend パッケージを import できるようにリポジトリルートを追加
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from backend.core.corpus_store import corpus_exists, load_embeddings
+from backend.api.dim_reduction.base import DimensionalityReducer
+
+CORPUS_DIR = Path("data/corpus")
+
 def load_data(path: Path):
-    """指定した JSON ファイルからデータを読み込む"""
+    """
+    指定したパスからデータを読み込む。
+    コーパスディレクトリが指定された場合は、JSON をパースせずにそのまま返す。
+    """
+    if Path(path).is_dir():
+        return Path(path)
     with open(path, "r", encoding="utf-8") as f:
         data = json.load(f)
     return data
@@ -12,7 +28,11 @@ def extract_embeddings(data, embedding_key="embedding"):
     """
     各論文の埋め込み（embedding）を抽出して、
     NumPy の配列に変換し、ID のリストも返す。
+    data がコーパスディレクトリの場合は、埋め込み行列を直接読み込む。
     """
+    if isinstance(data, Path) and corpus_exists(data):
+        matrix, ids, has_embedding = load_embeddings(data, mmap=False)
+        return matrix[has_embedding], ids[has_embedding].tolist()
     embeddings = []
     ids = []
     for entry in data:
@@ -21,3 +41,71 @@ def extract_embeddings(data, embedding_key="embedding"):
             embeddings.append(emb)
             ids.append(entry["id"])
     return np.array(embeddings), ids
+
+def atomic_write_json(data, path: Path, **dump_kwargs):
+    """
+    同じディレクトリの一時ファイルに書き込んでから os.replace で置き換える。
+    途中で失敗しても既存のファイルが壊れたり、書きかけの状態が読まれたりしない。
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, **dump_kwargs)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def default_source(json_path: Path):
+    """コーパスディレクトリがあればそれを、無ければ JSON ファイルのパスを返す"""
+    return CORPUS_DIR if corpus_exists(CORPUS_DIR) else json_path
+
+def load_coordinates(path: Path):
+    """保存済みの座標 JSON ({"id": [x, y], ...}) を読み込む。無ければ空の辞書"""
+    if not Path(path).exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def reduce_incremental(make_reducer, embeddings, ids, output_path: Path, model_path: Path, full_rebuild=False,
+                       changed_ids=()):
+    """
+    学習済みのリデューサーと既存の座標があれば、新しい論文と内容が変わった論文 (changed_ids) だけを
+    transform で既存のレイアウトに射影する。
+    モデルや座標が無い場合、または full_rebuild=True の場合は全件で学習し直してモデルを保存する。
+
+    Args:
+        make_reducer (callable): 新しい DimensionalityReducer を作る関数
+        embeddings (np.ndarray): 全論文の埋め込み
+        ids (list): embeddings と対応する論文 ID
+        output_path (Path): 既存の座標 JSON のパス
+        model_path (Path): 学習済みリデューサーの保存先
+        changed_ids (iterable): 既存の座標を使わずに射影し直す論文 ID
+
+    Returns:
+        (ids, coordinates): 全論文の ID と座標 (削除された論文は含まない)
+    """
+    existing = load_coordinates(output_path)
+    if not full_rebuild and existing and Path(model_path).exists():
+        changed = {str(id_) for id_ in changed_ids}
+        new_rows = [i for i, id_ in enumerate(ids) if str(id_) not in existing or str(id_) in changed]
+        coords = np.zeros((len(ids), 2), dtype=np.float32)
+        for i, id_ in enumerate(ids):
+            if str(id_) in existing:
+                coords[i] = existing[str(id_)]
+        if new_rows:
+            print(f"Projecting {len(new_rows)} new or changed papers into the existing layout...")
+            reducer = DimensionalityReducer.load(model_path)
+            coords[new_rows] = reducer.transform(embeddings[new_rows])
+        else:
+            print("No new papers; existing layout is up to date.")
+        return ids, coords
+
+    print(f"Fitting on all {len(ids)} embeddings...")
+    reducer = make_reducer()
+    coords = reducer.reduce(embeddings)
+    reducer.save(model_path)
+    print(f"Fitted reducer saved to {model_path}")
+    return ids, coords
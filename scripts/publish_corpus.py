@@ -0,0 +1,59 @@
+"""
+前処理済みのコーパス (data/corpus) を新しい版として公開します。
+
+    python scripts/publish_corpus.py --version 20250420
+
+data/corpora/<version> にコーパスをコピーし、エンジンのスナップショットと TF-IDF の学習結果を用意してから
+data/corpora/CURRENT を書き換えます。起動中の API は CURRENT の変更を検知する (CORPUS_WATCH_INTERVAL) か
+POST /admin/reload を受けると、新しい版のエンジンをバックグラウンドで構築してから差し替えます。
+"""
+import argparse
+import shutil
+from datetime import datetime, timezone
+from preprocess_utils import CORPUS_DIR
+from backend.api.main import CORPORA_DIR, VERSION_PATTERN, available_methods
+from backend.api.search.snapshot import ENGINE_SNAPSHOT_DIR
+from backend.api.serve import prepare_shared_arrays
+from backend.core.corpus_store import corpus_exists, publish_corpus_version, read_current_version
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="コーパスを新しい版として data/corpora に公開します")
+    parser.add_argument("--version", default=None, help="版の名前 (省略時は UTC の現在時刻)")
+    parser.add_argument("--keep", type=int, default=3, help="残す版の数 (CURRENT が指す版は常に残す)")
+    parser.add_argument("--no-publish", action="store_true", help="コピーと準備だけ行い、CURRENT は書き換えない")
+    args = parser.parse_args()
+
+    if not corpus_exists(CORPUS_DIR):
+        raise FileNotFoundError(f"{CORPUS_DIR} does not exist. Run scripts/convert_to_corpus.py first.")
+    version = args.version or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    if not VERSION_PATTERN.fullmatch(version):
+        raise ValueError(f"Invalid version name: {version}")
+    target = CORPORA_DIR / version
+    if target.exists():
+        raise FileExistsError(f"{target} already exists")
+
+    CORPORA_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_dir = CORPORA_DIR / f".{version}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    # エンジンのスナップショットは新しい版の内容から作り直す (コピーした古い配列を使わない)
+    shutil.copytree(CORPUS_DIR, tmp_dir, ignore=shutil.ignore_patterns(ENGINE_SNAPSHOT_DIR))
+    prepare_shared_arrays(tmp_dir, available_methods())
+    tmp_dir.rename(target)
+    print(f"Corpus version {version} prepared in {target}")
+    if args.no_publish:
+        raise SystemExit(0)
+
+    publish_corpus_version(CORPORA_DIR, version)
+    print(f"CURRENT now points to {version}")
+
+    # 古い版を削除する (読み込み中のワーカーが開いているファイルは、閉じるまで OS が保持する)
+    current = read_current_version(CORPORA_DIR)
+    versions = sorted(
+        (path for path in CORPORA_DIR.iterdir() if path.is_dir() and not path.name.startswith(".")),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    )
+    for path in versions[max(args.keep, 1):]:
+        if path.name != current:
+            shutil.rmtree(path)
+            print(f"Removed old corpus version {path.name}")
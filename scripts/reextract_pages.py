@@ -0,0 +1,53 @@
+import argparse
+from pathlib import Path
+import preprocess_utils  # noqa: F401 (backend を import できるようにする)
+from backend.core.extract import DEFAULT_PARSER, PARSERS, content_url, parse_content
+from backend.core.html_archive import ARCHIVE_DIR, HtmlArchive, read_pages_dir
+from backend.core.scrape_store import STORE_PATH, ScrapeStore, record_changed_ids
+
+
+def reextract(pages, store, parser=DEFAULT_PARSER, dry_run=False):
+    """
+    保存済みの HTML から再抽出し、内容が変わった論文だけをストアに追記します。
+    再スクレイピングせずに抽出ルールの修正を反映するために使います。
+
+    Returns:
+        list: 内容が変わった (または新たに追加された) 論文 ID
+    """
+    changed = []
+    count = 0
+    for content_id, html in pages:
+        count += 1
+        previous = store.get(content_id)
+        url = previous["url"] if previous else content_url(content_id)
+        record = parse_content(html, content_id, url, parser=parser)
+        if not record.get("title") or record == previous:
+            continue
+        changed.append(content_id)
+        if not dry_run:
+            store.append(record)
+    print(f"{count} pages re-extracted, {len(changed)} records changed")
+    return changed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="保存済みの HTML からスクレイピング結果を再抽出します")
+    parser.add_argument("--archive-dir", type=Path, default=ARCHIVE_DIR, help="スクレイパーが保存した HTML アーカイブ")
+    parser.add_argument("--pages-dir", type=Path, default=None, help="アーカイブの代わりに <id>.html を読むディレクトリ")
+    parser.add_argument("--store", type=Path, default=STORE_PATH)
+    parser.add_argument("--parser", choices=PARSERS, default=DEFAULT_PARSER)
+    parser.add_argument("--dry-run", action="store_true", help="変更される ID を表示するだけで書き込まない")
+    args = parser.parse_args()
+
+    with ScrapeStore(args.store) as store:
+        if args.pages_dir is not None:
+            changed = reextract(read_pages_dir(args.pages_dir), store, parser=args.parser, dry_run=args.dry_run)
+        else:
+            # アーカイブのページは 1 件ずつ展開する
+            with HtmlArchive(args.archive_dir) as archive:
+                changed = reextract(archive.pages(), store, parser=args.parser, dry_run=args.dry_run)
+    if changed and not args.dry_run:
+        # 内容が変わった論文だけ下流の処理 (埋め込み・次元削減) をやり直す
+        record_changed_ids(changed)
+    for content_id in changed:
+        print(f"  {content_id}")
@@ -0,0 +1,119 @@
+"""
+スクレイパーの動作確認用に、コンテンツページを模した静的 HTML を返すローカルサーバー。
+
+    python scripts/stub_content_server.py --port 8000
+    python -m backend.scrape_range --base-url http://localhost:8000/content --start-id 188211 --end-id 188230
+
+/content/<id> に対して、スクレイピング済み JSON の該当論文から本番と同じ構造の HTML を生成して返します。
+--pages-dir を指定した場合は <pages-dir>/<id>.html をそのまま返します。
+存在しない ID には本番と同様にメインページ (h2.full-name) を返します
+(--missing-redirect を指定した場合は / へリダイレクトします)。
+"""
+import argparse
+import json
+import re
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+SCRAPED_DATA_PATH = Path("data/scraped_data_0314.json")
+
+MAIN_PAGE = (
+    "<html><body><h2 class=\"full-name\">"
+    "The ACM CHI conference on Human Factors in Computing Systems</h2></body></html>"
+)
+
+
+def render_content_page(entry):
+    """論文データからスクレイパーのセレクターに対応する HTML を生成します"""
+    authors = "".join(
+        f"<person-card><h5>{escape(a.get('name') or '')}</h5>"
+        f"<p class=\"p-small\">{escape(a.get('affiliation') or '')}</p></person-card>"
+        for a in entry.get("authors") or []
+    )
+    abstract = entry.get("abstract")
+    abstract_block = (
+        f"<white-block><h4>Abstract</h4><p class=\"p-small\">{escape(abstract)}</p></white-block>"
+        if abstract is not None else ""
+    )
+    details = entry.get("details") or {}
+    sessions = "".join(
+        "<schedule-details-card><div class=\"schedule-info\">"
+        f"<h5 class=\"session-name-block\"><span class=\"name\">{escape(s.get('session_name') or '')}</span></h5>"
+        "<date-label><conference-date>"
+        f"<span class=\"mat-mdc-tooltip-trigger\">{escape(s.get('session_date') or '')}</span>"
+        "</conference-date></date-label></div>"
+        "<div class=\"location-container\"><a>"
+        f"<span class=\"mat-mdc-tooltip-trigger\">{escape(s.get('session_venue') or '')}</span>"
+        "</a></div></schedule-details-card>"
+        for s in entry.get("sessions") or []
+    )
+    return (
+        "<html><body>"
+        f"<h3 class=\"content-title\">{escape(entry.get('title') or '')}</h3>"
+        f"{abstract_block}"
+        f"<white-block><h4>Authors</h4>{authors}</white-block>"
+        "<white-block><h4>Details</h4>"
+        f"<content-type-label><span class=\"type-name\">{escape(details.get('content_type') or '')}</span>"
+        f"</content-type-label><duration-label>{escape(details.get('duration') or '')}</duration-label>"
+        "</white-block>"
+        f"<white-block class=\"schedule-details-block\"><div class=\"cards-container\">{sessions}</div></white-block>"
+        "</body></html>"
+    )
+
+
+def make_handler(pages, missing_redirect=False):
+    class Handler(BaseHTTPRequestHandler):
+        def respond(self, send_body):
+            match = re.search(r"/(\d+)/?$", self.path)
+            page = pages(int(match.group(1))) if match else None
+            if page is None and match and missing_redirect:
+                self.send_response(302)
+                self.send_header("Location", "/")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = (page or MAIN_PAGE).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+
+        def do_GET(self):
+            self.respond(True)
+
+        def do_HEAD(self):
+            self.respond(False)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="コンテンツページのスタブサーバーを起動します")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--data", type=Path, default=SCRAPED_DATA_PATH)
+    parser.add_argument("--pages-dir", type=Path, default=None, help="<id>.html を直接返すディレクトリ")
+    parser.add_argument("--missing-redirect", action="store_true",
+                        help="存在しない ID をメインページへリダイレクトする (HEAD による存在チェックの確認用)")
+    args = parser.parse_args()
+
+    if args.pages_dir is not None:
+        def pages(content_id):
+            path = args.pages_dir / f"{content_id}.html"
+            return path.read_text(encoding="utf-8") if path.exists() else None
+    else:
+        with open(args.data, "r", encoding="utf-8") as f:
+            entries = {entry["id"]: entry for entry in json.load(f)}
+
+        def pages(content_id):
+            entry = entries.get(content_id)
+            return render_content_page(entry) if entry else None
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(pages, args.missing_redirect))
+    print(f"Serving stub content pages on http://127.0.0.1:{args.port}/content/<id>")
+    server.serve_forever()
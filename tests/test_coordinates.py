@@ -0,0 +1,26 @@
+"""座標の応答 (CoordinateSet) と条件付きリクエストの確認"""
+import json
+
+from backend.api.coordinates import CoordinateSet, etag_matches
+
+
+def test_etag_matches_lists_weak_validators_and_wildcard():
+    etag = '"abc"'
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('"xyz", "abc"', etag)
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"xyz"', etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches("", etag)
+
+
+def test_dict_format_keeps_file_values(tmp_path):
+    path = tmp_path / "umap_coordinates.json"
+    data = {"188211": [7.630382061004639, -1.25], "188212": [0.008369228246045027, 3.0]}
+    path.write_text(json.dumps(data), encoding="utf-8")
+    coords = CoordinateSet.from_json(path)
+
+    assert json.loads(coords.encoded("dict")["identity"]) == data
+    arrays = json.loads(coords.encoded("arrays")["identity"])
+    assert arrays == {"ids": [188211, 188212], "x": [7.6304, 0.0084], "y": [-1.25, 3.0]}
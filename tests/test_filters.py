@@ -0,0 +1,60 @@
+"""/search の絞り込み列 (FilterColumns) とマスクの確認"""
+from datetime import date
+
+from backend.api.search.bm25_search import BM25Search, words
+from backend.api.search.filters import FilterColumns, SearchFilters, parse_session_date
+
+
+def make_paper(paper_id, session_date, url=None, authors=()):
+    return {
+        "id": paper_id,
+        "url": url or f"https://programs.sigchi.org/chi/2025/program/content/{paper_id}",
+        "title": f"Paper {paper_id}",
+        "authors": [{"name": name, "affiliation": affiliation} for name, affiliation in authors],
+        "details": {"content_type": "Paper"},
+        "sessions": [{"session_date": session_date, "session_venue": "Hall A"}],
+    }
+
+
+def matching_ids(papers, filters):
+    mask = FilterColumns(papers).mask(filters)
+    return [paper["id"] for paper, keep in zip(papers, mask) if keep]
+
+
+def test_parse_session_date_uses_given_year():
+    assert parse_session_date("Mon, 28 Apr | 3:22 PM - 3:34 PM", year=2025) == date(2025, 4, 28)
+    assert parse_session_date("Tue, 14 May | 9:00 AM", year=2024) == date(2024, 5, 14)
+    assert parse_session_date("TBA") is None
+
+
+def test_date_filter_takes_year_from_paper_url():
+    papers = [
+        make_paper(1, "Mon, 28 Apr | 3:22 PM"),
+        make_paper(2, "Tue, 14 May | 9:00 AM", url="https://programs.sigchi.org/chi/2024/program/content/2"),
+    ]
+    assert matching_ids(papers, SearchFilters(date_from=date(2024, 5, 1), date_to=date(2024, 5, 31))) == [2]
+    assert matching_ids(papers, SearchFilters(date_from=date(2025, 4, 26), date_to=date(2025, 5, 1))) == [1]
+
+
+def test_author_filter_matches_non_ascii_names():
+    papers = [
+        make_paper(1, "Mon, 28 Apr | 3:22 PM", authors=[("Jörg Müller", "Universität Bayreuth")]),
+        make_paper(2, "Mon, 28 Apr | 3:22 PM", authors=[("Mia Ller", "ETH Zürich")]),
+        make_paper(3, "Mon, 28 Apr | 3:22 PM", authors=[("山田 花子", "東京大学")]),
+    ]
+    assert words("Jörg MÜLLER") == ["jörg", "müller"]
+    assert matching_ids(papers, SearchFilters(author="müller")) == [1]
+    assert matching_ids(papers, SearchFilters(author="MÜLLER, Jörg")) == [1]
+    assert matching_ids(papers, SearchFilters(author="ller")) == [2]
+    assert matching_ids(papers, SearchFilters(author="山田")) == [3]
+    # 全角英数字は NFKC で半角と同じ語になる
+    assert matching_ids(papers, SearchFilters(author="ＥＴＨ")) == [2]
+
+
+def test_bm25_finds_non_ascii_author_names():
+    papers = [
+        make_paper(1, "Mon, 28 Apr | 3:22 PM", authors=[("Jörg Müller", "Universität Bayreuth")]),
+        make_paper(2, "Mon, 28 Apr | 3:22 PM", authors=[("Mia Ller", "ETH Zürich")]),
+    ]
+    indices, _ = BM25Search(papers).rank("Müller")
+    assert indices.tolist() == [0]
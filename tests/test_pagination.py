@@ -0,0 +1,34 @@
+"""/search/page のカーソルの確認"""
+import pytest
+
+from backend.api.search.pagination import MAX_RESULTS, decode_cursor, encode_cursor, ranking_depth
+
+KEY = ("20250505T060221Z", "haptic feedback", "embedding", (None, None, ("Papers",), (), ()))
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(40, KEY), KEY) == 40
+
+
+@pytest.mark.parametrize("other", [
+    ("20250601T000000Z",) + KEY[1:],  # 再読み込みでコーパスの版が変わった
+    (KEY[0], "haptics") + KEY[2:],
+    KEY[:2] + ("bm25",) + KEY[3:],
+    KEY[:3] + ((None, None, ("Posters",), (), ()),),
+])
+def test_cursor_is_rejected_for_other_queries(other):
+    cursor = encode_cursor(20, KEY)
+    with pytest.raises(ValueError, match="does not match"):
+        decode_cursor(cursor, other)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "", "e30", encode_cursor(-1, KEY)])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, KEY)
+
+
+def test_ranking_depth_is_shared_by_consecutive_pages():
+    assert ranking_depth(21) == ranking_depth(41) == 64
+    assert ranking_depth(65) == 128
+    assert ranking_depth(MAX_RESULTS * 2) == MAX_RESULTS
@@ -0,0 +1,204 @@
+"""
+scripts/stub_content_server.py をローカルで起動し、スクレイパーの取得・抽出・保存の流れを通しで確認します。
+
+Chrome が無い環境でも動くよう、既定では requests でページを取得して Selenium の要素検索だけを真似る
+ドライバーを DriverPool に渡します。Chrome がある場合は実際のヘッドレス Chrome でも同じ確認を行います。
+"""
+import copy
+import importlib.util
+import json
+import shutil
+import threading
+from functools import partial
+from pathlib import Path
+
+import pytest
+import requests
+from bs4 import BeautifulSoup
+from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
+
+from backend import scrape_range
+from backend.core.html_archive import HtmlArchive
+from backend.core.scrape_store import ScrapeStore, load_changed_ids
+from backend.core.scraper import DriverPool
+
+ROOT = Path(__file__).resolve().parents[1]
+
+ENTRIES = {
+    188211: {
+        "id": 188211,
+        "title": "Pooling Browsers for Faster Scraping",
+        "abstract": "We reuse headless browsers across pages & measure the effect.",
+        "authors": [
+            {"name": "Hanako Yamada", "affiliation": "The University of Tokyo"},
+            {"name": "Taro Suzuki", "affiliation": "Kyoto University"},
+        ],
+        "details": {"content_type": "Paper", "duration": "12 min"},
+        "sessions": [{"session_name": "Crawling", "session_date": "Apr 28", "session_venue": "Hall A"}],
+    },
+    188213: {
+        "id": 188213,
+        "title": "A Late-Breaking Work without Sessions",
+        "abstract": "Short abstract.",
+        "authors": [{"name": "Jiro Sato", "affiliation": "Osaka University"}],
+        "details": {"content_type": "Late-Breaking Work", "duration": ""},
+        "sessions": [],
+    },
+}
+MISSING_ID = 188212
+
+
+def load_stub_server():
+    spec = importlib.util.spec_from_file_location("stub_content_server", ROOT / "scripts" / "stub_content_server.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+stub = load_stub_server()
+
+
+def start_server(entries, missing_redirect=False):
+    def pages(content_id):
+        entry = entries.get(content_id)
+        return stub.render_content_page(entry) if entry else None
+
+    server = stub.ThreadingHTTPServer(("127.0.0.1", 0), stub.make_handler(pages, missing_redirect))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def entries():
+    return copy.deepcopy(ENTRIES)
+
+
+@pytest.fixture
+def base_url(entries):
+    server = start_server(entries)
+    yield f"http://127.0.0.1:{server.server_port}/content"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def scrape_paths(tmp_path, monkeypatch):
+    # 従来の JSON (data/scraped_data_0314.json) を取り込まないよう空のディレクトリで実行する
+    monkeypatch.chdir(tmp_path)
+    return {
+        "store_path": tmp_path / "scraped.jsonl",
+        "archive_dir": tmp_path / "html",
+        "missing_filename": tmp_path / "missing_ids.json",
+        "changed_ids_path": tmp_path / "changed_ids.json",
+    }
+
+
+class _Element:
+    def __init__(self, tag):
+        self.text = tag.get_text(" ", strip=True)
+
+
+class HttpDriver:
+    """requests でページを取得し、CSS セレクターによる要素検索だけを WebDriver と同じ形で提供する"""
+
+    def __init__(self):
+        self.session = requests.Session()
+        self.page_source = ""
+        self._soup = BeautifulSoup("", "html.parser")
+
+    def get(self, url):
+        self.page_source = self.session.get(url, timeout=10).text
+        self._soup = BeautifulSoup(self.page_source, "html.parser")
+
+    def find_elements(self, by, value):
+        return [_Element(tag) for tag in self._soup.select(value)]
+
+    def find_element(self, by, value):
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(value)
+        return elements[0]
+
+    def quit(self):
+        self.session.close()
+
+
+def chrome_available():
+    return any(shutil.which(name) for name in ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser"))
+
+
+def test_page_exists_against_stub(base_url, entries):
+    existing = scrape_range.content_url(188211, base_url)
+    missing = scrape_range.content_url(MISSING_ID, base_url)
+    assert scrape_range.page_exists(existing)
+    assert not scrape_range.page_exists(missing)
+
+    server = start_server(entries, missing_redirect=True)
+    try:
+        redirect_url = f"http://127.0.0.1:{server.server_port}/content"
+        assert scrape_range.page_exists(scrape_range.content_url(188211, redirect_url), method="HEAD")
+        assert not scrape_range.page_exists(scrape_range.content_url(MISSING_ID, redirect_url), method="HEAD")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_driver_pool_keeps_driver_on_page_timeout():
+    created = []
+
+    def factory():
+        driver = HttpDriver()
+        created.append(driver)
+        return driver
+
+    with DriverPool(1, factory=factory) as pool:
+        for error in (TimeoutException("slow page"), scrape_range.ContentNotFound("missing")):
+            with pytest.raises(type(error)):
+                with pool.acquire():
+                    raise error
+        assert len(created) == 1
+
+        # ドライバー自体の異常では作り直す
+        with pytest.raises(WebDriverException):
+            with pool.acquire():
+                raise WebDriverException("chrome not reachable")
+        with pool.acquire() as driver:
+            assert driver is created[1]
+    assert len(created) == 2
+
+
+def test_scrape_id_range_fetches_extracts_and_stores(base_url, entries, scrape_paths, monkeypatch):
+    monkeypatch.setattr(scrape_range, "DriverPool", partial(DriverPool, factory=HttpDriver))
+
+    results = scrape_range.scrape_id_range(188211, 188213, workers=2, rate=100, base_url=base_url, **scrape_paths)
+
+    expected = [{**entries[i], "url": scrape_range.content_url(i, base_url)} for i in sorted(entries)]
+    assert results == expected
+    with ScrapeStore(scrape_paths["store_path"]) as store:
+        assert sorted(store.ids) == sorted(entries)
+        assert store.get(188211) == expected[0]
+    with HtmlArchive(scrape_paths["archive_dir"]) as archive:
+        archived = BeautifulSoup(archive.get(188213), "html.parser")
+        assert archived.select_one("h3.content-title").text == entries[188213]["title"]
+    assert json.loads(scrape_paths["missing_filename"].read_text()) == [MISSING_ID]
+
+    # 取得済み・存在しない ID は再実行時にスキップされる
+    assert scrape_range.scrape_id_range(188211, 188213, workers=2, rate=100, base_url=base_url, **scrape_paths) == []
+
+    # 再取得では内容が変わった ID だけが更新され、変更として記録される
+    entries[188213]["abstract"] = "Revised abstract."
+    results = scrape_range.scrape_id_range(188211, 188213, workers=2, rate=100, base_url=base_url,
+                                           refresh=True, **scrape_paths)
+    assert [entry["id"] for entry in results] == [188213]
+    assert load_changed_ids(scrape_paths["changed_ids_path"]) == {188213}
+    with ScrapeStore(scrape_paths["store_path"]) as store:
+        assert store.get(188213)["abstract"] == "Revised abstract."
+
+
+@pytest.mark.skipif(not chrome_available(), reason="Chrome is not installed")
+def test_scrape_id_range_with_headless_chrome(base_url, entries, scrape_paths):
+    results = scrape_range.scrape_id_range(188211, 188213, workers=1, rate=100, base_url=base_url, **scrape_paths)
+
+    assert [entry["id"] for entry in results] == sorted(entries)
+    assert results[0]["title"] == entries[188211]["title"]
+    assert json.loads(scrape_paths["missing_filename"].read_text()) == [MISSING_ID]
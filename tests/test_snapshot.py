@@ -0,0 +1,75 @@
+"""エンジンのスナップショットが、元のコーパスの内容が変わった場合に使われないことの確認"""
+import numpy as np
+import pytest
+
+from backend.api.search.bm25_search import BM25Search
+from backend.api.search.filters import FilterColumns
+from backend.api.search.snapshot import (
+    ENGINE_SNAPSHOT_DIR, load_bm25_snapshot, load_filter_snapshot, save_engine_snapshot, snapshot_parts,
+)
+from backend.core.corpus_store import PaperStore, content_fingerprint, save_corpus
+
+
+def make_papers(titles):
+    return [
+        {
+            "id": 188211 + i,
+            "url": f"https://programs.sigchi.org/chi/2025/program/content/{188211 + i}",
+            "title": title,
+            "abstract": "A study of haptic feedback.",
+            "authors": [{"name": "Hanako Yamada", "affiliation": "The University of Tokyo"}],
+            "details": {"content_type": "Paper"},
+            "sessions": [{"session_date": "Mon, 28 Apr | 3:22 PM", "session_venue": "Hall A"}],
+            "embedding": [float(i), 1.0],
+        }
+        for i, title in enumerate(titles)
+    ]
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    corpus_dir = tmp_path / "corpus"
+    save_corpus(make_papers(["Vibrotactile Gloves", "Mid-air Haptics", "Thermal Displays"]), corpus_dir)
+    papers = PaperStore(corpus_dir)
+    save_engine_snapshot(corpus_dir / ENGINE_SNAPSHOT_DIR, papers, bm25=BM25Search(papers), filters=FilterColumns(papers))
+    yield corpus_dir, papers
+    papers.close()
+
+
+def test_snapshot_is_used_for_unchanged_corpus(corpus):
+    corpus_dir, papers = corpus
+    snapshot_dir = corpus_dir / ENGINE_SNAPSHOT_DIR
+    assert snapshot_parts(snapshot_dir, papers) == {"bm25", "filters"}
+
+    bm25 = load_bm25_snapshot(snapshot_dir, papers)
+    assert bm25 is not None
+    indices, _ = bm25.rank("thermal")
+    assert indices.tolist() == [2]
+    assert load_filter_snapshot(snapshot_dir, papers) is not None
+
+
+def test_snapshot_is_ignored_when_content_changes_with_same_ids(corpus):
+    corpus_dir, papers = corpus
+    snapshot_dir = corpus_dir / ENGINE_SNAPSHOT_DIR
+    before = content_fingerprint(corpus_dir)
+
+    # 論文 ID は同じまま、再取得でタイトルだけが変わった
+    save_corpus(make_papers(["Vibrotactile Gloves", "Mid-air Haptics", "Electrotactile Sleeves"]), corpus_dir)
+    changed = PaperStore(corpus_dir)
+    try:
+        assert content_fingerprint(corpus_dir) != before
+        assert np.array_equal(np.load(snapshot_dir / "ids.npy"), [188211, 188212, 188213])
+        assert snapshot_parts(snapshot_dir, changed) == set()
+        assert load_bm25_snapshot(snapshot_dir, changed) is None
+        assert load_filter_snapshot(snapshot_dir, changed) is None
+    finally:
+        changed.close()
+
+
+def test_snapshot_is_ignored_for_other_settings(corpus):
+    corpus_dir, papers = corpus
+    snapshot_dir = corpus_dir / ENGINE_SNAPSHOT_DIR
+    assert "bm25" not in snapshot_parts(snapshot_dir, papers, k1=1.2)
+    assert load_bm25_snapshot(snapshot_dir, papers, k1=1.2) is None
+    assert "filters" not in snapshot_parts(snapshot_dir, papers, year=2024)
+    assert load_filter_snapshot(snapshot_dir, papers, year=2024) is None
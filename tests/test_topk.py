@@ -0,0 +1,46 @@
+"""select_top_k の順位の決め方 (同点時の ID 順・min_score・mask) の確認"""
+import numpy as np
+
+from backend.api.search.topk import select_top_k
+
+
+def test_orders_by_score_then_id():
+    scores = np.array([0.5, 0.9, 0.5, 0.7, 0.5], dtype=np.float32)
+    ids = np.array([30, 10, 20, 40, 5])
+    # 0.5 の同点 3 件は ID の小さい順 (5, 20, 30)
+    assert select_top_k(scores, 5, ids=ids).tolist() == [1, 3, 4, 2, 0]
+    # k 番目が同点でも、境界をまたいで ID の小さいものが選ばれる
+    assert select_top_k(scores, 3, ids=ids).tolist() == [1, 3, 4]
+    assert select_top_k(scores, 4, ids=ids).tolist() == [1, 3, 4, 2]
+
+
+def test_ties_without_ids_use_index_order():
+    scores = np.array([1.0, 2.0, 1.0, 1.0])
+    assert select_top_k(scores, 3).tolist() == [1, 0, 2]
+
+
+def test_matches_full_sort_on_random_scores():
+    rng = np.random.default_rng(0)
+    # 同点が多くなるよう粗く丸めたスコア
+    scores = np.round(rng.random(5000), 2).astype(np.float32)
+    ids = rng.permutation(100_000)[:5000]
+    expected = np.lexsort((ids, -scores))[:100]
+    assert select_top_k(scores, 100, ids=ids).tolist() == expected.tolist()
+
+
+def test_min_score_and_mask_are_applied_before_selection():
+    scores = np.array([0.9, 0.8, 0.7, 0.6, 0.5])
+    ids = np.arange(5)
+    mask = np.array([False, True, True, True, True])
+    # 除外された要素の代わりに次点が入り、返すのは元の配列のインデックス
+    assert select_top_k(scores, 2, ids=ids, mask=mask).tolist() == [1, 2]
+    assert select_top_k(scores, 10, ids=ids, min_score=0.7).tolist() == [0, 1, 2]
+    assert select_top_k(scores, 10, ids=ids, min_score=0.7, mask=mask).tolist() == [1, 2]
+    assert select_top_k(scores, 3, ids=ids, mask=np.zeros(5, dtype=bool)).tolist() == []
+
+
+def test_k_out_of_range():
+    scores = np.array([0.1, 0.3, 0.2])
+    assert select_top_k(scores, 10).tolist() == [1, 2, 0]
+    assert select_top_k(scores, 0).tolist() == []
+    assert select_top_k(np.empty(0), 5).tolist() == []